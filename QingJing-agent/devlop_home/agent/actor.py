@@ -5,6 +5,7 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
 import json
 import traceback
 from typing import List
@@ -50,17 +51,7 @@ class ActorAgent(BaseAgent):
 
         table_meta_list, tool_collection = self.get_table_meta_and_tool()
 
-        system_prompt, user_prompt = self.get_prompt_atomic_question(table_meta_list)
-        messages = [
-            {
-                "role": "system",
-                "content": system_prompt,
-            },
-            {
-                "role": "user",
-                "content": user_prompt,
-            },
-        ]
+        messages = self.get_messages_atomic_question(table_meta_list)
         response = self.llm.ask(messages, tool_collection.to_param())
         messages.append(response.choices[0].message.model_dump())
 
@@ -68,53 +59,117 @@ class ActorAgent(BaseAgent):
         for _ in range(utils.module_config.max_function_calling_iterations):
             if not response.choices[0].message.tool_calls:
                 break
-            for tool_call in response.choices[0].message.tool_calls:
-                function_name = tool_call.function.name
-                args = json.loads(tool_call.function.arguments)
-                if function_name in ToolPool.get_all_tools().names():
-                    try:
-                        logger.debug(f"【开始执行工具函数{function_name}】", args)
-                        function_result = ToolPool.execute(
-                            name=function_name, args=args
-                        ).to_dict()
-                        function_results.append(function_result)
-                        logger.info(
-                            f"【工具函数{function_name}执行结果】", function_result
-                        )
-                        messages.append(
-                            {
-                                "role": "tool",
-                                "content": str(function_result),
-                                "tool_call_id": tool_call.id,
-                            }
-                        )
-                    except Exception:
-                        logger.warning(
-                            f"【工具函数{function_name}执行失败】",
-                            args,
-                            "\n",
-                            traceback.format_exc(),
-                        )
-                        messages.append(
-                            {
-                                "role": "tool",
-                                "content": f"工具函数执行失败，请检查函数参数是否错误：{args}",
-                                "tool_call_id": tool_call.id,
-                            }
-                        )
-                else:
-                    logger.warning(f"【未找到工具函数{function_name}】")
+            self.execute_tool_calls(
+                response.choices[0].message.tool_calls, messages, function_results
+            )
+            response = self.llm.ask(messages, tool_collection.to_param())
+            messages.append(response.choices[0].message.model_dump())
+
+        return self.set_answer(
+            response, function_results, table_meta_list, tool_collection
+        )
+
+    async def act_async(self) -> Subtask:
+        """
+        获得原子问题的答案（异步），工具函数在线程池中执行
+        """
+        logger.info("【开始获取原子问题答案】", self.question())
+
+        await self.rewrite_atomic_question_async()
+
+        table_meta_list, tool_collection = await self.get_table_meta_and_tool_async()
+
+        messages = self.get_messages_atomic_question(table_meta_list)
+        response = await self.async_llm.ask(messages, tool_collection.to_param())
+        messages.append(response.choices[0].message.model_dump())
+
+        function_results = []
+        for _ in range(utils.module_config.max_function_calling_iterations):
+            if not response.choices[0].message.tool_calls:
+                break
+            await asyncio.to_thread(
+                self.execute_tool_calls,
+                response.choices[0].message.tool_calls,
+                messages,
+                function_results,
+            )
+            response = await self.async_llm.ask(messages, tool_collection.to_param())
+            messages.append(response.choices[0].message.model_dump())
+
+        return self.set_answer(
+            response, function_results, table_meta_list, tool_collection
+        )
+
+    def execute_tool_calls(
+        self, tool_calls: list, messages: list[dict], function_results: list[dict]
+    ):
+        """
+        执行工具函数，将执行结果追加到对话消息和工具函数执行结果中
+
+        :param tool_calls: LLM 返回的工具函数调用
+        :param messages: 对话消息
+        :param function_results: 工具函数执行结果
+        """
+        for tool_call in tool_calls:
+            function_name = tool_call.function.name
+            args = json.loads(tool_call.function.arguments)
+            if function_name in ToolPool.get_all_tools().names():
+                try:
+                    logger.debug(f"【开始执行工具函数{function_name}】", args)
+                    function_result = ToolPool.execute(
+                        name=function_name, args=args
+                    ).to_dict()
+                    function_results.append(function_result)
+                    logger.info(
+                        f"【工具函数{function_name}执行结果】", function_result
+                    )
                     messages.append(
                         {
                             "role": "tool",
-                            "content": f"未找到工具函数{function_name}",
+                            "content": str(function_result),
                             "tool_call_id": tool_call.id,
                         }
                     )
+                except Exception:
+                    logger.warning(
+                        f"【工具函数{function_name}执行失败】",
+                        args,
+                        "\n",
+                        traceback.format_exc(),
+                    )
+                    messages.append(
+                        {
+                            "role": "tool",
+                            "content": f"工具函数执行失败，请检查函数参数是否错误：{args}",
+                            "tool_call_id": tool_call.id,
+                        }
+                    )
+            else:
+                logger.warning(f"【未找到工具函数{function_name}】")
+                messages.append(
+                    {
+                        "role": "tool",
+                        "content": f"未找到工具函数{function_name}",
+                        "tool_call_id": tool_call.id,
+                    }
+                )
 
-            response = self.llm.ask(messages, tool_collection.to_param())
-            messages.append(response.choices[0].message.model_dump())
+    def set_answer(
+        self,
+        response,
+        function_results: list[dict],
+        table_meta_list: list[dict],
+        tool_collection: ToolCollection,
+    ) -> Subtask:
+        """
+        记录原子问题的答案
 
+        :param response: LLM 最后一次的回答
+        :param function_results: 工具函数执行结果
+        :param table_meta_list: 数据表结构列表
+        :param tool_collection: 所需工具
+        :return: 原子问题
+        """
         answer = utils.parse_res(response)
         logger.success("【原子问题答案】", answer)
         self.task.answer = answer
@@ -123,6 +178,24 @@ class ActorAgent(BaseAgent):
         self.task.need_tables = [table["table_name"] for table in table_meta_list]
         return self.task
 
+    def get_messages_atomic_question(self, table_meta_list: list[dict]) -> list[dict]:
+        """
+        获得求解原子问题的对话消息
+
+        :param table_meta_list: 数据表结构列表
+        """
+        system_prompt, user_prompt = self.get_prompt_atomic_question(table_meta_list)
+        return [
+            {
+                "role": "system",
+                "content": system_prompt,
+            },
+            {
+                "role": "user",
+                "content": user_prompt,
+            },
+        ]
+
     def get_prompt_atomic_question(
         self, table_meta_list: list[dict]
     ) -> tuple[str, str]:
@@ -161,32 +234,51 @@ class ActorAgent(BaseAgent):
         :param decomposition: 问题的分解结果
         :param task: 原子问题
         """
-        if (
+        if self.need_rewrite_atomic_question():
+            logger.debug("【开始重写原子问题】", self.question())
+            response = self.llm.ask(self.get_messages_rewrite_atomic_question())
+            self.set_rewritten_question(response)
+
+    async def rewrite_atomic_question_async(self):
+        """
+        重写原子问题（异步）
+        """
+        if self.need_rewrite_atomic_question():
+            logger.debug("【开始重写原子问题】", self.question())
+            response = await self.async_llm.ask(
+                self.get_messages_rewrite_atomic_question()
+            )
+            self.set_rewritten_question(response)
+
+    def need_rewrite_atomic_question(self) -> bool:
+        return (
             utils.module_config.enable_rewrite_atomic_question
             and self.has_parent_task()
-        ):
-            logger.debug("【开始重写原子问题】", self.question())
-            system_prompt, user_prompt = self.get_prompt_rewrite_atomic_question()
-            messages = [
-                {
-                    "role": "system",
-                    "content": system_prompt,
-                },
-                {
-                    "role": "user",
-                    "content": user_prompt,
-                },
-            ]
-            response = self.llm.ask(messages)
-            try:
-                rewritten_question = str(utils.parse_res(response))
-                logger.special(
-                    "【重写原子问题】",
-                    f"原问题：{self.question()}----->重写后的问题：{rewritten_question}",
-                )
-                self.task.question = rewritten_question
-            except Exception as e:
-                logger.error(f"【原子问题预处理出错】\n{traceback.format_exc()}")
+        )
+
+    def get_messages_rewrite_atomic_question(self) -> list[dict]:
+        system_prompt, user_prompt = self.get_prompt_rewrite_atomic_question()
+        return [
+            {
+                "role": "system",
+                "content": system_prompt,
+            },
+            {
+                "role": "user",
+                "content": user_prompt,
+            },
+        ]
+
+    def set_rewritten_question(self, response):
+        try:
+            rewritten_question = str(utils.parse_res(response))
+            logger.special(
+                "【重写原子问题】",
+                f"原问题：{self.question()}----->重写后的问题：{rewritten_question}",
+            )
+            self.task.question = rewritten_question
+        except Exception as e:
+            logger.error(f"【原子问题预处理出错】\n{traceback.format_exc()}")
 
     def get_prompt_rewrite_atomic_question(self) -> tuple[str, str]:
         """
@@ -235,13 +327,36 @@ class ActorAgent(BaseAgent):
         :return: 数据表的元信息和所需工具
         """
         logger.debug("【开始获取原子问题所需数据表和工具】", self.question())
-        messages = [
+        response = self.llm.ask(
+            self.get_messages_get_table_meta_and_tool(), stop_after_json=True
+        )
+        return self.parse_table_meta_and_tool(response)
+
+    async def get_table_meta_and_tool_async(self) -> tuple[list[dict], ToolCollection]:
+        """
+        获得问题所需的数据表的元信息和所需工具（异步）
+        """
+        logger.debug("【开始获取原子问题所需数据表和工具】", self.question())
+        response = await self.async_llm.ask(
+            self.get_messages_get_table_meta_and_tool(), stop_after_json=True
+        )
+        return self.parse_table_meta_and_tool(response)
+
+    def get_messages_get_table_meta_and_tool(self) -> list[dict]:
+        return [
             {
                 "role": "user",
                 "content": self.get_prompt_get_table_meta_and_tool(),
             },
         ]
-        response = self.llm.ask(messages)
+
+    def parse_table_meta_and_tool(self, response) -> tuple[list[dict], ToolCollection]:
+        """
+        解析所需的数据表和工具
+
+        :param response: LLM 的回答
+        :return: 数据表的元信息和所需工具
+        """
         res = json.loads(utils.parse_res(response))
         tables = res.get("tables", [])
         tools = res.get("tools", [])
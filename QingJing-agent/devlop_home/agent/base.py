@@ -8,9 +8,9 @@
 from abc import ABC, abstractmethod
 from typing import Any, List, Optional
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
-from llm import LLM
+from llm import LLM, AsyncLLM
 from schema import Memory, Message
 
 
@@ -25,6 +25,7 @@ class BaseAgent(BaseModel, ABC):
 
     llm: LLM = Field(default_factory=LLM, description="LLM实例")
     memory: Memory = Field(default_factory=Memory, description="Agent的记忆模块")
+    _async_llm: Optional[AsyncLLM] = PrivateAttr(None)
 
     class Config:
         arbitrary_types_allowed = True
@@ -61,6 +62,13 @@ class BaseAgent(BaseModel, ABC):
         :return Any: 外部知识
         """
 
+    @property
+    def async_llm(self) -> AsyncLLM:
+        """异步 LLM 实例，首次使用时按 llm 的配置创建"""
+        if self._async_llm is None:
+            self._async_llm = AsyncLLM(self.llm.config_name, self.llm.api_config)
+        return self._async_llm
+
     @property
     def messages(self) -> List[Message]:
         """Retrieve a list of messages from the agent's memory."""
@@ -37,30 +37,33 @@ class CriticAgent(BaseAgent):
         :return: LLM 评估后选出的最佳答案
         """
 
-        vote_res = VoteResult(id, question, vote_times)
-        vote_res.solutions = solutions
+        vote_res = CriticAgent.init_vote_result(id, question, vote_times, solutions)
+        if vote_res.final_answer is not None:
+            return vote_res
 
-        if len(vote_res.solutions) == 1:
+        try:
+            messages = self.get_messages_vote(question, vote_res)
+            best_answer = parse_res(self.llm.ask(messages))
+            vote_res.final_answer = ReasoningAnswer(best_answer)
+        except Exception:
+            logger.error(f"【第{id}题投票错误】\n{traceback.format_exc()}")
             vote_res.final_answer = vote_res.solutions[0].reasoning_answer
-            return vote_res
-        elif len(vote_res.solutions) == 0:
-            vote_res.final_answer = ReasoningAnswer(answer="")
+
+        return vote_res
+
+    async def vote_async(
+        self, id: str, question: str, vote_times: int, solutions: list[ProblemSolution]
+    ) -> VoteResult:
+        """
+        让 LLM 评估选出最优答案（异步）
+        """
+        vote_res = CriticAgent.init_vote_result(id, question, vote_times, solutions)
+        if vote_res.final_answer is not None:
             return vote_res
 
         try:
-            answer_content = "\n".join(
-                [
-                    f"答案 {i+1}: {result}"
-                    for i, result in enumerate(vote_res.get_answers())
-                ]
-            )
-            messages = [
-                {"role": "system", "content": self.get_prompt_vote()},
-                {"role": "user", "content": f"问题：{question}\n{answer_content}"},
-            ]
-            logger.info(f"【开始投票】问题：{question}\n{answer_content}")
-
-            best_answer = parse_res(self.llm.ask(messages))
+            messages = self.get_messages_vote(question, vote_res)
+            best_answer = parse_res(await self.async_llm.ask(messages))
             vote_res.final_answer = ReasoningAnswer(best_answer)
         except Exception:
             logger.error(f"【第{id}题投票错误】\n{traceback.format_exc()}")
@@ -68,6 +71,32 @@ class CriticAgent(BaseAgent):
 
         return vote_res
 
+    @staticmethod
+    def init_vote_result(
+        id: str, question: str, vote_times: int, solutions: list[ProblemSolution]
+    ) -> VoteResult:
+        """
+        创建投票结果，答案不超过一个时直接确定最终答案
+        """
+        vote_res = VoteResult(id, question, vote_times)
+        vote_res.solutions = solutions
+
+        if len(vote_res.solutions) == 1:
+            vote_res.final_answer = vote_res.solutions[0].reasoning_answer
+        elif len(vote_res.solutions) == 0:
+            vote_res.final_answer = ReasoningAnswer(answer="")
+        return vote_res
+
+    def get_messages_vote(self, question: str, vote_res: VoteResult) -> list[dict]:
+        answer_content = "\n".join(
+            [f"答案 {i+1}: {result}" for i, result in enumerate(vote_res.get_answers())]
+        )
+        logger.info(f"【开始投票】问题：{question}\n{answer_content}")
+        return [
+            {"role": "system", "content": self.get_prompt_vote()},
+            {"role": "user", "content": f"问题：{question}\n{answer_content}"},
+        ]
+
     def get_prompt_vote() -> str:
         """
         获得投票模板
@@ -76,15 +105,47 @@ class CriticAgent(BaseAgent):
         """
         return VOTE_PROMPT
 
-    def correct(self, solution: ProblemSolution, times: int = 3) -> ReasoningAnswer:
+    def correct(
+        self, solution: ProblemSolution, times: int = 3, refresh: bool = False
+    ) -> ReasoningAnswer:
         """
         获得问题纠错的答案
 
         :param solution: 问题解答
+        :param times: 纠错出错时的重试次数
+        :param refresh: 不读取回答缓存，重试时为 True
         :return: 问题纠错的答案
         """
         logger.info(f"【开始纠错问题{solution.id}的答案】", solution.to_correct_json())
-        messages = [
+        response = self.llm.ask(
+            self.get_messages_correct(solution), stop_after_json=True, refresh=refresh
+        )
+        try:
+            return CriticAgent.parse_correct(response, solution)
+        except Exception as e:
+            logger.error(f"【问题{solution.id}纠错出错】\n{traceback.format_exc()}")
+            if times > 0:
+                return self.correct(solution, times - 1, refresh=True)
+
+    async def correct_async(
+        self, solution: ProblemSolution, times: int = 3, refresh: bool = False
+    ) -> ReasoningAnswer:
+        """
+        获得问题纠错的答案（异步）
+        """
+        logger.info(f"【开始纠错问题{solution.id}的答案】", solution.to_correct_json())
+        response = await self.async_llm.ask(
+            self.get_messages_correct(solution), stop_after_json=True, refresh=refresh
+        )
+        try:
+            return CriticAgent.parse_correct(response, solution)
+        except Exception as e:
+            logger.error(f"【问题{solution.id}纠错出错】\n{traceback.format_exc()}")
+            if times > 0:
+                return await self.correct_async(solution, times - 1, refresh=True)
+
+    def get_messages_correct(self, solution: ProblemSolution) -> list[dict]:
+        return [
             {
                 "role": "system",
                 "content": self.get_prompt_correct(solution.question),
@@ -94,18 +155,15 @@ class CriticAgent(BaseAgent):
                 "content": str(solution.to_correct_json()),
             },
         ]
-        response = self.llm.ask(messages)
-        try:
-            res_answer = solution.reasoning_answer.clone()
-            res = json.loads(parse_res(response))
-            res_answer.corrected_reasoning = res["corrected_reasoning"]
-            res_answer.corrected_answer = res["corrected_answer"]
-            res_answer.correct = res["correct"]
-            return res_answer
-        except Exception as e:
-            logger.error(f"【问题{solution.id}纠错出错】\n{traceback.format_exc()}")
-            if times > 0:
-                return self.get_correct(times - 1)
+
+    @staticmethod
+    def parse_correct(response, solution: ProblemSolution) -> ReasoningAnswer:
+        res_answer = solution.reasoning_answer.clone()
+        res = json.loads(parse_res(response))
+        res_answer.corrected_reasoning = res["corrected_reasoning"]
+        res_answer.corrected_answer = res["corrected_answer"]
+        res_answer.correct = res["correct"]
+        return res_answer
 
     def get_prompt_correct(self, question: str) -> str:
         """
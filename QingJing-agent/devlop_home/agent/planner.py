@@ -5,9 +5,11 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
 import json
 
 import concurrent
+import contextvars
 import traceback
 import utils
 from agent.actor import ActorAgent
@@ -56,8 +58,14 @@ class PlannerAgent(BaseAgent):
                 futures = []
                 for task in level_tasks:
                     if not task.completed():
+                        # 在当前上下文中执行，保留 refresh_cache 等上下文变量
                         futures.append(
-                            executor.submit(self.handle_task, task, decomposition)
+                            executor.submit(
+                                contextvars.copy_context().run,
+                                self.handle_task,
+                                task,
+                                decomposition,
+                            )
                         )
 
                 for future in concurrent.futures.as_completed(futures):
@@ -67,7 +75,7 @@ class PlannerAgent(BaseAgent):
                 utils.module_config.enable_update_decomposition
                 and current_level != sorted_levels[-1]
             ):
-                decomposition = self.update_planning(self.question, decomposition)
+                decomposition = self.update_planning(decomposition)
                 solution.decomposition = decomposition
                 tasks_by_level, sorted_levels = PlannerAgent.group_tasks_by_level(
                     decomposition.subtasks
@@ -86,6 +94,58 @@ class PlannerAgent(BaseAgent):
                 solution.reasoning_answer = reasoning_answer
         return solution
 
+    async def act_async(self) -> ProblemSolution:
+        """
+        异步获得问题的解答，同一级别的子任务并发执行，并发数由 AsyncLLM 的全局信号量限制
+        """
+        solution = ProblemSolution(self.id, self.question)
+
+        decomposition = await self.get_planning_async()
+        if not decomposition.raw_question:
+            decomposition.raw_question = solution.question
+        solution.decomposition = decomposition
+        solution.init_decomposition = decomposition.clone()
+
+        tasks_by_level, sorted_levels = PlannerAgent.group_tasks_by_level(
+            decomposition.subtasks
+        )
+        current_index = 0
+
+        while current_index < len(sorted_levels):
+            current_level = sorted_levels[current_index]
+            level_tasks: list[Subtask] = tasks_by_level[current_level]
+
+            await asyncio.gather(
+                *[
+                    self.handle_task_async(task, decomposition)
+                    for task in level_tasks
+                    if not task.completed()
+                ]
+            )
+
+            if (
+                utils.module_config.enable_update_decomposition
+                and current_level != sorted_levels[-1]
+            ):
+                decomposition = await self.update_planning_async(decomposition)
+                solution.decomposition = decomposition
+                tasks_by_level, sorted_levels = PlannerAgent.group_tasks_by_level(
+                    decomposition.subtasks
+                )
+                if current_level == sorted_levels[-1]:
+                    break
+
+            current_index += 1
+
+        solution.reasoning_answer = ReasoningAnswer(
+            solution.decomposition.subtasks[-1].answer
+        )
+        if utils.module_config.enable_summary:
+            reasoning_answer = await self.summary_async(solution)
+            if reasoning_answer:
+                solution.reasoning_answer = reasoning_answer
+        return solution
+
     @staticmethod
     def group_tasks_by_level(subtasks):
         """
@@ -104,15 +164,55 @@ class PlannerAgent(BaseAgent):
         sorted_levels = sorted(tasks_by_level.keys())
         return tasks_by_level, sorted_levels
 
-    def summary(self, solution: ProblemSolution, times: int = 3) -> ReasoningAnswer:
+    def summary(
+        self, solution: ProblemSolution, times: int = 3, refresh: bool = False
+    ) -> ReasoningAnswer:
         """
         获得问题总结的答案
 
         :param solution: 问题解答
+        :param times: 总结出错时的重试次数
+        :param refresh: 不读取回答缓存，重试时为 True
         :return: 问题总结的答案
         """
         logger.info(f"【开始总结问题{solution.id}的答案】", solution.to_summary_str())
-        messages = [
+        response = self.llm.ask(
+            self.get_messages_summary(solution),
+            tools=ToolPool.get_calculate_tools().to_param(),
+            refresh=refresh,
+        )
+        try:
+            return self.parse_summary(response, solution)
+        except Exception as e:
+            logger.error(f"【问题{solution.id}总结出错】\n{traceback.format_exc()}")
+            if times > 0:
+                return self.summary(solution, times - 1, refresh=True)
+            else:
+                return None
+
+    async def summary_async(
+        self, solution: ProblemSolution, times: int = 3, refresh: bool = False
+    ) -> ReasoningAnswer:
+        """
+        获得问题总结的答案（异步）
+        """
+        logger.info(f"【开始总结问题{solution.id}的答案】", solution.to_summary_str())
+        response = await self.async_llm.ask(
+            self.get_messages_summary(solution),
+            tools=ToolPool.get_calculate_tools().to_param(),
+            refresh=refresh,
+        )
+        try:
+            return self.parse_summary(response, solution)
+        except Exception as e:
+            logger.error(f"【问题{solution.id}总结出错】\n{traceback.format_exc()}")
+            if times > 0:
+                return await self.summary_async(solution, times - 1, refresh=True)
+            else:
+                return None
+
+    def get_messages_summary(self, solution: ProblemSolution) -> list[dict]:
+        return [
             {
                 "role": "system",
                 "content": self.get_prompt_summary(),
@@ -122,20 +222,12 @@ class PlannerAgent(BaseAgent):
                 "content": solution.to_summary_str(),
             },
         ]
-        response = self.llm.ask(
-            messages, tools=ToolPool.get_calculate_tools().to_param()
-        )
-        try:
-            res = json.loads(parse_res(response))
-            res_answer = ReasoningAnswer.from_dict(res)
-            logger.special(f"【问题{solution.id}的总结结果】: \n{res_answer}")
-            return res_answer
-        except Exception as e:
-            logger.error(f"【问题{solution.id}总结出错】\n{traceback.format_exc()}")
-            if times > 0:
-                return self.summary(solution, times - 1)
-            else:
-                return None
+
+    def parse_summary(self, response, solution: ProblemSolution) -> ReasoningAnswer:
+        res = json.loads(parse_res(response))
+        res_answer = ReasoningAnswer.from_dict(res)
+        logger.special(f"【问题{solution.id}的总结结果】: \n{res_answer}")
+        return res_answer
 
     def get_prompt_summary(self) -> str:
         """
@@ -157,7 +249,22 @@ class PlannerAgent(BaseAgent):
         """
         logger.info(f"【开始获取问题{self.id}的分解结果】", self.question)
         tools = self.get_tool()
-        messages = [
+        response = self.llm.ask(self.get_messages_planning(tools), stop_after_json=True)
+        return self.parse_planning(response, tools)
+
+    async def get_planning_async(self) -> Decomposition:
+        """
+        获得问题的分解结果（异步）
+        """
+        logger.info(f"【开始获取问题{self.id}的分解结果】", self.question)
+        tools = await self.get_tool_async()
+        response = await self.async_llm.ask(
+            self.get_messages_planning(tools), stop_after_json=True
+        )
+        return self.parse_planning(response, tools)
+
+    def get_messages_planning(self, tools: list[str]) -> list[dict]:
+        return [
             {
                 "role": "system",
                 "content": self.get_planning_prompt(tools=tools),
@@ -167,7 +274,8 @@ class PlannerAgent(BaseAgent):
                 "content": self.question,
             },
         ]
-        response = self.llm.ask(messages)
+
+    def parse_planning(self, response, tools: list[str]) -> Decomposition:
         res = json.loads(parse_res(response))
         decomposition = Decomposition.from_dict(res)
         decomposition.need_tools = tools
@@ -182,8 +290,24 @@ class PlannerAgent(BaseAgent):
         :return: 更新后的decomposition
         """
         logger.debug("【开始更新任务分解树】")
+        response = self.llm.ask(
+            self.get_messages_update_planning(decomposition), stop_after_json=True
+        )
+        return self.parse_update_planning(response, decomposition)
+
+    async def update_planning_async(self, decomposition: Decomposition) -> Decomposition:
+        """
+        询问 LLM 是否需要更新任务分解树（异步）
+        """
+        logger.debug("【开始更新任务分解树】")
+        response = await self.async_llm.ask(
+            self.get_messages_update_planning(decomposition), stop_after_json=True
+        )
+        return self.parse_update_planning(response, decomposition)
+
+    def get_messages_update_planning(self, decomposition: Decomposition) -> list[dict]:
         user_prompt = "已知初始任务问题为：<<question>> \n 当前任务分解树如下:<<decomposition>>\n 是否需要更新任务分解树？"
-        messages = [
+        return [
             {
                 "role": "system",
                 "content": self.get_prompt_update_decomposition(),
@@ -195,8 +319,10 @@ class PlannerAgent(BaseAgent):
                 ).replace("<<decomposition>>", str(decomposition.to_update_dict())),
             },
         ]
-        response = self.llm.ask(messages)
 
+    def parse_update_planning(
+        self, response, decomposition: Decomposition
+    ) -> Decomposition:
         try:
             res = json.loads(parse_res(response))
         except Exception as e:
@@ -235,9 +361,9 @@ class PlannerAgent(BaseAgent):
         res = res.replace("<<knowledge>>", self.get_knowledge())
         return res
 
-    def handle_task(self, task: Subtask, decomposition: Decomposition):
+    def create_actor(self, task: Subtask, decomposition: Decomposition) -> ActorAgent:
         """
-        在单独的线程中处理每个子任务
+        创建处理子任务的 ActorAgent
 
         :param task: 子任务
         :param decomposition: 分解结果
@@ -248,7 +374,7 @@ class PlannerAgent(BaseAgent):
             if parent_task:
                 parent_tasks.append(parent_task)
 
-        actor = ActorAgent(
+        return ActorAgent(
             task=task,
             assumption=decomposition.assumption,
             raw_question=decomposition.raw_question,
@@ -256,7 +382,24 @@ class PlannerAgent(BaseAgent):
             contains_time=decomposition.contains_time,
             parent_tasks=parent_tasks,
         )
-        actor.act()
+
+    def handle_task(self, task: Subtask, decomposition: Decomposition):
+        """
+        在单独的线程中处理每个子任务
+
+        :param task: 子任务
+        :param decomposition: 分解结果
+        """
+        self.create_actor(task, decomposition).act()
+
+    async def handle_task_async(self, task: Subtask, decomposition: Decomposition):
+        """
+        在事件循环中处理子任务
+
+        :param task: 子任务
+        :param decomposition: 分解结果
+        """
+        await self.create_actor(task, decomposition).act_async()
 
     def get_tool(self) -> list:
         """
@@ -265,7 +408,21 @@ class PlannerAgent(BaseAgent):
         :return: 所需工具的名称列表
         """
         logger.debug(f"【开始获取初始问题{self.id}所需工具】", self.question)
-        messages = [
+        response = self.llm.ask(self.get_messages_get_tool(), stop_after_json=True)
+        return self.parse_tool(response)
+
+    async def get_tool_async(self) -> list:
+        """
+        获得问题所需的工具（异步）
+        """
+        logger.debug(f"【开始获取初始问题{self.id}所需工具】", self.question)
+        response = await self.async_llm.ask(
+            self.get_messages_get_tool(), stop_after_json=True
+        )
+        return self.parse_tool(response)
+
+    def get_messages_get_tool(self) -> list[dict]:
+        return [
             {
                 "role": "system",
                 "content": self.get_prompt_get_tool(),
@@ -275,7 +432,8 @@ class PlannerAgent(BaseAgent):
                 "content": self.question,
             },
         ]
-        response = self.llm.ask(messages)
+
+    def parse_tool(self, response) -> list:
         tools = json.loads(parse_res(response))
         if "math_calculator" not in tools:
             tools.append("math_calculator")
@@ -5,11 +5,13 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
 import json
 import traceback
 import logger, utils
 from agent.critic import CriticAgent
 from agent.planner import PlannerAgent
+from llm import AsyncLLM
 from schema import ProblemSolution, VoteResult
 
 replace_filepath = "devlop_home/knowledge/replace.json"
@@ -52,6 +54,30 @@ def get_solution(index: int, id: str, question: str) -> ProblemSolution:
         logger.error(f"【第{index}次获取问题{id}的答案出错】\n{traceback.format_exc()}")
 
 
+async def get_solution_async(index: int, id: str, question: str) -> ProblemSolution:
+    """
+    获得问题的答案（异步），返回最终答案
+
+    :param id: 问题 ID
+    :param question: 问题
+    :return: 问题解答
+    """
+    try:
+        logger.info(f"【开始第{index}次获取问题{id}答案】")
+        solution = await PlannerAgent(id=id, question=question).act_async()
+        if utils.module_config.enable_correct:
+            reasoning_answer = await CriticAgent().correct_async(solution)
+            if reasoning_answer:
+                solution.reasoning_answer = reasoning_answer
+        logger.success(
+            f"【第{index}次得到的{id}最终答案】",
+            str(solution.reasoning_answer),
+        )
+        return solution
+    except Exception:
+        logger.error(f"【第{index}次获取问题{id}的答案出错】\n{traceback.format_exc()}")
+
+
 def handle_question(query):
     """
     预处理问题
@@ -87,3 +113,46 @@ def process_one(line: dict) -> VoteResult | dict:
     except Exception as e:
         logger.error(f"【获取问题{id}的答案出错】\n{traceback.format_exc()}")
         return {"id": id, "question": line["question"], "answer": str(e)}
+
+
+async def process_one_async(line: dict) -> VoteResult | dict:
+    """
+    获取一个问题的解决过程及答案（异步），多次采样并发执行
+    """
+    id = line["id"]
+    question = handle_question(line["question"])
+
+    try:
+        logger.info(f"【开始获取问题{id}的答案】", question)
+        results = await asyncio.gather(
+            *[
+                utils.try_run_async(get_solution_async, i + 1, id, question)
+                for i in range(utils.module_config.vote_times)
+            ]
+        )
+        solutions = [solution for solution in results if solution]
+        vote_res = await CriticAgent().vote_async(
+            id, question, utils.module_config.vote_times, solutions
+        )
+        vote_res.init_question = line["question"]
+        logger.special(
+            f"【{id}的最终答案】:\n",
+            vote_res.final_answer.get_correct_answer(),
+        )
+        return vote_res
+    except Exception as e:
+        logger.error(f"【获取问题{id}的答案出错】\n{traceback.format_exc()}")
+        return {"id": id, "question": line["question"], "answer": str(e)}
+
+
+async def process_all_async(lines: list[dict], on_result):
+    """
+    在一个事件循环中并发处理所有问题，同时进行的 LLM 请求数不超过 max_concurrent_requests
+
+    :param lines: 问题列表
+    :param on_result: 每个问题处理完成后的回调，参数为 process_one_async 的结果
+    """
+    AsyncLLM.max_concurrency = utils.module_config.max_concurrent_requests
+    tasks = [asyncio.create_task(process_one_async(line)) for line in lines]
+    for task in asyncio.as_completed(tasks):
+        on_result(await task)
@@ -0,0 +1,156 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+数据表的列式二进制缓存
+
+每个 CSV 数据表对应一个目录 `<数据目录>/.columnar/<表名>/`，其中每列保存为一个 .npy 文件：
+- csvTime：int64 纳秒时间戳
+- 数值列、布尔列：原始 dtype
+- 其他列（状态、动作等字符串列）：分类编码（int32），类别保存在 meta.json 中
+
+meta.json 记录生成缓存时 CSV 文件的 mtime 和大小，CSV 被重写后缓存自动失效。
+时间列和数值列可以通过 load_column 以内存映射（只读）方式访问，多线程共享同一份页缓存。
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+cache_dir_name = ".columnar"
+meta_file_name = "meta.json"
+
+
+def get_cache_dir(csv_path: str) -> str:
+    """获得 CSV 文件对应的列式缓存目录"""
+    base_dir, file_name = os.path.split(os.path.normpath(csv_path))
+    return os.path.join(base_dir, cache_dir_name, os.path.splitext(file_name)[0])
+
+
+def get_signature(csv_path: str) -> list[int]:
+    """获得 CSV 文件的签名（mtime、大小）"""
+    stat = os.stat(csv_path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def save_columnar(df: pd.DataFrame, csv_path: str):
+    """
+    将数据表保存为列式缓存，df 应与 csv_path 的内容一致
+
+    :param df (DataFrame): 数据表，csvTime 列应已解析为 datetime64
+    :param csv_path (str): 对应的 CSV 文件路径
+    """
+    cache_dir = get_cache_dir(csv_path)
+    tmp_dir = f"{cache_dir}.tmp{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    columns = []
+    for i, name in enumerate(df.columns):
+        series = df[name]
+        file_name = f"{i}.npy"
+        column = {"name": name, "file": file_name}
+        if pd.api.types.is_datetime64_dtype(series):
+            column["kind"] = "time"
+            values = series.values.astype("datetime64[ns]").view("int64")
+        elif pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(
+            series
+        ):
+            column["kind"] = "numeric"
+            values = series.to_numpy()
+        else:
+            column["kind"] = "category"
+            categorical = pd.Categorical(series)
+            column["categories"] = categorical.categories.tolist()
+            values = categorical.codes.astype("int32")
+        np.save(os.path.join(tmp_dir, file_name), values, allow_pickle=False)
+        columns.append(column)
+
+    meta = {
+        "signature": get_signature(csv_path),
+        "rows": len(df),
+        "columns": columns,
+    }
+    with open(os.path.join(tmp_dir, meta_file_name), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.replace(tmp_dir, cache_dir)
+
+
+def load_meta(csv_path: str) -> dict | None:
+    """
+    读取列式缓存的元信息，缓存不存在或已失效时返回 None
+
+    :param csv_path (str): 对应的 CSV 文件路径
+    :return dict|None: 元信息
+    """
+    meta_path = os.path.join(get_cache_dir(csv_path), meta_file_name)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta.get("signature") != get_signature(csv_path):
+        return None
+    return meta
+
+
+def load_column(csv_path: str, meta: dict, name: str) -> np.ndarray:
+    """
+    读取列式缓存中的单列，时间列和数值列以只读内存映射方式打开，不复制数据
+
+    :param csv_path (str): 对应的 CSV 文件路径
+    :param meta (dict): load_meta 返回的元信息
+    :param name (str): 列名
+    :return ndarray: 列数据
+    :raise KeyError: 列不存在
+    """
+    column = next((item for item in meta["columns"] if item["name"] == name), None)
+    if column is None:
+        raise KeyError(name)
+    file_path = os.path.join(get_cache_dir(csv_path), column["file"])
+    if column["kind"] == "category":
+        return decode_column(column, np.load(file_path, allow_pickle=False))
+    return decode_column(column, np.load(file_path, mmap_mode="r"))
+
+
+def decode_column(column: dict, values: np.ndarray) -> np.ndarray:
+    """将 .npy 中保存的值还原为列数据"""
+    if column["kind"] == "time":
+        return values.view("datetime64[ns]")
+    if column["kind"] == "category":
+        categories = np.empty(len(column["categories"]) + 1, dtype=object)
+        categories[:-1] = column["categories"]
+        categories[-1] = np.nan
+        # 编码 -1 表示缺失值，正好取到末尾的 NaN
+        return categories[values]
+    return values
+
+
+def load_columnar(csv_path: str) -> pd.DataFrame | None:
+    """
+    从列式缓存加载数据表，缓存不存在或已失效时返回 None
+
+    分类列会还原为 object 类型，与直接读取 CSV 的结果保持一致。
+
+    :param csv_path (str): 对应的 CSV 文件路径
+    :return DataFrame|None: 数据表
+    """
+    meta = load_meta(csv_path)
+    if meta is None:
+        return None
+
+    cache_dir = get_cache_dir(csv_path)
+    data = {}
+    for column in meta["columns"]:
+        values = np.load(os.path.join(cache_dir, column["file"]), allow_pickle=False)
+        data[column["name"]] = decode_column(column, values)
+    return pd.DataFrame(data, columns=[column["name"] for column in meta["columns"]])
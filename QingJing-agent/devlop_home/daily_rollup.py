@@ -0,0 +1,284 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+按天汇总的统计表
+
+- 每日设备汇总表：date、device、metric、value，包括各设备每天的能耗、燃油消耗量、实际发电量、
+  运行时长（'开机运行中' 的数据条数，每条数据为一分钟）、各阶段/航行状态时长
+- 每日动作汇总表：date、device、key_action、count、first_time、last_time，来自事件索引
+
+data_process.py 在预处理结束时生成；汇总表缺失或早于来源数据表时，在内存中现场构建。
+按天统计的能耗与使用 EnergyUsageCalculator 查询当天 00:00:00 至 23:59:59 的结果一致。
+"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from device_config import energy_device_config, power_fuel_device_config
+from event_index import EventIndex, event_tables
+from table_store import TableStore
+import logger
+
+device_summary_file_name = "每日设备汇总表.csv"
+action_summary_file_name = "每日动作汇总表.csv"
+
+running_flag = "开机运行中"
+
+# 航行状态列 -> 航行状态
+sailing_stage_columns = {
+    "docking_status": "停泊状态",
+    "voyage_status": "航渡状态",
+    "dp_status": "动力定位状态",
+    "escort_status": "伴航状态",
+}
+
+# A架作业阶段
+operation_stages = ["布放阶段", "回收阶段"]
+
+
+def get_day_energies(file_path: str, power_column: str, days: pd.DatetimeIndex):
+    """
+    计算功率列每天的能耗（kWh），当天没有数据时为 NaN
+
+    :param file_path (str): CSV 文件路径
+    :param power_column (str): 功率列名
+    :param days (DatetimeIndex): 日期（零点）
+    :return ndarray: 每天的能耗
+    """
+    times = TableStore.load_column(file_path, "csvTime")
+    cumulative_energy = TableStore.load_cumulative_energy(file_path, power_column)
+    lo = times.searchsorted(days.values, "left")
+    hi = times.searchsorted((days + pd.Timedelta(seconds=86399)).values, "right")
+    energies = np.full(len(days), np.nan)
+    has_data = hi > lo
+    energies[has_data] = np.float64(
+        cumulative_energy[hi[has_data] - 1] - cumulative_energy[lo[has_data]]
+    )
+    return energies
+
+
+def sum_device_tree(device_config: dict, device_name: str, leaf_values: dict):
+    """按设备树逐级累加叶子设备每天的值，缺失值按 0 计"""
+    config = device_config[device_name]
+    if not isinstance(config, list):
+        return leaf_values[device_name]
+    return np.sum(
+        [
+            np.nan_to_num(sum_device_tree(device_config, sub_device, leaf_values))
+            for sub_device in config
+        ],
+        axis=0,
+    )
+
+
+class DailyRollup:
+    """按天汇总的统计表，进程内缓存"""
+
+    _cache: dict[tuple[str, str], tuple[tuple, pd.DataFrame]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def get_source_tables() -> list[str]:
+        """每日设备汇总表依赖的数据表"""
+        tables = [
+            config[0]
+            for config in energy_device_config.values()
+            if not isinstance(config, list)
+        ]
+        for query_type in ["燃油消耗量", "实际发电量"]:
+            tables += [
+                config[0]
+                for config in power_fuel_device_config[query_type].values()
+                if not isinstance(config, list)
+            ]
+        tables += list(event_tables) + ["航行状态表"]
+        return list(dict.fromkeys(tables))
+
+    @staticmethod
+    def get_days(base_path: str) -> pd.DatetimeIndex:
+        """数据覆盖的所有日期"""
+        first, last = None, None
+        for table_name in DailyRollup.get_source_tables():
+            try:
+                times = TableStore.load_column(
+                    os.path.join(base_path, f"{table_name}.csv"), "csvTime"
+                )
+            except FileNotFoundError:
+                continue
+            times = times[~np.isnat(times)]
+            if len(times) == 0:
+                continue
+            first = times[0] if first is None else min(first, times[0])
+            last = times[-1] if last is None else max(last, times[-1])
+        if first is None:
+            return pd.DatetimeIndex([])
+        return pd.date_range(
+            pd.Timestamp(first).normalize(), pd.Timestamp(last).normalize(), freq="D"
+        )
+
+    @staticmethod
+    def build_device_summary(base_path: str) -> pd.DataFrame:
+        """
+        构建每日设备汇总表
+
+        :param base_path (str): 数据表目录
+        :return DataFrame: date、device、metric、value
+        """
+        days = DailyRollup.get_days(base_path)
+        dates = days.strftime("%Y-%m-%d")
+        records = []
+
+        def add(device, metric, values):
+            records.append(
+                pd.DataFrame(
+                    {"date": dates, "device": device, "metric": metric, "value": values}
+                )
+            )
+
+        def get_leaf_values(device_config):
+            leaf_values = {}
+            for leaf_name, config in device_config.items():
+                if isinstance(config, list):
+                    continue
+                table_name, power_column = config
+                file_path = os.path.join(base_path, f"{table_name}.csv")
+                try:
+                    leaf_values[leaf_name] = get_day_energies(
+                        file_path, power_column, days
+                    )
+                except (FileNotFoundError, KeyError):
+                    logger.warning(f"【每日汇总】数据表 {table_name} 不存在，跳过")
+                    leaf_values[leaf_name] = np.full(len(days), np.nan)
+            return leaf_values
+
+        leaf_values = get_leaf_values(energy_device_config)
+        for device_name in energy_device_config:
+            add(
+                device_name,
+                "能耗(kWh)",
+                sum_device_tree(energy_device_config, device_name, leaf_values),
+            )
+
+        for query_type, unit in [("燃油消耗量", "L"), ("实际发电量", "kWh")]:
+            device_config = power_fuel_device_config[query_type]
+            leaf_values = get_leaf_values(device_config)
+            for device_name in device_config:
+                add(
+                    device_name,
+                    f"{query_type}({unit})",
+                    sum_device_tree(device_config, device_name, leaf_values),
+                )
+
+        def count_by_day(df, mask):
+            counts = mask.groupby(df["csvTime"].dt.normalize()).sum()
+            return counts.reindex(days).to_numpy(dtype=float)
+
+        for table_name, device_name in event_tables.items():
+            try:
+                df = TableStore.load(os.path.join(base_path, f"{table_name}.csv"))
+            except FileNotFoundError:
+                continue
+            add(
+                device_name,
+                "运行时长(分钟)",
+                count_by_day(df, df["running_status"] == running_flag),
+            )
+            if table_name == "A架动作表":
+                for stage in operation_stages:
+                    add(
+                        device_name,
+                        f"{stage}时长(分钟)",
+                        count_by_day(
+                            df, df["stage"].isin([f"{stage}开始", f"{stage}中"])
+                        ),
+                    )
+
+        try:
+            df = TableStore.load(os.path.join(base_path, "航行状态表.csv"))
+            for column, stage in sailing_stage_columns.items():
+                add(
+                    "航行状态",
+                    f"{stage}时长(分钟)",
+                    count_by_day(df, df[column].isin([f"{stage}开始", f"{stage}中"])),
+                )
+        except FileNotFoundError:
+            logger.warning("【每日汇总】数据表 航行状态表 不存在，跳过")
+
+        if not records:
+            return pd.DataFrame(columns=["date", "device", "metric", "value"])
+        return pd.concat(records, ignore_index=True)
+
+    @staticmethod
+    def build_action_summary(base_path: str) -> pd.DataFrame:
+        """
+        构建每日动作汇总表
+
+        :param base_path (str): 数据表目录
+        :return DataFrame: date、device、key_action、count、first_time、last_time
+        """
+        events = EventIndex.load(base_path)
+        events = events[events["key_action"] != "False"]
+        grouped = events.groupby(
+            [events["csvTime"].dt.strftime("%Y-%m-%d").rename("date"), "device", "key_action"],
+            sort=True,
+        )["csvTime"]
+        summary = grouped.agg(["count", "min", "max"]).reset_index()
+        summary["first_time"] = summary.pop("min").dt.strftime("%Y-%m-%d %H:%M:%S")
+        summary["last_time"] = summary.pop("max").dt.strftime("%Y-%m-%d %H:%M:%S")
+        return summary
+
+    @classmethod
+    def load_device_summary(cls, base_path: str) -> pd.DataFrame:
+        """获取每日设备汇总表，来源数据表更新后自动重建"""
+        return cls._load(
+            base_path,
+            device_summary_file_name,
+            cls.get_source_tables(),
+            cls.build_device_summary,
+        )
+
+    @classmethod
+    def load_action_summary(cls, base_path: str) -> pd.DataFrame:
+        """获取每日动作汇总表，动作表更新后自动重建"""
+        return cls._load(
+            base_path,
+            action_summary_file_name,
+            list(event_tables),
+            cls.build_action_summary,
+        )
+
+    @classmethod
+    def _load(cls, base_path, file_name, source_tables, build) -> pd.DataFrame:
+        base_path = os.path.normpath(base_path)
+        source_mtimes = []
+        for table_name in source_tables:
+            path = os.path.join(base_path, f"{table_name}.csv")
+            if os.path.exists(path):
+                source_mtimes.append(os.stat(path).st_mtime_ns)
+        summary_path = os.path.join(base_path, file_name)
+        summary_mtime = (
+            os.stat(summary_path).st_mtime_ns if os.path.exists(summary_path) else None
+        )
+        signature = (tuple(source_mtimes), summary_mtime)
+
+        with cls._lock:
+            cached = cls._cache.get((base_path, file_name))
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+
+            if summary_mtime is not None and summary_mtime >= max(
+                source_mtimes, default=0
+            ):
+                summary = TableStore.load(summary_path)
+            else:
+                logger.debug(f"【每日汇总】{file_name} 缺失或已过期，从数据表构建")
+                summary = build(base_path)
+            cls._cache[(base_path, file_name)] = (signature, summary)
+        return summary
@@ -10,7 +10,6 @@ import numpy as np
 from datetime import datetime
 import json
 import logger
-import traceback
 
 config_file = "devlop_home/config.json"
 
@@ -34,6 +33,9 @@ no_current_status_flag = "False"
 running_flag = "开机运行中"
 not_running_flag = "未运行"
 sailing_stage_table_name = "航行状态表"
+# LLM 预测结果的缓存与流水线状态放在一起，不随数据表提交，也不作为阶段输出被还原
+llm_predict_cache_file = os.path.join(output_path, ".pipeline", "LLM_predict_cache.json")
+llm_predict_max_workers = 5
 
 
 # In[ ]:
@@ -50,6 +52,9 @@ logger.info(
 # In[ ]:
 
 
+# 【阶段】合并数据
+# 【输入】[os.path.join(data_path, "*.csv")]
+# 【输出】[f for f in os.listdir(data_path) if f.endswith(".csv") and "字段释义" not in f]
 # 合并数据
 def cp_csv_files(input_path, out_path):
     for file_name in os.listdir(input_path):
@@ -75,7 +80,12 @@ cp_csv_files(data_path, output_path)
 # In[ ]:
 
 
+# 【阶段】A架关键动作
+# 【输入】["Ajia_plc_1.csv", "devlop_home/manual/stages.json", "devlop_home/manual/actions.json"]
+# 【输出】["Ajia_plc_1.csv", table_name_map["Ajia_plc_1.csv"], "ajia_event.txt"]
 # 判定A架的开关机和有无电流
+from series_ops import fill_running_intervals
+
 table_key = "Ajia_plc_1.csv"
 
 
@@ -89,55 +99,57 @@ def convert_to_numeric(value):
         return -1
 
 
+def convert_column_to_numeric(series):
+    """
+    将列转换为数值类型，与逐个调用 convert_to_numeric 的结果一致
+    """
+    numeric = pd.to_numeric(series, errors="coerce").astype(float)
+    # 批量转换失败的值（如 'error'、'nan'）交给 convert_to_numeric 逐个判定
+    failed = numeric.isna() & series.notna()
+    numeric[failed] = series[failed].map(convert_to_numeric).astype(float)
+    return numeric
+
+
 logger.special("开始判定A架开关机和有无电流")
 
 df = pd.read_csv(os.path.join(output_path, table_key))
-df["Ajia-3_v"] = df["Ajia-3_v"].apply(convert_to_numeric)
-df["Ajia-5_v"] = df["Ajia-5_v"].apply(convert_to_numeric)
+df["Ajia-3_v"] = convert_column_to_numeric(df["Ajia-3_v"])
+df["Ajia-5_v"] = convert_column_to_numeric(df["Ajia-5_v"])
 df[key_action_field] = no_key_action_flag
 df[running_status_field] = not_running_flag
 df[current_status_field] = no_current_status_flag
-have_boot = -1
-not_have_boot = -1
 
-for i in range(1, df.shape[0]):
-    prev_ajia3 = df.loc[i - 1, "Ajia-3_v"]
-    prev_ajia5 = df.loc[i - 1, "Ajia-5_v"]
-    curr_ajia3 = df.loc[i, "Ajia-3_v"]
-    curr_ajia5 = df.loc[i, "Ajia-5_v"]
-
-    # 停电条件：当前 Ajia-5_v == -1，且前一时刻 Ajia-5_v > 0 或 0
-    # if curr_ajia5 == -1 and (prev_ajia5 >= 0):
-    #     df.loc[i, key_action_field] = "停电"
-
-    # A架开机条件：前一时刻 Ajia-3_v == -1，且当前 Ajia-3_v >= 0
-    if prev_ajia3 == -1 and curr_ajia3 >= 0:
-        df.loc[i, key_action_field] = "A架开机"
-        have_boot = i
-    if prev_ajia5 == -1 and curr_ajia5 >= 0:
-        df.loc[i, key_action_field] = "A架开机"
-        have_boot = i
+# 每一行与前一行比较，第一行不判定
+curr_ajia3 = df["Ajia-3_v"].to_numpy()
+curr_ajia5 = df["Ajia-5_v"].to_numpy()
+prev_ajia3 = np.concatenate([[np.nan], curr_ajia3[:-1]])
+prev_ajia5 = np.concatenate([[np.nan], curr_ajia5[:-1]])
 
-    # A架关机条件：当前 Ajia-3_v == -1，且前一时刻 Ajia-3_v >= 0
-    if curr_ajia3 == -1 and prev_ajia3 >= 0:
-        df.loc[i, key_action_field] = "A架关机"
-        not_have_boot = i
-    if curr_ajia5 == -1 and prev_ajia5 >= 0:
-        df.loc[i, key_action_field] = "A架关机"
-        not_have_boot = i
+# 停电条件：当前 Ajia-5_v == -1，且前一时刻 Ajia-5_v > 0 或 0
+# power_off = (curr_ajia5 == -1) & (prev_ajia5 >= 0)
 
-    if have_boot != -1 and not_have_boot != -1 and have_boot < not_have_boot:
-        for j in range(have_boot, not_have_boot + 1):
-            df.loc[j, running_status_field] = running_flag
-        have_boot = -1
-        not_have_boot = -1
+# A架开机条件：前一时刻 Ajia-3_v == -1，且当前 Ajia-3_v >= 0（Ajia-5_v 同理）
+boot = ((prev_ajia3 == -1) & (curr_ajia3 >= 0)) | (
+    (prev_ajia5 == -1) & (curr_ajia5 >= 0)
+)
+# A架关机条件：当前 Ajia-3_v == -1，且前一时刻 Ajia-3_v >= 0（Ajia-5_v 同理），同时满足时记为关机
+shutdown = ((curr_ajia3 == -1) & (prev_ajia3 >= 0)) | (
+    (curr_ajia5 == -1) & (prev_ajia5 >= 0)
+)
+df.loc[boot, key_action_field] = "A架开机"
+df.loc[shutdown, key_action_field] = "A架关机"
+df.loc[fill_running_intervals(boot, shutdown), running_status_field] = running_flag
 
-    # 有电流条件：前一时刻有一个或全部为0，下一刻均不为0
-    if (prev_ajia3 <= 0 or prev_ajia5 <= 0) and (curr_ajia3 > 0 and curr_ajia5 > 0):
-        df.loc[i, current_status_field] = "有电流"
-    # 无电流条件：前一时刻均不为0，下一刻有一个或全部为0
-    elif prev_ajia3 > 0 and prev_ajia5 > 0 and (curr_ajia3 <= 0 or curr_ajia5 <= 0):
-        df.loc[i, current_status_field] = "无电流"
+# 有电流条件：前一时刻有一个或全部为0，下一刻均不为0
+have_current = ((prev_ajia3 <= 0) | (prev_ajia5 <= 0)) & (
+    (curr_ajia3 > 0) & (curr_ajia5 > 0)
+)
+# 无电流条件：前一时刻均不为0，下一刻有一个或全部为0
+no_current = ((prev_ajia3 > 0) & (prev_ajia5 > 0)) & (
+    (curr_ajia3 <= 0) | (curr_ajia5 <= 0)
+)
+df.loc[have_current, current_status_field] = "有电流"
+df.loc[no_current & ~have_current, current_status_field] = "无电流"
 
 logger.success("A架开关机和有无电流判定完成")
 
@@ -147,101 +159,86 @@ logger.success("A架开关机和有无电流判定完成")
 
 # 处理A架角度数据
 
-def find_next_target_value(index, current_target):
+def parse_angle_column(series):
     """
-    从指定索引开始查找下一个完美摆动目标值
+    将角度列解析为浮点数组，'error' 等无法解析的值为 NaN
     """
-    for i in range(index, df.shape[0]):
-        if current_target == 35:
-            value = df.loc[i, "Ajia-0_v"]
-            if value == "error":
-                continue
-            value = float(value)
-            if value > 30 and value < 38:
-                df.loc[i, "full_swing"] = True
-                logger.debug("完美摆动：",df.loc[i, "csvTime"],"Ajia-0_v:", df.loc[i, "Ajia-0_v"])
-                return i, -43
-        elif current_target == -43:
-            value = df.loc[i, "Ajia-0_v"]
-            if value == "error":
-                continue
-            value = float(value)
-            if value < -40 and value > -46:
-                df.loc[i, "full_swing"] = True
-                logger.debug("完美摆动：",df.loc[i, "csvTime"],"Ajia-0_v:", df.loc[i, "Ajia-0_v"])
-                return i, 35
-    return -1, -1
-
-def detect_swings(df):
+    return pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+
+
+def detect_full_swings(angles):
     """
-    假设A架右舷同一方向上摆动超过10°即可算作一次摆动,标记摆动
+    标记完美摆动：在 35° 附近（30~38）与 -43° 附近（-46~-40）之间交替到达的位置
 
+    第一次到达任一端时只确定起点，之后每次到达与上一次不同的一端时标记。
+
+    :param angles (ndarray): 角度，无效值为 NaN
+    :return ndarray: 完美摆动标记
     """
-    index=0
-    for i in range(0, df.shape[0]):
-        value = df.loc[i, "Ajia-0_v"]
-        if value == "error" or float(value) == 0:
-            continue
-        prev_value = float(value)
-        index = i
-        break
-    
-    curr_value = None
-    for i in range(index+1, df.shape[0]):
-        curr_value = df.loc[i, "Ajia-0_v"]
-        if curr_value == "error":
-            continue
-        curr_value = float(curr_value)
-        if prev_value*curr_value > 0 :
-            if abs(curr_value-prev_value) > 10:
-                df.loc[i, "directional_swing"] = True
-                logger.debug("方向摆动超过10°：",df.loc[i, "csvTime"],"Ajia-0_v:", df.loc[i, "Ajia-0_v"])
-                prev_value = curr_value
-                continue
-            elif abs(curr_value-prev_value) > 1.5 and prev_value< 30 and curr_value >30:
-                prev_value = curr_value
-                logger.debug("更新值为：",prev_value,"时间：",df.loc[i, "csvTime"])
-                continue
-        if prev_value*curr_value < 0:
-            prev_value = curr_value
+    band = np.select(
+        [(angles > 30) & (angles < 38), (angles > -46) & (angles < -40)], [1, -1], 0
+    )
+    hits = np.flatnonzero(band)
+    hit_band = band[hits]
+    full_swing = np.zeros(len(angles), dtype=bool)
+    full_swing[hits[1:][hit_band[1:] != hit_band[:-1]]] = True
+    return full_swing
+
+
+def detect_directional_swings(angles, min_swing=10, search_window=256):
+    """
+    假设A架右舷同一方向上摆动超过10°即可算作一次摆动，标记摆动
+
+    以第一个非零角度为参考值，之后的角度与参考值同号且相差超过 min_swing 时标记并更新参考值；
+    同号且从 30° 以下越过 30°（相差超过1.5°）、或与参考值异号时只更新参考值。
+    参考值的更新依赖前一次更新，因此在相邻两次更新之间用向量化的窗口查找跳转，窗口按需倍增。
+
+    :param angles (ndarray): 角度，无效值为 NaN
+    :param min_swing (float): 同一方向上的最小摆动角度
+    :param search_window (int): 初始查找窗口大小
+    :return ndarray: 方向摆动标记
+    """
+    directional_swing = np.zeros(len(angles), dtype=bool)
+    positions = np.flatnonzero(~np.isnan(angles))
+    values = angles[positions]
+    nonzero = np.flatnonzero(values != 0)
+    if len(nonzero) == 0:
+        return directional_swing
+
+    reference = values[nonzero[0]]
+    start = nonzero[0] + 1
+    window = search_window
+    while start < len(values):
+        candidates = values[start : start + window]
+        same_direction = reference * candidates > 0
+        delta = np.abs(candidates - reference)
+        swing = same_direction & (delta > min_swing)
+        update = (
+            swing
+            | (same_direction & (delta > 1.5) & (reference < 30) & (candidates > 30))
+            | (reference * candidates < 0)
+        )
+        hits = np.flatnonzero(update)
+        if len(hits) == 0:
+            start += window
+            window *= 2
             continue
-    logger.info("方向摆动超过10°处理完成")
-        
+        hit = hits[0]
+        if swing[hit]:
+            directional_swing[positions[start + hit]] = True
+        reference = candidates[hit]
+        start += hit + 1
+        window = search_window
+    return directional_swing
+
 
 logger.special("开始处理A架角度范围")
 
-current_target = None
-first_target_index = None
-first_target = None
-df["full_swing"] = False
-df["directional_swing"] = False
-for i in range(0, df.shape[0]):
-    value = df.loc[i, "Ajia-0_v"]
-    if value == "error":
-        continue
-    value = float(value)
-    if value < -40 and value > -46:
-        first_target_index = i
-        first_target = -43
-        current_target = 35
-        break
-    elif value > 30 and value < 38:
-        first_target_index = i
-        first_target = 35
-        current_target = -43
-        break
-index1 = first_target_index + 1
-while index1 < df.shape[0]:
-    value = df.loc[index1, "Ajia-0_v"]
-    if value == "error":
-        continue
-    value = float(value)
-    index1, current_target = find_next_target_value(index1, current_target)
-    if index1 == -1:
-        break
-    index1 += 1
+angles = parse_angle_column(df["Ajia-0_v"])
+df["full_swing"] = detect_full_swings(angles)
 logger.info("完美摆动处理完成")
-detect_swings(df)
+df["directional_swing"] = detect_directional_swings(angles)
+logger.info("方向摆动超过10°处理完成")
 logger.success("A架角度范围处理完成")
 # df = detect_swings(df)
 # df.drop(columns=["Ajia-0_v_num"], inplace=True)
@@ -280,18 +277,10 @@ def check_ajia_0_v_extremes(df):
 
 
 # 根据开关机事件，将A架数据分为若干段
+from stage_interval import extract_intervals
+
 logger.special("根据开关机事件，将A架数据分为若干段")
-start_time = None
-segments = []
-
-for index, row in df.iterrows():
-    if row[key_action_field] == "A架开机":
-        start_time = row["csvTime"]
-    elif row[key_action_field] == "A架关机" and start_time is not None:
-        end_time = row["csvTime"]
-        segments.append((start_time, end_time))
-        start_time = None
-        
+segments = extract_intervals(df, "A架开机", "A架关机", key_action_field)
 logger.success("共分为%d段" % len(segments))
 for i, (start_time, end_time) in enumerate(segments):
     logger.info(f"第{i+1}段：{start_time} - {end_time}")
@@ -368,12 +357,18 @@ def limit_consecutive_zeros(lst, max_zeros=10):
     return result
 
 
-def predict_sequence_by_llm(L_sequence, is_xiafang: bool):
+def normalize_sequence(L_sequence):
+    """交给 LLM 的序列文本：连续的 0 最多保留 10 个，numpy 数值转为 Python 数值"""
+    return str(
+        [x.item() if hasattr(x, "item") else x for x in limit_consecutive_zeros(L_sequence)]
+    )
+
+
+def predict_sequence_by_llm(L_sequence, is_xiafang: bool, llm=None):
     from llm import LLM
-    from utils import parse_res, load_api_config
+    from utils import parse_res
 
-    load_api_config("GLM")
-    L_sequence = str(limit_consecutive_zeros(L_sequence))
+    L_sequence = normalize_sequence(L_sequence)
     # with open(prompt_ajia_judge_file, "r", encoding="utf-8") as file:
     #     ajia_judge = file.read()
 
@@ -384,14 +379,14 @@ def predict_sequence_by_llm(L_sequence, is_xiafang: bool):
 
     prompt = ajia_judge.replace("<<L>>", L_sequence)
     messages = [{"role": "user", "content": prompt}]
-    response = LLM().ask(messages)
+    response = (llm or LLM()).ask(messages)
     res = parse_res(response)
     logger.info("【LLM返回】：%s" % res)
     return res
 
 
-def single_predict(L_sequence, is_xiafang: bool):
-    result_list = json.loads(predict_sequence_by_llm(L_sequence, is_xiafang))
+def single_predict(L_sequence, is_xiafang: bool, llm=None):
+    result_list = json.loads(predict_sequence_by_llm(L_sequence, is_xiafang, llm))
     if len(result_list) == 3:
         a = result_list[0]
         b = result_list[1]
@@ -399,65 +394,95 @@ def single_predict(L_sequence, is_xiafang: bool):
         return a, b, c
 
 
-def get_predict_result(L_sequence, is_xiafang: bool):
+def get_predict_result(L_sequence, is_xiafang: bool, llm=None):
     try:
-        return single_predict(L_sequence, is_xiafang)
+        return single_predict(L_sequence, is_xiafang, llm)
     except Exception as e:
         logger.error("LLM预测失败，尝试再次预测：%s" % e)
         try:
-            return single_predict(L_sequence, is_xiafang)
+            return single_predict(L_sequence, is_xiafang, llm)
         except Exception as e:
             logger.error("LLM预测失败，返回默认值：%s" % e)
             return -100, -100, -100
 
 
-# In[ ]:
+def get_predict_key(L_sequence, is_xiafang: bool):
+    """预测结果的缓存键：提示词类型和规范化后的序列"""
+    return f"{'XIAFANG' if is_xiafang else 'HUISHOU'}:{normalize_sequence(L_sequence)}"
 
 
-# 判断A架关键动作的辅助函数
-def extract_daily_power_on_times(df):
-    """
-    从CSV文件中提取一天内有两次开机的第一次和第二次开机时间。
+def load_predict_cache():
+    try:
+        with open(llm_predict_cache_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
 
-    参数:
-    file_path (str): CSV文件的路径，包含 'csvTime' 和 'status' 列。
 
-    返回:
-    first_start_times (list): 一天内有两次开机的第一次开机时间列表。
-    second_start_times (list): 一天内有两次开机的第二次开机时间列表。
-    """
-    df["csvTime"] = pd.to_datetime(df["csvTime"])
+def save_predict_cache(cache):
+    os.makedirs(os.path.dirname(llm_predict_cache_file), exist_ok=True)
+    tmp_file = f"{llm_predict_cache_file}.tmp"
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_file, llm_predict_cache_file)
 
-    df["date"] = df["csvTime"].dt.date
 
-    daily_segments = {}
+def predict_sequences(requests):
+    """
+    批量预测多个序列：相同的序列只预测一次，未缓存的序列并发请求 LLM，
+    成功的结果按 (提示词类型, 规范化后的序列) 缓存在磁盘上，重新预处理时不再请求 LLM
 
-    for date, group in df.groupby("date"):
-        segments = []
-        start_time = None
+    :param requests (list[tuple[list, bool]]): (电流序列, 是否为下放阶段)
+    :return list[tuple]: 各序列的预测结果 (a, b, c)，预测失败时为 (-100, -100, -100)
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from llm import LLM
 
-        for index, row in group.iterrows():
-            if row[key_action_field] == "A架开机":
-                start_time = row["csvTime"]
-            elif row[key_action_field] == "A架关机" and start_time is not None:
-                end_time = row["csvTime"]
-                segments.append((start_time, end_time))
-                start_time = None
+    cache = load_predict_cache()
+    keys = [get_predict_key(L_sequence, is_xiafang) for L_sequence, is_xiafang in requests]
+    missing = {
+        key: request for key, request in zip(keys, requests) if key not in cache
+    }
+    logger.info(f"【LLM预测】共 {len(requests)} 个序列，需要请求 {len(missing)} 个")
+    if missing:
+        llm = LLM()
+        with ThreadPoolExecutor(max_workers=llm_predict_max_workers) as executor:
+            results = executor.map(
+                lambda request: get_predict_result(*request, llm), missing.values()
+            )
+            for key, result in zip(missing, results):
+                # 失败的结果不缓存，下次预处理时重新请求
+                if result is not None and tuple(result) != (-100, -100, -100):
+                    cache[key] = list(result)
+        save_predict_cache(cache)
+    return [tuple(cache.get(key, (-100, -100, -100))) for key in keys]
 
-        daily_segments[date] = segments
 
-    daily_counts = {date: len(segments) for date, segments in daily_segments.items()}
+# In[ ]:
 
-    two_times_days = [date for date, count in daily_counts.items() if count == 2]
 
-    first_start_times = []
-    second_start_times = []
+# 判断A架关键动作的辅助函数
+def extract_daily_power_on_times(df):
+    """
+    提取一天内有两次开机的第一次和第二次开机时间。
 
-    for date in two_times_days:
-        segments = daily_segments[date]
-        first_start_times.append(segments[0][0])
-        second_start_times.append(segments[1][0])
+    参数:
+    df (DataFrame): A架数据，包含 'csvTime' 和 'key_action' 列。
 
+    返回:
+    first_start_times (list): 一天内有两次开机的第一次开机时间列表。
+    second_start_times (list): 一天内有两次开机的第二次开机时间列表。
+    """
+    intervals = extract_intervals(df, "A架开机", "A架关机", key_action_field)
+    start_times = pd.Series(pd.to_datetime(intervals[:, 0]))
+    end_times = pd.Series(pd.to_datetime(intervals[:, 1]))
+    # 开关机按天配对，跨天的区间不计入
+    start_times = start_times[start_times.dt.normalize() == end_times.dt.normalize()]
+    dates = start_times.dt.normalize()
+    two_times_start_times = start_times[dates.map(dates.value_counts()) == 2]
+
+    first_start_times = two_times_start_times.iloc[::2].tolist()
+    second_start_times = two_times_start_times.iloc[1::2].tolist()
     return first_start_times, second_start_times
 
 
@@ -654,8 +679,65 @@ class Ajia_Result:
     def __str__(self):
         return f"时间段: {self.start_time} - {self.end_time}, 峰值模式: {self.event_pattern}"
 
+def apply_llm_prediction(df, segment_data, start, end, is_xiafang, prediction):
+    """
+    根据 LLM 预测的三个电流值标记时间段内的关键动作和阶段
+
+    :param df: A架数据
+    :param segment_data: 时间段内的数据，包含 predict_column 列
+    :param start: 开机时间
+    :param end: 关机时间
+    :param is_xiafang: 是否为下放阶段
+    :param prediction: 预测结果 (a, b, c)
+    """
+    a, b, c = prediction
+    if is_xiafang:
+        indices = segment_data.index[
+            segment_data["predict_column"] == a
+        ].tolist()
+        df.loc[indices, key_action_field] = "征服者起吊"
+
+        indices = segment_data.index[
+            segment_data["predict_column"] == b
+        ].tolist()
+        df.loc[indices, key_action_field] = "缆绳解除"
+        previous_indices = [idx - 1 for idx in indices if idx > 0]
+        df.loc[previous_indices, key_action_field] = "征服者入水"
+
+        indices = segment_data.index[
+            segment_data["predict_column"] == c
+        ].tolist()
+        df.loc[indices, key_action_field] = "A架摆回"
+        df.loc[df["csvTime"] == start, stage_field] = "布放阶段开始"
+        df.loc[df["csvTime"] == end, stage_field] = "布放阶段结束"
+        df.loc[(df["csvTime"] > start) & (df["csvTime"] < end), stage_field] = "布放阶段中"
+    else:
+        indices = segment_data.index[
+            segment_data["predict_column"] == a
+        ].tolist()
+        df.loc[indices, key_action_field] = "A架摆出"
+
+        indices = segment_data.index[
+            segment_data["predict_column"] == b
+        ].tolist()
+        df.loc[indices, key_action_field] = "征服者出水"
+        previous_indices = [idx - 1 for idx in indices if idx > 0]
+        df.loc[previous_indices, key_action_field] = "缆绳挂妥"
+
+        indices = segment_data.index[
+            segment_data["predict_column"] == c
+        ].tolist()
+        df.loc[indices, key_action_field] = "征服者落座"
+        df.loc[df["csvTime"] == start, stage_field] = "回收阶段开始"
+        df.loc[df["csvTime"] == end, stage_field] = "回收阶段结束"
+        df.loc[(df["csvTime"] > start) & (df["csvTime"] < end), stage_field] = "回收阶段中"
+
 LLM_predict_count = 0
 LLM_predict_results: dict[int, tuple] = {}
+# 交由大模型预测的时间段：(序号, 开机时间, 关机时间, 时间段数据, 是否为下放阶段)
+LLM_predict_segments = []
+# 一天内两次开机的开机时间，首次交由大模型预测时计算
+first_start_times, second_start_times = None, None
 df[stage_field]=no_stage_flag
 peak_patterns =set()
 Ajia_results = []
@@ -775,86 +857,53 @@ for segment in segments:
         is_hour_greater_than_12 = first_value.hour > 12
         is_hour_smaller_than_2= first_value.hour < 2
         is_lasttime_smaller_than_8 = last_value.hour < 8
-        first_start_times, second_start_times = extract_daily_power_on_times(df=df)
-
-        def predict(data, is_xiafang):
-            data["predict_column"] = data.apply(
-                lambda row: (
-                    row["Ajia-3_v"]
-                    if row["Ajia-5_v"] == 0 and row["Ajia-3_v"] > 0
-                    else row["Ajia-5_v"]
-                ),
-                axis=1,
-            )
-            logger.info(
-                "【处理时间段】----------------LLM预测的列表---------------------"
-            )
-            logger.info(str(list(segment_data["predict_column"])))
-            try:
-                a, b, c = get_predict_result(
-                    list(segment_data["predict_column"]), is_xiafang
-                )
-            except Exception as e:
-                logger.error(f"An error occurred: {e}\n{traceback.format_exc()}")
-                a, b, c = -100, -100, -100
-            LLM_predict_results[LLM_predict_count].prediction = (a, b, c)
-            LLM_predict_results[LLM_predict_count].peak_pattern = peak_pattern
-            logger.success(
-                "【处理时间段】LLM预测结果：",
-                "下放阶段" if is_xiafang else "回收阶段",
-                a,
-                b,
-                c,
-            )
-            if is_xiafang:
-                indices = segment_data.index[
-                    segment_data["predict_column"] == a
-                ].tolist()
-                df.loc[indices, key_action_field] = "征服者起吊"
-
-                indices = segment_data.index[
-                    segment_data["predict_column"] == b
-                ].tolist()
-                df.loc[indices, key_action_field] = "缆绳解除"
-                previous_indices = [idx - 1 for idx in indices if idx > 0]
-                df.loc[previous_indices, key_action_field] = "征服者入水"
-
-                indices = segment_data.index[
-                    segment_data["predict_column"] == c
-                ].tolist()
-                df.loc[indices, key_action_field] = "A架摆回"
-                df.loc[df["csvTime"] == start, stage_field] = "布放阶段开始"
-                df.loc[df["csvTime"] == end, stage_field] = "布放阶段结束"
-                df.loc[(df["csvTime"] > start) & (df["csvTime"] < end), stage_field] = "布放阶段中"
-            else:
-                indices = segment_data.index[
-                    segment_data["predict_column"] == a
-                ].tolist()
-                df.loc[indices, key_action_field] = "A架摆出"
-
-                indices = segment_data.index[
-                    segment_data["predict_column"] == b
-                ].tolist()
-                df.loc[indices, key_action_field] = "征服者出水"
-                previous_indices = [idx - 1 for idx in indices if idx > 0]
-                df.loc[previous_indices, key_action_field] = "缆绳挂妥"
-
-                indices = segment_data.index[
-                    segment_data["predict_column"] == c
-                ].tolist()
-                df.loc[indices, key_action_field] = "征服者落座"
-                df.loc[df["csvTime"] == start, stage_field] = "回收阶段开始"
-                df.loc[df["csvTime"] == end, stage_field] = "回收阶段结束"
-                df.loc[(df["csvTime"] > start) & (df["csvTime"] < end), stage_field] = "回收阶段中"
-
-        if (is_hour_greater_than_12 or (is_hour_smaller_than_2 and is_lasttime_smaller_than_8) or (first_value in second_start_times)):
-            predict(segment_data, False)
-        else:
-            predict(segment_data, True)
+        if second_start_times is None:
+            first_start_times, second_start_times = extract_daily_power_on_times(df=df)
+        segment_data["predict_column"] = segment_data.apply(
+            lambda row: (
+                row["Ajia-3_v"]
+                if row["Ajia-5_v"] == 0 and row["Ajia-3_v"] > 0
+                else row["Ajia-5_v"]
+            ),
+            axis=1,
+        )
+        logger.info(
+            "【处理时间段】----------------LLM预测的列表---------------------"
+        )
+        logger.info(str(list(segment_data["predict_column"])))
+        is_xiafang = not (
+            is_hour_greater_than_12
+            or (is_hour_smaller_than_2 and is_lasttime_smaller_than_8)
+            or (first_value in second_start_times)
+        )
+        LLM_predict_results[LLM_predict_count].peak_pattern = peak_pattern
+        # 所有时间段处理完成后统一并发预测
+        LLM_predict_segments.append(
+            (LLM_predict_count, start, end, segment_data, is_xiafang)
+        )
 
     logger.success(f"【处理时间段完成】开机时间: {start}, 关机时间: {end}")
 logger.trace('出现过的峰值模式：',peak_patterns) 
 
+predictions = predict_sequences(
+    [
+        (list(segment_data["predict_column"]), is_xiafang)
+        for _, _, _, segment_data, is_xiafang in LLM_predict_segments
+    ]
+)
+for (count, start, end, segment_data, is_xiafang), (a, b, c) in zip(
+    LLM_predict_segments, predictions
+):
+    LLM_predict_results[count].prediction = (a, b, c)
+    logger.success(
+        f"【处理时间段】{start} - {end} LLM预测结果：",
+        "下放阶段" if is_xiafang else "回收阶段",
+        a,
+        b,
+        c,
+    )
+    apply_llm_prediction(df, segment_data, start, end, is_xiafang, (a, b, c))
+
 
 # In[ ]:
 
@@ -909,6 +958,9 @@ logger.success("A架数据保存成功")
 # In[ ]:
 
 
+# 【阶段】DP动作
+# 【输入】["Port3_ksbg_9.csv"]
+# 【输出】["Port3_ksbg_9.csv", table_name_map["Port3_ksbg_9.csv"]]
 # 判定ON DP和OFF DP
 table_key = "Port3_ksbg_9.csv"
 logger.special("开始判定ON DP和OFF DP")
@@ -942,6 +994,9 @@ logger.success("ON DP和OFF DP数据保存成功")
 # In[ ]:
 
 
+# 【阶段】发电机运行状态
+# 【输入】["Port1_ksbg_3.csv", "Port1_ksbg_4.csv", "Port2_ksbg_3.csv"]
+# 【输出】["Port1_ksbg_3.csv", "Port1_ksbg_4.csv", "Port2_ksbg_3.csv"]
 # 处理发电机运行时长
 logger.special("开始处理发电机运行时长")
 dynamo_run_map = {
@@ -953,26 +1008,41 @@ dynamo_run_map = {
 
 
 def mark_dynamo_run_status(data, field, run_status):
-    data[run_status] = not_running_flag
-    for i in range(0, data.shape[0]):
-        if data.loc[i, field] == 1:
-            data.loc[i, run_status] = running_flag
+    data[run_status] = np.where(data[field] == 1, running_flag, not_running_flag)
     return data
 
 
+# 同一张表中的发电机一起处理，每张表只读写一次
+dynamo_tables = {}
 for run_status, (table_name, field) in dynamo_run_map.items():
-    df = pd.read_csv(os.path.join(output_path, table_name))
-    if field in df.columns:
-        df = mark_dynamo_run_status(df, field, run_status)
-        df.to_csv(os.path.join(output_path, table_name), index=False)
-        logger.special(f"已处理 {table_name} 的 {field} 字段，标注 {run_status} 状态")
+    dynamo_tables.setdefault(table_name, []).append((field, run_status))
+
+for table_name, fields in dynamo_tables.items():
+    table_path = os.path.join(output_path, table_name)
+    if not os.path.exists(table_path):
+        logger.warning(f"{table_name} 不存在，跳过发电机运行状态标注")
+        continue
+    df = pd.read_csv(table_path)
+    marked = False
+    for field, run_status in fields:
+        if field in df.columns:
+            df = mark_dynamo_run_status(df, field, run_status)
+            marked = True
+            logger.special(f"已处理 {table_name} 的 {field} 字段，标注 {run_status} 状态")
+    if marked:
+        df.to_csv(table_path, index=False)
 
 
 # In[ ]:
 
 
+# 【阶段】折臂吊车关键动作
+# 【输入】["device_13_11_meter_1311.csv"]
+# 【输出】["device_13_11_meter_1311.csv", table_name_map["device_13_11_meter_1311.csv"], "diaoche_event.txt"]
 # 处理折臂吊车
 from collections import Counter
+from series_ops import detect_edges, fill_running_intervals, fill_short_gaps
+from stage_interval import extract_intervals
 table_key = "device_13_11_meter_1311.csv"
 
 logger.special("开始判定折臂吊车关键动作")
@@ -981,89 +1051,28 @@ df["13-11-6_v"] = pd.to_numeric(df["13-11-6_v"], errors="coerce")
 df[key_action_field] = no_key_action_flag
 df[stage_field] = no_stage_flag
 
-def sliding_window_5(arr):
-    """滑动窗口大小为5的逻辑"""
-    window_size = 5
-    modified_arr = arr.copy()
-    for i in range(len(arr) - window_size + 1):
-        window = arr[i : i + window_size]
-        if (
-            window[1] < 10
-            and window[2] < 10
-            and window[3] < 10
-            and window[0] >= 10
-            and window[4] >= 10
-        ):
-            # 将 window[0] 包装成列表进行赋值
-            modified_arr[i + 1 : i + 4] = [window[0]] * 3
-    return modified_arr
-
-
-def sliding_window_4(arr):
-    """滑动窗口大小为4的逻辑"""
-    window_size = 4
-    modified_arr = arr.copy()
-    for i in range(len(arr) - window_size + 1):
-        window = arr[i : i + window_size]
-        if window[1] < 10 and window[2] < 10 and window[0] >= 10 and window[3] >= 10:
-            # 将 window[0] 包装成列表进行赋值
-            modified_arr[i + 1 : i + 3] = [window[0]] * 2
-    return modified_arr
-
-
-def sliding_window_3(arr):
-    """滑动窗口大小为3的逻辑"""
-    window_size = 3
-    modified_arr = arr.copy()
-    for i in range(len(arr) - window_size + 1):
-        window = arr[i : i + window_size]
-        if window[1] < 10 and window[0] >= 10 and window[2] >= 10:
-            # 直接赋值，因为只修改一个值
-            modified_arr[i + 1] = window[0]
-    return modified_arr
-
-
 logger.info("【处理折臂吊车】开始应用滑动窗口逻辑")
-df["13-11-6_v_new"] = sliding_window_5(df["13-11-6_v"].tolist())
-df["13-11-6_v_new"] = sliding_window_4(df["13-11-6_v_new"].tolist())
-df["13-11-6_v_new"] = sliding_window_3(df["13-11-6_v_new"].tolist())
+# 工作电流短暂（不超过 3 个时刻）跌落到 10 以下时视为仍在工作，用跌落前的值填充
+df["13-11-6_v_new"] = fill_short_gaps(df["13-11-6_v"], 10, 3)
 logger.success("【处理折臂吊车】滑动窗口逻辑应用完成")
 
 logger.info("【处理折臂吊车】开始判定折臂吊车的开机和关机事件")
-df[running_status_field]= "未运行"
-have_boot = -1
-not_have_boot = -1
-for i in range(1, df.shape[0]):
-    # 开机
-    if df.iloc[i - 1]["13-11-6_v"] == 0 and df.iloc[i]["13-11-6_v"] > 0:
-        df.at[df.index[i], key_action_field] = "折臂吊车开机"
-        have_boot = i
-    # 关机
-    if df.iloc[i - 1]["13-11-6_v"] > 0 and df.iloc[i]["13-11-6_v"] == 0:
-        df.at[df.index[i], key_action_field] = "折臂吊车关机"
-        not_have_boot = i
-    if have_boot != -1 and not_have_boot != -1 and have_boot < not_have_boot:
-        for j in range(have_boot, not_have_boot+1):
-            df.loc[j, running_status_field] = running_flag
-        have_boot = -1
-        not_have_boot = -1
-    # 检测由待机进入工作和由工作进入待机的事件
-    if df.iloc[i - 1]["13-11-6_v_new"] < 10 and df.iloc[i]["13-11-6_v_new"] >= 10:
-        df.at[df.index[i], stage_field] = "由待机进入工作"
-    if df.iloc[i - 1]["13-11-6_v_new"] >= 10 and df.iloc[i]["13-11-6_v_new"] < 10:
-        df.at[df.index[i], stage_field] = "由工作进入待机"
+current = df["13-11-6_v"].to_numpy()
+filled_current = df["13-11-6_v_new"].to_numpy()
+# 开机：前一时刻电流为 0，当前时刻大于 0；关机反之
+boot = detect_edges(current == 0, current > 0)
+shutdown = detect_edges(current > 0, current == 0)
+df[running_status_field] = "未运行"
+df.loc[boot, key_action_field] = "折臂吊车开机"
+df.loc[shutdown, key_action_field] = "折臂吊车关机"
+df.loc[fill_running_intervals(boot, shutdown), running_status_field] = running_flag
+# 检测由待机进入工作和由工作进入待机的事件
+df.loc[detect_edges(filled_current < 10, filled_current >= 10), stage_field] = "由待机进入工作"
+df.loc[detect_edges(filled_current >= 10, filled_current < 10), stage_field] = "由工作进入待机"
 logger.success("【处理折臂吊车】折臂吊车的开机和关机事件判定完成")
 
 logger.info("【处理折臂吊车】根据折臂吊车的开机和关机事件划分时间段")
-segments = []
-start_time = None
-for index, row in df.iterrows():
-    if row[key_action_field] == "折臂吊车开机":
-        start_time = row["csvTime"]
-    elif row[key_action_field] == "折臂吊车关机" and start_time is not None:
-        end_time = row["csvTime"]
-        segments.append((start_time, end_time))
-        start_time = None
+segments = extract_intervals(df, "折臂吊车开机", "折臂吊车关机", key_action_field)
 logger.success("【处理折臂吊车】时间段划分完成")
 
 def find_most_frequent_number(lst):
@@ -1203,7 +1212,11 @@ logger.success("【处理折臂吊车】保存数据完成")
 # In[ ]:
 
 
+# 【阶段】航行状态
+# 【输入】["A架动作表.csv", "艏侧推系统DP动作表.csv", "Port3_ksbg_8.csv", "Port4_ksbg_7.csv"]
+# 【输出】[f"{sailing_stage_table_name}.csv"]
 # 判断标注4个巡航阶段
+from series_ops import fill_between_markers, pair_events
 logger.special("开始标注航行状态")
 
 output_filename = f"{sailing_stage_table_name}.csv"
@@ -1234,140 +1247,120 @@ df_merge = (
 df_merge["docking_status"] = "False"
 df_merge["voyage_status"] = "False"
 df_merge["escort_status"] = "False"
-df_merge["dp_status"] = "False"
 df_merge["dp_status"] = np.where(
     df_merge["key_action"] == "ON DP", "动力定位状态开始", "False"
 )
 df_merge["dp_status"] = np.where(
     df_merge["key_action"] == "OFF DP", "动力定位状态结束", df_merge["dp_status"]
 )
-dp_indexs=df_merge[df_merge["dp_status"].isin(["动力定位状态开始", "动力定位状态结束"])].index
-i = 0
-while i < len(dp_indexs) - 1:
-    if df_merge.loc[dp_indexs[i], "dp_status"]=="动力定位状态结束" or df_merge.loc[dp_indexs[i+1], "dp_status"]=="动力定位状态开始":
-        i+=1
-        continue
-    df_merge.loc[dp_indexs[i]+1:dp_indexs[i+1]-1, "dp_status"] = "动力定位状态中"
-    i+=2
+df_merge["dp_status"] = fill_between_markers(
+    df_merge["dp_status"], "动力定位状态开始", "动力定位状态结束", "动力定位状态中"
+)
 
-# 找到下一个P3_32为0的点
-def find_next_zero(df, index):
-    for i in range(index, len(df)):
-        if df.loc[i, "P3_32"] == 0:
-            return i
-    return len(df)
 
+def get_run_starts(is_first, is_second):
+    """
+    只看满足两类条件之一的行，返回类别发生变化（含第一行）的行号及其是否属于第一类
 
-# 找到下一个P3_32不为0的点
-def find_next_nonzero(df, index):
-    for i in range(index, len(df)):
-        if df.loc[i, "P3_32"] > 300:
-            return i
-    return len(df)
+    :param is_first (ndarray): 各行是否属于第一类
+    :param is_second (ndarray): 各行是否属于第二类，与第一类互斥
+    :return tuple[ndarray, ndarray]: 游程起点的行号、游程起点是否属于第一类
+    """
+    rows = np.flatnonzero(is_first | is_second)
+    kinds = is_first[rows]
+    changed = np.ones(len(rows), dtype=bool)
+    changed[1:] = kinds[1:] != kinds[:-1]
+    return rows[changed], kinds[changed]
 
 
-logger.special("开始标注停泊状态")
-df_merge["P3_32"] = pd.to_numeric(df_merge["P3_32"], errors="coerce")
-first_index = 0
-second_index = 0
-for i in range(len(df)):
-    if df_merge.loc[i, "P3_32"] == 0:
-        first_index = i
-        break
-second_index = find_next_nonzero(df_merge, first_index + 1) - 1
-df_merge.loc[first_index, "docking_status"] = "停泊状态开始"
-df_merge.loc[second_index, "docking_status"] = "停泊状态结束"
-df_merge.loc[first_index+1:second_index-1, "docking_status"] = "停泊状态中"
-while 1:
-    first_index = find_next_zero(df_merge, second_index + 1)
-    if first_index == len(df_merge):
-        break
-    if first_index - second_index < 120:
-        df_merge.loc[second_index, "docking_status"] = "False"
-    else:
-        df_merge.loc[first_index, "docking_status"] = "停泊状态开始"
-    second_index = find_next_nonzero(df_merge, first_index + 1) - 1
-    if second_index == len(df_merge) - 1:
-        break
-    df_merge.loc[second_index, "docking_status"] = "停泊状态结束"
-    
-stop_indexs=df_merge[df_merge["docking_status"].isin(["停泊状态开始", "停泊状态结束"])].index
-i=0
-while i < len(stop_indexs) - 1:
-    if df_merge.loc[stop_indexs[i], "docking_status"]=="停泊状态结束" or df_merge.loc[stop_indexs[i+1], "docking_status"]=="停泊状态开始":
-        i+=1
-        continue
-    df_merge.loc[stop_indexs[i]+1:stop_indexs[i+1]-1, "docking_status"] = "停泊状态中"
-    i+=2
-    
+def label_docking_status(power):
+    """
+    根据一号推进器功率（P3_32）标注停泊状态
 
+    功率为 0 时停泊开始，之后功率首次超过 300 的前一行停泊结束；结束后不到 120 行再次停泊时与上一段合并。
 
-def label_sailing_begin_end(df):
-    sailing_begin_index = -1
-    sailing_end_index = 0
-    flag = False
-    for i in range(1, df.shape[0]):
-        if df.loc[i, "stage"] == "布放阶段中" and df.loc[i, "key_action"] == "OFF DP" and df.loc[i, "docking_status"]=="False":
-            df.loc[i, "escort_status"] = "伴航状态开始"
-            flag = True
-        if df.loc[i, "stage"] == "回收阶段中" and df.loc[i, "key_action"] == "ON DP" and df.loc[i, "docking_status"]=="False" and flag:
-            flag = False
-            df.loc[i - 1, "escort_status"] = "伴航状态结束"
-        # if df.loc[i, "docking_status"]!="False" and sailing_begin_index > sailing_end_index:
-        #     logger.info(f"航渡状态开始失效")
-        #     sailing_end_index = i
-        #     continue
-        # if sailing_begin_index < sailing_end_index and df.loc[i, "P3_32"] >= 1000 and df.loc[i, "P3_15"] >= 200 and df.loc[i, "docking_status"]=="False":
-        #     logger.info(f"找到航渡状态开始的时间：{df.loc[i, 'csvTime']}")
-        #     sailing_begin_index = i
-        #     continue
-        # if sailing_begin_index > sailing_end_index and (df.loc[i, "P3_15"] < 128 or df.loc[i, "P3_32"] < 1000):
-        #     sailing_end_index = i
-        #     logger.info(f"找到航渡状态结束的时间：{df.loc[i, 'csvTime']}")
-        #     df.loc[sailing_begin_index, "voyage_status"] = "航渡状态开始"
-        #     df.loc[sailing_end_index, "voyage_status"] = "航渡状态结束"
-        #     df.loc[sailing_begin_index+1:sailing_end_index-1, "voyage_status"] = "航渡状态中"
-        if sailing_begin_index < sailing_end_index and df.loc[i, "P3_15"] >= 1000:
-            sailing_begin_index = i
-        if sailing_begin_index > sailing_end_index and df.loc[i, "P3_15"] < 1000:
-            sailing_end_index = i
-            df.loc[sailing_begin_index, "voyage_status"] = "航渡状态开始"
-            df.loc[sailing_end_index, "voyage_status"] = "航渡状态结束"
-            df.loc[sailing_begin_index+1:sailing_end_index-1, "voyage_status"] = "航渡状态中"
-    escort_indexs=df_merge[df_merge["escort_status"].isin(["伴航状态开始", "伴航状态结束"])].index
-    i=0
-    while i < len(escort_indexs) - 1:
-        if df_merge.loc[escort_indexs[i], "escort_status"]=="伴航状态结束" or df_merge.loc[escort_indexs[i+1], "escort_status"]=="伴航状态开始":
-            i+=1
-            continue
-        df_merge.loc[escort_indexs[i]+1:escort_indexs[i+1]-1, "escort_status"] = "伴航状态中"    
-        i+=2
-        
-    # hangdu_indexs=df_merge[df_merge["voyage_status"].isin(["航渡状态开始", "航渡状态结束"])].index
-    # logger.info(f"航渡状态开始和结束的索引对应的时间：{df.loc[hangdu_indexs, 'csvTime']}")
-    # last_end_index = 1
-    # for i in range(0,len(hangdu_indexs)-1,2):
-    #     flag=True
-    #     if (
-    #         not (df_merge.loc[hangdu_indexs[i]:hangdu_indexs[i+1]-1, "P3_15"] >= 128).all() 
-    #         or (df_merge.loc[hangdu_indexs[i]:hangdu_indexs[i+1], "stage"].isin(["回收阶段中", "布放阶段中"]).any())
-    #         or (df_merge.loc[hangdu_indexs[i]:hangdu_indexs[i+1], "escort_status"].isin(["伴航状态中"]).any())
-    #         or (df_merge.loc[hangdu_indexs[i]:hangdu_indexs[i+1], "P3_15"] > 1000).sum() < 10  # 计算区间内大于 1000 的数据量
-    #     ):
-    #         df_merge.loc[hangdu_indexs[i]:hangdu_indexs[i+1], "voyage_status"] = "False"
-    #         flag=False
-    #     if flag and hangdu_indexs[i]-last_end_index<10 and i>0 and df_merge.loc[last_end_index,"voyage_status"]!="False":
-    #         df_merge.loc[last_end_index:hangdu_indexs[i], "voyage_status"] = "航渡状态中"
-    #     last_end_index=hangdu_indexs[i+1]
-    # hangdu_indexs=df_merge[df_merge["voyage_status"].isin(["航渡状态开始", "航渡状态结束"])].index
-    # for i in range(0,len(hangdu_indexs)-1,2):
-    #     if hangdu_indexs[i+1]-hangdu_indexs[i]<15:
-    #         df_merge.loc[hangdu_indexs[i]:hangdu_indexs[i+1], "voyage_status"] = "False"
-            
+    :param power (ndarray): 一号推进器功率
+    :return ndarray: 停泊状态列
+    """
+    n = len(power)
+    status = np.full(n, "False", dtype=object)
+    is_zero = power == 0
+    is_high = power > 300
+    zeros = np.flatnonzero(is_zero)
+    first = zeros[0] if len(zeros) else 0
+    highs_after = np.flatnonzero(is_high[first + 1 :]) + first + 1
+    first_high = highs_after[0] if len(highs_after) else n
+
+    # 之后功率为 0 和超过 300 的游程交替出现，各段从 0 值游程的起点开始，到下一个超过 300 的游程起点的前一行结束
+    run_starts, run_is_zero = get_run_starts(is_zero, is_high)
+    later = run_starts > first_high
+    run_starts, run_is_zero = run_starts[later], run_is_zero[later]
+    starts = run_starts[run_is_zero]
+    highs = np.concatenate([[first_high], run_starts[~run_is_zero], [n]])[: len(starts) + 1]
+    ends = highs - 1
+
+    status[first] = "停泊状态开始"
+    status[ends[0]] = "停泊状态结束"
+    status[first + 1 : ends[0]] = "停泊状态中"
+    merged = starts - ends[:-1] < 120
+    status[starts[~merged]] = "停泊状态开始"
+    # 之后没有功率超过 300 的行时最后一段不标记结束
+    later_ends = ends[1:]
+    status[later_ends[later_ends < n - 1]] = "停泊状态结束"
+    status[ends[:-1][merged]] = "False"
+    return fill_between_markers(status, "停泊状态开始", "停泊状态结束", "停泊状态中")
+
+
+def label_voyage_status(power):
+    """
+    根据一号推进器功率（P3_15）标注航渡状态：功率不低于 1000 开始，之后首次低于 1000 结束（第一行不判定）
+
+    :param power (ndarray): 一号推进器功率
+    :return ndarray: 航渡状态列
+    """
+    status = np.full(len(power), "False", dtype=object)
+    is_high = np.concatenate([[False], power[1:] >= 1000])
+    is_low = np.concatenate([[False], power[1:] < 1000])
+    run_starts, run_is_high = get_run_starts(is_high, is_low)
+    # 高功率游程与其后的低功率游程配对，最后一段没有结束时不标记
+    high_runs = np.flatnonzero(run_is_high[:-1])
+    starts, ends = run_starts[high_runs], run_starts[high_runs + 1]
+    status[starts] = "航渡状态开始"
+    status[ends] = "航渡状态结束"
+    return fill_between_markers(status, "航渡状态开始", "航渡状态结束", "航渡状态中")
+
+
+def label_escort_status(stage, key_action, docking_status):
+    """
+    标注伴航状态：非停泊时，布放阶段中退出动力定位为伴航开始，之后回收阶段中进入动力定位的前一行为伴航结束（第一行不判定）
 
+    :param stage (ndarray): A架阶段
+    :param key_action (ndarray): 动力定位动作
+    :param docking_status (ndarray): 停泊状态
+    :return ndarray: 伴航状态列
+    """
+    status = np.full(len(stage), "False", dtype=object)
+    not_docking = docking_status == "False"
+    not_docking[:1] = False
+    is_start = (stage == "布放阶段中") & (key_action == "OFF DP") & not_docking
+    is_end = (stage == "回收阶段中") & (key_action == "ON DP") & not_docking
+    _, ends = pair_events(is_start, is_end)
+    status[is_start] = "伴航状态开始"
+    status[ends - 1] = "伴航状态结束"
+    return fill_between_markers(status, "伴航状态开始", "伴航状态结束", "伴航状态中")
+
+
+logger.special("开始标注停泊状态")
+df_merge["P3_32"] = pd.to_numeric(df_merge["P3_32"], errors="coerce")
+df_merge["docking_status"] = label_docking_status(df_merge["P3_32"].to_numpy())
 
 logger.special("开始标注航渡状态和伴航状态")
-label_sailing_begin_end(df_merge)
+df_merge["voyage_status"] = label_voyage_status(df_merge["P3_15"].to_numpy())
+df_merge["escort_status"] = label_escort_status(
+    df_merge["stage"].to_numpy(),
+    df_merge["key_action"].to_numpy(),
+    df_merge["docking_status"].to_numpy(),
+)
 df_merge.to_csv(os.path.join(output_path, output_filename), index=False)
 logger.special("航行状态标注完毕")
 
@@ -1375,25 +1368,20 @@ logger.special("航行状态标注完毕")
 # In[ ]:
 
 
+# 【阶段】放缆收缆
+# 【输入】["Jiaoche_plc_1.csv"]
+# 【输出】["Jiaoche_plc_1.csv"]
 logger.special("开始标注放缆收缆")
 df=pd.read_csv(os.path.join(output_path, 'Jiaoche_plc_1.csv'))
-df["deploy_retrieve_status"] = 'false'
-index=0
-for i in range(1, df.shape[0]):
-    prev_value = df.loc[i-1, "PLC_point0_value"]
-    curr_value = df.loc[i, "PLC_point0_value"]
-    if prev_value == "error" or curr_value == "error":
-        continue
-    prev_value = float(prev_value)
-    curr_value = float(curr_value)
-    if (curr_value-prev_value) > 5:
-        df.loc[i, "deploy_retrieve_status"] = '放缆'
-        logger.debug("放缆一次：",df.loc[i, "csvTime"],"原长度:", prev_value, "当前长度:", curr_value)
-        continue
-    elif (prev_value-curr_value) > 5:
-        df.loc[i, "deploy_retrieve_status"] = '收缆'
-        logger.debug("收缆一次：",df.loc[i, "csvTime"],"原长度:", prev_value, "当前长度:", curr_value)
-        continue
+# 缆长与上一行相比增加超过 5 为放缆，减少超过 5 为收缆，任一行为 error 时不判定
+cable_length = df["PLC_point0_value"]
+cable_change = cable_length.where(cable_length != "error").astype(float).diff()
+df["deploy_retrieve_status"] = np.select(
+    [cable_change > 5, cable_change < -5], ["放缆", "收缆"], "false"
+)
+logger.debug(
+    "放缆次数:", (cable_change > 5).sum(), "收缆次数:", (cable_change < -5).sum()
+)
 df.to_csv(os.path.join(output_path, 'Jiaoche_plc_1.csv'), index=False)
 logger.special("放缆收缆标注完毕")
     
@@ -1403,6 +1391,62 @@ logger.special("放缆收缆标注完毕")
 # In[ ]:
 
 
+# 【阶段】事件索引
+# 【输入】list(table_name_map.values())
+# 【输出】["事件索引表.csv"]
+# 生成关键动作事件索引，供关键动作查询类工具二分查找
+from event_index import EventIndex, event_index_file_name
+
+logger.special("开始生成事件索引")
+event_index = EventIndex.build(output_path)
+event_index.to_csv(os.path.join(output_path, event_index_file_name), index=False)
+logger.success(f"事件索引生成完毕，共 {len(event_index)} 条事件")
+
+
+# In[ ]:
+
+
+# 【阶段】每日汇总
+# 【输入】["*.csv"]
+# 【输出】["每日设备汇总表.csv", "每日动作汇总表.csv"]
+# 生成每日汇总表，按天统计的问题直接查询汇总表
+from daily_rollup import DailyRollup, action_summary_file_name, device_summary_file_name
+
+logger.special("开始生成每日汇总表")
+DailyRollup.build_device_summary(output_path).to_csv(
+    os.path.join(output_path, device_summary_file_name), index=False
+)
+DailyRollup.build_action_summary(output_path).to_csv(
+    os.path.join(output_path, action_summary_file_name), index=False
+)
+logger.success("每日汇总表生成完毕")
+
+
+# In[ ]:
+
+
+# 【阶段】列式缓存
+# 【输入】["*.csv"]
+# 【输出】[".columnar"]
+# 生成列式缓存，工具层优先读取缓存而非解析 CSV
+import shutil
+from columnar import cache_dir_name
+from table_store import TableStore
+
+logger.special("开始生成列式缓存")
+# 整体重新生成，不保留已删除数据表的缓存
+shutil.rmtree(os.path.join(output_path, cache_dir_name), ignore_errors=True)
+for file_name in os.listdir(output_path):
+    if file_name.endswith(".csv"):
+        TableStore.build_cache(os.path.join(output_path, file_name))
+        logger.info(f"已生成 {file_name} 的列式缓存")
+logger.success("列式缓存生成完毕")
+
+
+# In[ ]:
+
+
+# 【收尾】
 import time
 program_end_time = time.time()
 elapsed_time_minutes = (program_end_time - program_start_time) / 60
@@ -0,0 +1,79 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+设备配置：设备名称与数据表、功率列的对应关系
+
+组合设备的值为子设备名称列表，叶子设备的值为 (数据表名, 功率列名)。
+"""
+
+# 能耗计算设备
+energy_device_config = {
+    "全船": ["甲板机械设备", "推进系统", "舵桨"],
+    "甲板机械设备": ["折臂吊车", "A架", "绞车变频器"],
+    "折臂吊车": ("折臂吊车与小艇动作表", "13-11-6_v"),
+    "A架": ["一号门架", "二号门架"],
+    "一号门架": ("device_1_5_meter_105", "1-5-6_v"),
+    "二号门架": ("device_13_14_meter_1314", "13-14-6_v"),
+    "绞车变频器": ("device_1_15_meter_115", "1-15-8_v"),
+    "推进系统": ["主推", "可伸缩推", "侧推"],
+    "主推": ["一号推进变频器", "二号推进变频器"],
+    "一号推进变频器": ("Port3_ksbg_8", "P3_15"),
+    "二号推进变频器": ("Port4_ksbg_7", "P4_16"),
+    "可伸缩推": ("Port4_ksbg_8", "P4_21"),
+    "侧推": ("艏侧推系统DP动作表", "P3_18"),
+    "舵桨": [
+        "一号舵桨转舵A",
+        "一号舵桨转舵B",
+        "二号舵桨转舵A",
+        "二号舵桨转舵B",
+    ],
+    "一号舵桨转舵A": ("device_1_2_meter_102", "1-2-6_v"),
+    "一号舵桨转舵B": ("device_1_3_meter_103", "1-3-6_v"),
+    "二号舵桨转舵A": ("device_13_2_meter_1302", "13-2-6_v"),
+    "二号舵桨转舵B": ("device_13_3_meter_1303", "13-3-6_v"),
+}
+
+# 发电机发电量/燃油消耗量计算设备，按查询类型区分
+power_fuel_device_config = {
+    "燃油消耗量": {
+        "一号柴油发电机": ("Port1_ksbg_1", "P1_3"),
+        "二号柴油发电机": ("Port1_ksbg_1", "P1_25"),
+        "三号柴油发电机": ("Port2_ksbg_1", "P2_3"),
+        "四号柴油发电机": ("Port2_ksbg_1", "P2_25"),
+        "整个柴油发电机组": [
+            "一号柴油发电机",
+            "二号柴油发电机",
+            "三号柴油发电机",
+            "四号柴油发电机",
+        ],
+    },
+    "实际发电量": {
+        "一号柴油发电机": ("Port1_ksbg_3", "P1_66"),
+        "二号柴油发电机": ("Port1_ksbg_3", "P1_75"),
+        "三号柴油发电机": ("Port2_ksbg_2", "P2_51"),
+        "四号柴油发电机": ("Port2_ksbg_3", "P2_60"),
+        "整个柴油发电机组": [
+            "一号柴油发电机",
+            "二号柴油发电机",
+            "三号柴油发电机",
+            "四号柴油发电机",
+        ],
+    },
+    "理论发电量": {
+        "一号柴油发电机": ("Port1_ksbg_1", "P1_3"),
+        "二号柴油发电机": ("Port1_ksbg_1", "P1_25"),
+        "三号柴油发电机": ("Port2_ksbg_1", "P2_3"),
+        "四号柴油发电机": ("Port2_ksbg_1", "P2_25"),
+        "整个柴油发电机组": [
+            "一号柴油发电机",
+            "二号柴油发电机",
+            "三号柴油发电机",
+            "四号柴油发电机",
+        ],
+    },
+}
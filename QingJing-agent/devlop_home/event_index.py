@@ -0,0 +1,152 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+关键动作事件索引
+
+从各动作表中抽取 key_action 不为 'False' 或处于阶段边界的数据行，按 csvTime 升序保存为一张小表：
+csvTime、table（来源数据表）、device（设备）、key_action、stage。
+data_process.py 在预处理结束时生成 `事件索引表.csv`；索引文件缺失或早于动作表时，在内存中现场构建。
+"""
+
+import os
+import threading
+
+import pandas as pd
+from table_store import TableStore
+import logger
+
+event_index_file_name = "事件索引表.csv"
+
+no_flag = "False"
+
+# 动作表 -> 设备名称
+event_tables = {
+    "A架动作表": "A架",
+    "折臂吊车与小艇动作表": "折臂吊车",
+    "艏侧推系统DP动作表": "艏推DP",
+}
+
+# A架动作表中属于绞车的动作
+winch_actions = ["缆绳挂妥", "缆绳解除"]
+
+# 作为事件收录的阶段标记（阶段中的数据行不收录）
+event_stages = [
+    "布放阶段开始",
+    "布放阶段结束",
+    "回收阶段开始",
+    "回收阶段结束",
+    "由待机进入工作",
+    "由工作进入待机",
+]
+
+event_columns = ["csvTime", "table", "device", "key_action", "stage"]
+
+
+class EventIndex:
+    """关键动作事件索引，进程内缓存，按时间二分查找"""
+
+    _cache: dict[str, tuple[tuple, pd.DataFrame]] = {}
+    _lock = threading.Lock()
+
+    @staticmethod
+    def build(base_path: str) -> pd.DataFrame:
+        """
+        从动作表构建事件索引
+
+        :param base_path (str): 数据表目录
+        :return DataFrame: 按 csvTime 升序排列的事件索引
+        """
+        events = []
+        for table_name, device_name in event_tables.items():
+            try:
+                df = TableStore.load(os.path.join(base_path, f"{table_name}.csv"))
+            except FileNotFoundError:
+                logger.warning(f"【事件索引】数据表 {table_name} 不存在，跳过")
+                continue
+
+            key_action = df["key_action"]
+            stage = df["stage"] if "stage" in df.columns else None
+            mask = key_action != no_flag
+            if stage is not None:
+                mask |= stage.isin(event_stages)
+
+            table_events = pd.DataFrame(
+                {
+                    "csvTime": df["csvTime"][mask],
+                    "table": table_name,
+                    "device": device_name,
+                    "key_action": key_action[mask],
+                    "stage": stage[mask] if stage is not None else no_flag,
+                }
+            )
+            if table_name == "A架动作表":
+                table_events.loc[
+                    table_events["key_action"].isin(winch_actions), "device"
+                ] = "绞车"
+            events.append(table_events)
+
+        if not events:
+            return pd.DataFrame(columns=event_columns)
+        return (
+            pd.concat(events, ignore_index=True)
+            .sort_values(by="csvTime", kind="stable")
+            .reset_index(drop=True)
+        )
+
+    @classmethod
+    def load(cls, base_path: str) -> pd.DataFrame:
+        """
+        获取事件索引，动作表更新后自动重建
+
+        :param base_path (str): 数据表目录
+        :return DataFrame: 按 csvTime 升序排列的事件索引
+        """
+        base_path = os.path.normpath(base_path)
+        source_paths = [
+            os.path.join(base_path, f"{table_name}.csv") for table_name in event_tables
+        ]
+        source_mtimes = [
+            os.stat(path).st_mtime_ns for path in source_paths if os.path.exists(path)
+        ]
+        index_path = os.path.join(base_path, event_index_file_name)
+        index_mtime = (
+            os.stat(index_path).st_mtime_ns if os.path.exists(index_path) else None
+        )
+        signature = (tuple(source_mtimes), index_mtime)
+
+        with cls._lock:
+            cached = cls._cache.get(base_path)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+
+            if index_mtime is not None and index_mtime >= max(source_mtimes, default=0):
+                events = TableStore.load(index_path)
+            else:
+                logger.debug("【事件索引】索引文件缺失或已过期，从动作表构建")
+                events = cls.build(base_path)
+            cls._cache[base_path] = (signature, events)
+        return events
+
+    @classmethod
+    def query(cls, base_path: str, start_time, end_time, **filters) -> pd.DataFrame:
+        """
+        查询时间范围内的事件
+
+        :param base_path (str): 数据表目录
+        :param start_time: 开始时间
+        :param end_time: 结束时间
+        :param filters: 按列过滤，值为列表时匹配其中任意一个，如 table="A架动作表"、key_action=["A架开机"]
+        :return DataFrame: 符合条件的事件，按 csvTime 升序排列
+        """
+        events = TableStore.slice_by_time(cls.load(base_path), start_time, end_time)
+        for column, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                events = events[events[column].isin(value)]
+            else:
+                events = events[events[column] == value]
+        return events
@@ -0,0 +1,238 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+增量预处理
+
+新的传感器数据导出后，输入表新旧版本第一处不同的行及之后各行中最早的 csvTime 为变化时间（水位线），
+其所在日期零点为拼接点。阶段在临时目录中以检查点（拼接点前若干天）之后的输入重新运行：
+重算结果在 [检查点, 拼接点) 内与原输出逐行一致时，开关机区间、摆动检测、航行状态等状态机已与完整运行收敛，
+原输出拼接点之前的行与重算结果拼接点之后的行拼接即为完整运行的结果；
+不一致时检查点前移（重叠天数加倍），检查点到达数据起点时放弃增量运行。
+
+CSV 文件按 csvTime 列取时间，其他文本文件（如 ajia_event.txt）取行内第一个时间，没有时间的行沿用上一行。
+"""
+
+import csv
+import os
+import re
+import shutil
+from datetime import date, timedelta
+
+import logger
+
+time_column = "csvTime"
+time_pattern = re.compile(r"\d{4}-\d{2}-\d{2} \d{2}:\d{2}(?::\d{2})?")
+
+
+class SpliceError(Exception):
+    """重算结果无法与原输出拼接，增加重叠天数也不会改善"""
+
+
+class TimedLines:
+    """
+    按行读取的文件及各行的时间
+
+    :param path (str): 文件路径
+    :param name (str): 文件名，用于判断文件类型，默认为路径本身（保存的版本没有扩展名）
+    """
+
+    def __init__(self, path: str, name: str = None):
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            lines = f.read().splitlines(keepends=True)
+        self.is_csv = (name or path).endswith(".csv")
+        if self.is_csv:
+            self.header, self.lines = "".join(lines[:1]), lines[1:]
+        else:
+            self.header, self.lines = "", lines
+        # 各行的时间，CSV 文件没有 csvTime 列时为 None
+        self.times = self._parse_times()
+
+    def _parse_times(self):
+        if not self.is_csv:
+            times, current = [], ""
+            for line in self.lines:
+                match = time_pattern.search(line)
+                if match:
+                    current = match.group()
+                times.append(current)
+            return times
+
+        columns = next(csv.reader([self.header]), [])
+        if time_column not in columns:
+            return None
+        index = columns.index(time_column)
+        times = [row[index] if len(row) > index else "" for row in csv.reader(self.lines)]
+        # 字段中含换行时无法按行对应
+        return times if len(times) == len(self.lines) else None
+
+    def is_sorted(self) -> bool:
+        return self.times is not None and all(
+            a <= b for a, b in zip(self.times, self.times[1:])
+        )
+
+    def select(self, start: str = "", end: str = None) -> list[str]:
+        """时间在 [start, end) 内的行，保持原顺序"""
+        return [
+            line
+            for line, line_time in zip(self.lines, self.times)
+            if start <= line_time and (end is None or line_time < end)
+        ]
+
+
+def get_change_time(old_path: str, new_path: str):
+    """
+    获取 CSV 文件新旧版本之间的变化时间
+
+    :param old_path (str): 旧版本路径
+    :param new_path (str): 新版本路径
+    :return str: 第一处不同的行及之后各行（新旧版本）中最早的时间；内容相同时返回空字符串；
+        非 CSV 文件、没有 csvTime 列或表头变化时返回 None
+    """
+    if not new_path.endswith(".csv"):
+        return None
+    old, new = TimedLines(old_path, new_path), TimedLines(new_path)
+    if old.times is None or new.times is None or old.header != new.header:
+        return None
+    index = next(
+        (i for i, (a, b) in enumerate(zip(old.lines, new.lines)) if a != b),
+        min(len(old.lines), len(new.lines)),
+    )
+    tails = old.times[index:] + new.times[index:]
+    if not tails:
+        return ""
+    changed = [line_time for line_time in tails if line_time]
+    # 变化的行没有时间时无法定位
+    return min(changed) if len(changed) == len(tails) else None
+
+
+def write_lines(path: str, header: str, lines: list[str]):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp{os.getpid()}"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        f.write(header)
+        f.writelines(lines)
+    os.replace(tmp_path, path)
+
+
+class IncrementalJob:
+    """
+    阶段的一次增量运行
+
+    :param cut (str): 拼接点（日期，YYYY-MM-DD）
+    :param inputs (list[str]): 输入文件路径（磁盘上为本次运行的版本）
+    :param outputs (dict[str, str]): 输出文件路径 -> 上次运行的输出版本的文件路径
+    :param directories (dict[str, list[str]]): 输入、输出所在目录 -> 命名空间中值为该目录的变量名，重算时指向临时目录
+    :param scratch_dir (str): 临时目录
+    """
+
+    def __init__(
+        self,
+        cut: str,
+        inputs: list[str],
+        outputs: dict[str, str],
+        directories: dict[str, list[str]],
+        scratch_dir: str,
+    ):
+        self.cut = cut
+        self.inputs = inputs
+        self.outputs = outputs
+        self.directories = directories
+        self.scratch_dir = scratch_dir
+
+    def get_scratch_path(self, path: str) -> str:
+        directory = os.path.dirname(path)
+        index = list(self.directories).index(directory)
+        return os.path.join(self.scratch_dir, str(index), os.path.basename(path))
+
+    def run(self, stage, namespace: dict) -> bool:
+        """
+        增量运行阶段，从拼接点前 1 天开始重算，未收敛时重叠天数加倍
+
+        :param stage (Stage): 阶段
+        :param namespace (dict): 公共单元格执行后的命名空间
+        :return bool: 是否成功，失败时输出文件保持不变
+        """
+        overlap = 1
+        try:
+            timed_inputs = {
+                path: TimedLines(path)
+                for path in self.inputs
+                if os.path.dirname(path) in self.directories and os.path.exists(path)
+            }
+            start = min(
+                (
+                    min(filter(None, timed.times), default=self.cut)[:10]
+                    for timed in timed_inputs.values()
+                    if timed.times is not None
+                ),
+                default=self.cut,
+            )
+            while True:
+                checkpoint = (date.fromisoformat(self.cut) - timedelta(days=overlap)).isoformat()
+                if checkpoint <= start:
+                    logger.info(f"【流水线】{stage.name}：重算未收敛，完整运行")
+                    return False
+                logger.info(
+                    f"【流水线】{stage.name}：增量运行，检查点 {checkpoint}，拼接点 {self.cut}"
+                )
+                if self.replay(stage, namespace, timed_inputs, checkpoint):
+                    return True
+                overlap *= 2
+        except SpliceError as e:
+            logger.info(f"【流水线】{stage.name}：{e}，完整运行")
+            return False
+        except Exception as e:
+            logger.warning(f"【流水线】{stage.name}：增量运行失败，完整运行: {e}")
+            return False
+        finally:
+            shutil.rmtree(self.scratch_dir, ignore_errors=True)
+
+    def replay(self, stage, namespace: dict, timed_inputs: dict, checkpoint: str) -> bool:
+        """
+        以检查点之后的输入在临时目录中重算，在 [检查点, 拼接点) 内与原输出一致时拼接
+
+        :return bool: 是否一致
+        :raise SpliceError: 输出的表头不一致、没有时间的输出与原输出不一致或输出未按时间排序
+        """
+        shutil.rmtree(self.scratch_dir, ignore_errors=True)
+        namespace = dict(namespace)
+        for index, (directory, names) in enumerate(self.directories.items()):
+            scratch_path = os.path.join(self.scratch_dir, str(index))
+            os.makedirs(scratch_path)
+            for name in names:
+                # 保留原值末尾的路径分隔符
+                namespace[name] = scratch_path + namespace[name][len(namespace[name].rstrip("/")) :]
+        for path, timed in timed_inputs.items():
+            if timed.times is None:
+                shutil.copyfile(path, self.get_scratch_path(path))
+            else:
+                write_lines(
+                    self.get_scratch_path(path), timed.header, timed.select(checkpoint)
+                )
+        stage.run(namespace)
+
+        spliced = {}
+        for path, old_path in self.outputs.items():
+            old, new = TimedLines(old_path, path), TimedLines(self.get_scratch_path(path))
+            file_name = os.path.basename(path)
+            if old.header != new.header:
+                raise SpliceError(f"{file_name} 的表头有变化")
+            if old.times is None or new.times is None:
+                # 没有时间的输出与数据范围无关，重算结果须与原输出完全一致
+                if (old.times is None) != (new.times is None) or old.lines != new.lines:
+                    raise SpliceError(f"{file_name} 没有 {time_column} 列且内容有变化")
+                spliced[path] = (old.header, old.lines)
+            elif not (old.is_sorted() and new.is_sorted()):
+                raise SpliceError(f"{file_name} 未按时间排序")
+            elif old.select(checkpoint, self.cut) != new.select(checkpoint, self.cut):
+                return False
+            else:
+                spliced[path] = (old.header, old.select("", self.cut) + new.select(self.cut))
+        for path, (header, lines) in spliced.items():
+            write_lines(path, header, lines)
+        return True
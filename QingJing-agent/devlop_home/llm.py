@@ -5,21 +5,122 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
 import json
 import os
+import threading
 import traceback
+import weakref
 from schema import ApiConfig
+from llm_cache import (
+    CacheMissError,
+    cache_modes,
+    get_cache,
+    get_cache_key,
+    refresh_cache,
+)
+from llm_stream import assemble_stream, assemble_stream_async
+from rate_limit import estimate_tokens, get_rate_limiter
 import logger
 
 config_file = "devlop_home/config.json"
+# 设置后覆盖 API 配置中的缓存模式，如离线重跑时设为 replay
+cache_mode_env = "LLM_CACHE_MODE"
+
+# 进程内共享的 OpenAI 客户端，(base_url, api_key) -> OpenAI，复用 HTTP 连接池和 TLS 会话
+clients = {}
+clients_lock = threading.Lock()
+
+
+def get_http_client(api_config: ApiConfig, asynchronous: bool = False) -> dict:
+    """
+    按 API 配置中的连接池参数创建 HTTP 客户端
+
+    :param api_config (ApiConfig): API 配置
+    :param asynchronous (bool): 是否为异步客户端
+    :return dict: 创建 OpenAI 客户端的 http_client 参数；无法导入 httpx（openai 使用其他 HTTP 库）时为空，使用 openai 默认的连接池
+    """
+    try:
+        import httpx
+        from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+    except ImportError:
+        logger.debug("【未安装 httpx，使用 openai 默认的连接池】")
+        return {}
+
+    limits = httpx.Limits(
+        max_connections=api_config.max_connections,
+        max_keepalive_connections=api_config.max_keepalive_connections,
+        keepalive_expiry=api_config.keepalive_expiry,
+    )
+    if asynchronous:
+        return {"http_client": DefaultAsyncHttpxClient(limits=limits)}
+    return {"http_client": DefaultHttpxClient(limits=limits)}
+
+
+def get_client(base_url: str, api_key: str, api_config: ApiConfig):
+    """
+    获取共享的 OpenAI 客户端，不存在时按 API 配置中的连接池参数创建
+
+    :param base_url (str): 接口地址
+    :param api_key (str): API_KEY
+    :param api_config (ApiConfig): API 配置
+    :return OpenAI: 客户端，线程安全
+    """
+    key = (base_url, api_key)
+    client = clients.get(key)
+    if client is not None:
+        return client
+    with clients_lock:
+        if key not in clients:
+            from openai import OpenAI
+
+            clients[key] = OpenAI(
+                base_url=base_url,
+                api_key=api_key,
+                **get_http_client(api_config),
+                # 由 rate_limit 重试单个请求
+                max_retries=0,
+            )
+            logger.debug(f"【创建客户端】{base_url}")
+        return clients[key]
+
+
+# 异步客户端的连接绑定事件循环，事件循环 -> {(base_url, api_key): AsyncOpenAI}
+async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_client(base_url: str, api_key: str, api_config: ApiConfig):
+    """
+    获取当前事件循环中共享的 AsyncOpenAI 客户端，不存在时按 API 配置中的连接池参数创建
+
+    :param base_url (str): 接口地址
+    :param api_key (str): API_KEY
+    :param api_config (ApiConfig): API 配置
+    :return AsyncOpenAI: 客户端
+    """
+    loop_clients = async_clients.setdefault(asyncio.get_running_loop(), {})
+    key = (base_url, api_key)
+    if key not in loop_clients:
+        from openai import AsyncOpenAI
+
+        loop_clients[key] = AsyncOpenAI(
+            base_url=base_url,
+            api_key=api_key,
+            **get_http_client(api_config, asynchronous=True),
+            max_retries=0,
+        )
+        logger.debug(f"【创建异步客户端】{base_url}")
+    return loop_clients[key]
 
 
 class LLM:
     """LLM API类"""
 
-    def __init__(self, config_name: str = "GLM"):
+    def __init__(self, config_name: str = "GLM", api_config: ApiConfig = None):
         self.config_name = config_name
-        self.api_config = LLM.load_api_config(config_name)
+        self.api_config = api_config or LLM.load_api_config(config_name)
+        self._endpoint = None
+        self._client = None
 
     @staticmethod
     def load_api_config(config_name: str = "GLM") -> ApiConfig:
@@ -63,54 +164,227 @@ class LLM:
         else:
             return f"{base_url}/api/paas/v4/"
 
+    def get_endpoint(self) -> tuple[str, str]:
+        """
+        获得接口地址和 API_KEY，首次调用时解析
+        """
+        if self._endpoint is None:
+            if not self.api_config.base_url:
+                raise RuntimeError("通用OpenAI接口配置 需要 base_url 参数")
+
+            if self.api_config.type == "GLM":
+                base_url = LLM.check_glm_base_url() or self.api_config.base_url
+            else:
+                base_url = self.api_config.base_url
+
+            self._endpoint = (base_url, LLM.check_api_key(self.api_config.api_key_env))
+        return self._endpoint
+
+    @property
+    def client(self):
+        """
+        共享的 OpenAI 客户端
+        """
+        if self._client is None:
+            self._client = get_client(*self.get_endpoint(), self.api_config)
+        return self._client
+
+    @property
+    def rate_limiter(self):
+        """
+        接口共享的限流器
+        """
+        return get_rate_limiter(*self.get_endpoint(), self.api_config)
+
+    @property
+    def cache_mode(self) -> str:
+        """
+        回答缓存模式，环境变量 LLM_CACHE_MODE 优先于 API 配置
+        """
+        mode = os.getenv(cache_mode_env) or self.api_config.cache_mode or "live"
+        if mode not in cache_modes:
+            raise ValueError(f"未知的缓存模式 {mode}，可选 {', '.join(cache_modes)}")
+        return mode
+
+    def get_request(self, messages: list[dict], tools: list[dict]) -> dict:
+        """
+        获得请求参数
+        """
+        return {
+            "model": self.api_config.model,
+            "stream": self.api_config.stream,
+            "messages": messages,
+            "tools": tools,
+            "temperature": self.api_config.temperature,
+        }
+
+    def read_cache(
+        self,
+        messages: list[dict],
+        tools: list[dict],
+        stop_after_json: bool = False,
+        refresh: bool = False,
+    ):
+        """
+        读取回答缓存
+
+        :param messages: 对话消息
+        :param tools: 工具
+        :param stop_after_json: 流式回答是否在 JSON 结束后停止
+        :param refresh: 不读取缓存（回放模式下无效），请求后覆盖原有条目
+        :return: 缓存、缓存键和命中的回答；不使用缓存时缓存和缓存键为 None，未命中时回答为 None
+        :raise CacheMissError: 回放模式下未命中
+        """
+        cache_mode = self.cache_mode
+        cache, cache_key = None, None
+        if cache_mode != "live":
+            cache = get_cache(
+                self.api_config.cache_path,
+                self.api_config.cache_ttl,
+                self.api_config.cache_max_entries,
+            )
+            # 提前停止的回答截断了 JSON 之后的内容，与完整的回答分开缓存
+            cache_key = get_cache_key(
+                self.api_config.model,
+                messages,
+                tools,
+                self.api_config.temperature,
+                {"stop_after_json": True}
+                if stop_after_json and self.api_config.stream
+                else None,
+            )
+            refresh = (refresh or refresh_cache.get()) and cache_mode != "replay"
+            cached = None if refresh else cache.get(cache_key)
+            if cached is not None:
+                from openai.types.chat import ChatCompletion
+
+                logger.trace("【缓存命中】", cache_key)
+                return cache, cache_key, ChatCompletion.model_validate_json(cached)
+        if cache_mode == "replay":
+            raise CacheMissError(f"回放模式下缓存未命中: {cache_key}")
+        return cache, cache_key, None
+
+    def handle_response(self, response, cache, cache_key: str):
+        """
+        记录回答结果并写入缓存
+        """
+        logger.trace("【回答结果】", str(response))
+
+        if response.choices[0].finish_reason == "length":
+            # 截断的回答无法解析，不写入缓存，重试时重新请求
+            logger.warning("【回答长度过长】")
+        elif cache is not None:
+            cache.put(cache_key, response.model_dump_json())
+
+        return response
+
     def ask(
         self,
         messages: list[dict],
         tools: list[dict] = [],
+        stop_after_json: bool = False,
+        refresh: bool = False,
     ):
         """
         获得对话结果
 
         :param messages: 对话消息
         :param tools: 工具
-        :param model: 模型
-        :return: 对话结果
+        :param stop_after_json: 流式回答中出现完整的 JSON 后停止读取，用于只需要一个 JSON 的请求，提供工具时无效
+        :param refresh: 不读取回答缓存，用于回答解析失败后的重试
+        :return: 对话结果，流式回答拼装为与非流式相同的结构
         """
-        model = self.api_config.model
-        temperature = self.api_config.temperature
-        stream = self.api_config.stream
         try:
-            from openai import OpenAI
+            # 可能调用工具时，工具调用的增量可能在 JSON 文本之后，不能提前停止
+            stop_after_json = stop_after_json and not tools
+            cache, cache_key, cached = self.read_cache(
+                messages, tools, stop_after_json, refresh
+            )
+            if cached is not None:
+                return cached
 
-            if not self.api_config.base_url:
-                raise RuntimeError("通用OpenAI接口配置 需要 base_url 参数")
+            client = self.client
 
-            if self.api_config.type == "GLM":
-                base_url = LLM.check_glm_base_url() or self.api_config.base_url
-            else:
-                base_url = self.api_config.base_url
+            logger.trace("【请求回答】", str(messages), "【工具】", str(tools))
 
-            client = OpenAI(
-                base_url=base_url,
-                api_key=LLM.check_api_key(self.api_config.api_key_env),
-            )
+            request = self.get_request(messages, tools)
 
-            logger.trace("【请求回答】", str(messages), "【工具】", str(tools))
+            def send():
+                response = client.chat.completions.create(**request)
+                if request["stream"]:
+                    response = assemble_stream(response, stop_after_json)
+                return response
 
-            response = client.chat.completions.create(
-                model=model,
-                stream=stream,
-                messages=messages,
-                tools=tools,
-                temperature=temperature,
+            response = self.rate_limiter.call(send, estimate_tokens(messages, tools))
+            return self.handle_response(response, cache, cache_key)
+        except Exception as e:
+            logger.error(f"【请求回答出错】: {e}\n{traceback.format_exc()}")
+            raise e
+
+
+class AsyncLLM(LLM):
+    """异步 LLM API类，同一事件循环中的所有请求共享并发数上限"""
+
+    # 同时进行的请求数上限
+    max_concurrency = 100
+    # 事件循环 -> 信号量
+    semaphores = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get_semaphore(cls) -> asyncio.Semaphore:
+        """
+        获得当前事件循环的全局信号量
+        """
+        loop = asyncio.get_running_loop()
+        if loop not in cls.semaphores:
+            cls.semaphores[loop] = asyncio.Semaphore(cls.max_concurrency)
+        return cls.semaphores[loop]
+
+    async def ask(
+        self,
+        messages: list[dict],
+        tools: list[dict] = [],
+        stop_after_json: bool = False,
+        refresh: bool = False,
+    ):
+        """
+        获得对话结果
+
+        :param messages: 对话消息
+        :param tools: 工具
+        :param stop_after_json: 流式回答中出现完整的 JSON 后停止读取
+        :param refresh: 不读取回答缓存
+        :return: 对话结果
+        """
+        try:
+            # 可能调用工具时，工具调用的增量可能在 JSON 文本之后，不能提前停止
+            stop_after_json = stop_after_json and not tools
+            # SQLite 读写可能等待锁，在线程中执行，不阻塞事件循环
+            cache, cache_key, cached = await asyncio.to_thread(
+                self.read_cache, messages, tools, stop_after_json, refresh
             )
+            if cached is not None:
+                return cached
+
+            client = get_async_client(*self.get_endpoint(), self.api_config)
 
-            logger.trace("【回答结果】", str(response))
+            logger.trace("【请求回答】", str(messages), "【工具】", str(tools))
+
+            request = self.get_request(messages, tools)
 
-            if response.choices[0].finish_reason == "length":
-                logger.warning("【回答长度过长】")
+            async def send():
+                response = await client.chat.completions.create(**request)
+                if request["stream"]:
+                    response = await assemble_stream_async(response, stop_after_json)
+                return response
 
-            return response
+            async with AsyncLLM.get_semaphore():
+                response = await self.rate_limiter.call_async(
+                    send, estimate_tokens(messages, tools)
+                )
+            return await asyncio.to_thread(
+                self.handle_response, response, cache, cache_key
+            )
         except Exception as e:
             logger.error(f"【请求回答出错】: {e}\n{traceback.format_exc()}")
             raise e
@@ -0,0 +1,176 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+LLM 回答缓存
+
+以 (模型, 消息, 工具, 温度) 的哈希为键，将回答的 JSON 保存在 SQLite 中。运行模式：
+
+- live：不使用缓存，始终请求接口
+- record：命中缓存时直接返回，否则请求接口并写入缓存
+- replay：只读取缓存，未命中时报错，用于离线重跑整个流程
+
+回答解析失败后的重试应设置 refresh_cache（或向 LLM.ask 传入 refresh=True），不读取缓存并覆盖原有条目，
+否则记录模式下重试只会得到同一个错误的回答。
+"""
+
+import contextvars
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+cache_modes = ("live", "record", "replay")
+
+# 为 True 时不读取缓存，请求接口后覆盖原有条目；回放模式下无效
+refresh_cache = contextvars.ContextVar("refresh_cache", default=False)
+
+
+class CacheMissError(RuntimeError):
+    """回放模式下缓存未命中"""
+
+
+def get_cache_key(
+    model: str, messages: list, tools: list, temperature, options: dict = None
+) -> str:
+    """
+    计算请求的缓存键
+
+    :param model (str): 模型
+    :param messages (list): 对话消息
+    :param tools (list): 工具
+    :param temperature (float): 温度
+    :param options (dict): 影响回答内容的其他选项，如流式回答提前停止
+    :return str: 请求内容的 SHA-256
+    """
+    request = {
+        "model": model,
+        "messages": messages,
+        "tools": tools,
+        "temperature": temperature,
+    }
+    if options:
+        request["options"] = options
+    payload = json.dumps(
+        request,
+        ensure_ascii=False,
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """
+    SQLite 存储的回答缓存，线程安全
+
+    :param path (str): 数据库文件路径
+    :param ttl (float): 缓存有效期（秒），为 None 时不过期
+    :param max_entries (int): 最多保留的条目数，超出时淘汰最久未使用的条目，为 None 时不限
+    """
+
+    def __init__(
+        self, path: str, ttl: Optional[float] = None, max_entries: Optional[int] = None
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self.lock, self.connection:
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+        self.evict()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        读取缓存
+
+        :param key (str): 缓存键
+        :return str: 回答的 JSON，未命中或已过期时返回 None
+        """
+        now = time.time()
+        with self.lock, self.connection:
+            row = self.connection.execute(
+                "SELECT value, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and now - row[1] > self.ttl:
+                self.connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self.connection.execute(
+                "UPDATE responses SET accessed = ? WHERE key = ?", (now, key)
+            )
+            return row[0]
+
+    def put(self, key: str, value: str):
+        """
+        写入缓存，超出条目数时淘汰最久未使用的条目
+
+        :param key (str): 缓存键
+        :param value (str): 回答的 JSON
+        """
+        now = time.time()
+        with self.lock, self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict_overflow()
+
+    def evict(self):
+        """删除过期和超出条目数的缓存"""
+        with self.lock, self.connection:
+            if self.ttl is not None:
+                self.connection.execute(
+                    "DELETE FROM responses WHERE created < ?", (time.time() - self.ttl,)
+                )
+            self._evict_overflow()
+
+    def _evict_overflow(self):
+        if self.max_entries is None:
+            return
+        self.connection.execute(
+            "DELETE FROM responses WHERE key IN ("
+            "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,),
+        )
+
+
+# 进程内共享的缓存，数据库文件路径 -> LLMCache
+caches = {}
+caches_lock = threading.Lock()
+
+
+def get_cache(
+    path: str, ttl: Optional[float] = None, max_entries: Optional[int] = None
+) -> LLMCache:
+    """
+    获取共享的回答缓存，不存在时创建
+
+    :param path (str): 数据库文件路径
+    :param ttl (float): 缓存有效期（秒）
+    :param max_entries (int): 最多保留的条目数
+    :return LLMCache: 回答缓存
+    """
+    with caches_lock:
+        if path not in caches:
+            caches[path] = LLMCache(path, ttl, max_entries)
+        return caches[path]
@@ -0,0 +1,235 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+流式回答
+
+将流式返回的增量（文本和工具调用）拼装为与非流式相同的 ChatCompletion。
+可选在回答开头的 JSON（对象或数组）完整后停止读取，省去推理模型在 JSON 之后输出的多余内容；
+JSON 之前有其他内容或已开始返回工具调用时不提前停止。
+"""
+
+import json
+from typing import Optional
+
+think_end = "</think>"
+json_fence = "```json"
+
+
+class JsonDetector:
+    """
+    逐段扫描文本，找到回答开头的完整 JSON 对象或数组
+
+    与 utils.parse_res 一致，JSON 之前只允许空白、<think>...</think> 和 ```json；
+    JSON 之前有其他内容、开头的值无法解析或为空的 {}、[] 时不再检测，读取完整的回答
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.position = 0
+        self.start = None
+        self.depth = 0
+        self.in_string = False
+        self.escaped = False
+        # 以 <think> 开头时跳过思考过程
+        self.thinking = None
+        self.fenced = False
+        self.disabled = False
+
+    def feed(self, delta: str) -> Optional[int]:
+        """
+        追加文本
+
+        :param delta (str): 新的文本
+        :return int: 找到完整的 JSON 时返回其在全文中的结束位置（不含），否则返回 None
+        """
+        if self.disabled:
+            return None
+        self.text += delta
+        if self.start is None and not self._find_start():
+            return None
+
+        while self.position < len(self.text):
+            char = self.text[self.position]
+            self.position += 1
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        value = json.loads(self.text[self.start : self.position])
+                    except ValueError:
+                        value = None
+                    # 空的 {}、[] 可能只是正文的开头，不据此停止
+                    if not value:
+                        self.disabled = True
+                        return None
+                    return self.position
+        return None
+
+    def _find_start(self) -> bool:
+        """
+        跳过开头的空白、思考过程和 ```json，定位 JSON 的起始位置
+
+        :return bool: 是否已找到 JSON 的起始位置；开头为其他内容时停止检测
+        """
+        if self.thinking is None:
+            stripped = self.text.lstrip()
+            if "<think>".startswith(stripped):
+                return False
+            self.thinking = stripped.startswith("<think>")
+        if self.thinking:
+            index = self.text.find(think_end)
+            if index == -1:
+                return False
+            self.thinking = False
+            self.position = index + len(think_end)
+
+        rest = self.text[self.position :].lstrip()
+        if not self.fenced and rest.startswith(json_fence):
+            self.fenced = True
+            self.position = len(self.text) - len(rest) + len(json_fence)
+            rest = self.text[self.position :].lstrip()
+        if not rest or (not self.fenced and json_fence.startswith(rest)):
+            return False
+        if rest[0] not in "{[":
+            self.disabled = True
+            return False
+        self.start = len(self.text) - len(rest)
+        self.position, self.depth = self.start + 1, 1
+        return True
+
+
+class StreamAssembler:
+    """
+    拼装流式返回的增量
+
+    :param stop_after_json (bool): 回答开头的 JSON 完整后是否停止读取
+    """
+
+    def __init__(self, stop_after_json: bool = False):
+        self.detector = JsonDetector() if stop_after_json else None
+        self.id = ""
+        self.model = ""
+        self.created = 0
+        self.role = "assistant"
+        self.content = ""
+        self.tool_calls = {}
+        self.finish_reason = None
+        self.usage = None
+
+    def add(self, chunk) -> bool:
+        """
+        追加一个增量
+
+        :param chunk (ChatCompletionChunk): 增量
+        :return bool: 是否可以停止读取
+        """
+        self.id = chunk.id or self.id
+        self.model = chunk.model or self.model
+        self.created = chunk.created or self.created
+        if getattr(chunk, "usage", None) is not None:
+            self.usage = chunk.usage.model_dump()
+        if not chunk.choices:
+            return False
+        choice = chunk.choices[0]
+        delta = choice.delta
+        if choice.finish_reason:
+            self.finish_reason = choice.finish_reason
+        if delta is None:
+            return False
+        self.role = delta.role or self.role
+        for tool_call in delta.tool_calls or []:
+            call = self.tool_calls.setdefault(
+                tool_call.index,
+                {"id": "", "type": "function", "function": {"name": "", "arguments": ""}},
+            )
+            call["id"] = tool_call.id or call["id"]
+            call["type"] = tool_call.type or call["type"]
+            if tool_call.function is not None:
+                call["function"]["name"] += tool_call.function.name or ""
+                call["function"]["arguments"] += tool_call.function.arguments or ""
+        if delta.content:
+            self.content += delta.content
+            if self.detector is not None and not self.tool_calls:
+                end = self.detector.feed(delta.content)
+                if end is not None:
+                    self.content = self.content[:end]
+                    self.finish_reason = "stop"
+                    return True
+        return False
+
+    def to_completion(self):
+        """
+        拼装为 ChatCompletion
+        """
+        from openai.types.chat import ChatCompletion
+
+        tool_calls = [self.tool_calls[index] for index in sorted(self.tool_calls)]
+        return ChatCompletion.model_validate(
+            {
+                "id": self.id,
+                "object": "chat.completion",
+                "created": self.created,
+                "model": self.model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": self.finish_reason
+                        or ("tool_calls" if tool_calls else "stop"),
+                        "message": {
+                            "role": self.role,
+                            "content": self.content or None,
+                            "tool_calls": tool_calls or None,
+                        },
+                    }
+                ],
+                "usage": self.usage,
+            }
+        )
+
+
+def assemble_stream(stream, stop_after_json: bool = False):
+    """
+    读取流式回答并拼装为 ChatCompletion，提前停止时关闭连接
+
+    :param stream (Stream): 流式回答
+    :param stop_after_json (bool): 文本中出现完整的 JSON 后是否停止读取
+    :return ChatCompletion: 回答
+    """
+    assembler = StreamAssembler(stop_after_json)
+    try:
+        for chunk in stream:
+            if assembler.add(chunk):
+                break
+    finally:
+        stream.close()
+    return assembler.to_completion()
+
+
+async def assemble_stream_async(stream, stop_after_json: bool = False):
+    """
+    读取流式回答并拼装为 ChatCompletion（异步）
+    """
+    assembler = StreamAssembler(stop_after_json)
+    try:
+        async for chunk in stream:
+            if assembler.add(chunk):
+                break
+    finally:
+        await stream.close()
+    return assembler.to_completion()
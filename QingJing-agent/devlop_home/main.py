@@ -5,6 +5,7 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
 import json
 import concurrent.futures as cf
 import os
@@ -14,7 +15,7 @@ import time
 from schema import VoteResult
 import logger
 import utils
-from agent.start import process_one
+from agent.start import process_all_async, process_one
 
 result_dir = "devlop_output/results"
 solution_dir = "devlop_output/solutions"
@@ -73,17 +74,23 @@ def main():
         f"【输出文件】: {out_path}",
     )
 
+    def save_result(single_res):
+        if isinstance(single_res, VoteResult):
+            vote_result_list.append(single_res)
+            submit_result_list.append(single_res.to_submit_json())
+        else:
+            submit_result_list.append(single_res)
+        utils.save_submit_result(submit_result_list, out_path)
+        utils.save_solutions(vote_result_list, solution_path)
+
+    if utils.module_config.enable_async:
+        asyncio.run(process_all_async(question_list, save_result))
+        return
+
     with cf.ThreadPoolExecutor(max_workers=20) as executor:
         future_list = [executor.submit(process_one, item) for item in question_list]
         for future in cf.as_completed(future_list):
-            single_res = future.result()
-            if isinstance(single_res, VoteResult):
-                vote_result_list.append(single_res)
-                submit_result_list.append(single_res.to_submit_json())
-            else:
-                submit_result_list.append(single_res)
-            utils.save_submit_result(submit_result_list, out_path)
-            utils.save_solutions(vote_result_list, solution_path)
+            save_result(future.result())
 
 
 if __name__ == "__main__":
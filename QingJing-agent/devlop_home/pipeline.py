@@ -0,0 +1,644 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+数据预处理流水线
+
+data_process.py（由 data_process.ipynb 导出）按单元格划分为若干阶段，阶段的第一个单元格以如下注释开头：
+
+    # 【阶段】A架关键动作
+    # 【输入】["Ajia_plc_1.csv", "devlop_home/manual/stages.json"]
+    # 【输出】["Ajia_plc_1.csv", table_name_map["Ajia_plc_1.csv"]]
+
+- 输入、输出为 Python 表达式，在公共单元格（第一个阶段之前的单元格）执行后的命名空间中求值
+- 不含目录的文件名位于 output_data_path 下，其他路径相对于运行目录
+- 输入支持通配符：不含目录时匹配之前阶段产生的文件，含目录时匹配磁盘上的文件
+- 输出可以是目录（如列式缓存 `.columnar`），按目录下所有文件的相对路径和内容整体保存版本
+- 没有标记的单元格属于前一个阶段，以 `# 【收尾】` 开头的单元格在所有阶段之后执行
+
+阶段的缓存键为阶段代码、公共代码、阶段导入的本地模块源码、数据配置和输入文件内容的哈希。
+缓存键不变且输出完好的阶段直接跳过；每个阶段输出的每个版本按内容哈希保存在
+`<output_data_path>/.pipeline/objects/`，重新运行中间阶段时先将输入还原为上游阶段输出的版本，
+运行结束后所有文件还原为最后一个阶段输出的版本。内容不变的输出保留原 mtime，数据表缓存不会失效。
+
+每次运行阶段时同时保存输入的版本。使用 --incremental 时，代码未变化、输入只在某一时间之后有变化
+（如追加了新导出的传感器数据）的阶段从该时间之前的检查点重新计算，与原输出拼接（见 incremental.py），
+无法拼接的阶段（如输出没有 csvTime 列的每日汇总）完整运行。
+
+读写同一文件（至少一方写）的阶段按声明顺序依赖，其余阶段互不依赖：需要运行的阶段在依赖的阶段完成后
+提交到进程池（spawn，子进程重新执行公共单元格），因此阶段只能使用公共单元格和自身定义的变量。
+
+直接运行 data_process.py 仍按顺序执行全部单元格。用法（在 QingJing-agent 目录下）：
+
+    python devlop_home/pipeline.py                     运行代码或输入有变化的阶段
+    python devlop_home/pipeline.py --list              查看各阶段是否需要运行
+    python devlop_home/pipeline.py --force 折臂吊车关键动作  强制运行指定阶段（不指定时运行全部阶段）
+    python devlop_home/pipeline.py --jobs 1            在同一进程中依次运行（便于调试）
+    python devlop_home/pipeline.py --incremental       追加新数据后增量运行
+"""
+
+import argparse
+import fnmatch
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import logger
+from incremental import IncrementalJob, get_change_time
+
+module_dir = os.path.dirname(os.path.abspath(__file__))
+script_file = os.path.join(module_dir, "data_process.py")
+
+cache_dir_name = ".pipeline"
+manifest_file_name = "manifest.json"
+objects_dir_name = "objects"
+scratch_dir_name = "incremental"
+
+cell_separator = re.compile(r"^# In\[ \]:\n", re.M)
+stage_marker = "# 【阶段】"
+inputs_marker = "# 【输入】"
+outputs_marker = "# 【输出】"
+epilogue_marker = "# 【收尾】"
+import_pattern = re.compile(r"^\s*(?:from|import)\s+([A-Za-z_]\w*)", re.M)
+
+
+class Cell:
+    """data_process.py 中的一个单元格"""
+
+    def __init__(self, source: str, line_number: int):
+        self.source = source
+        # 单元格在 data_process.py 中的起始行号，用于异常堆栈定位
+        self.line_number = line_number
+
+    def header(self, marker: str):
+        """获取单元格开头的标记内容，不存在时返回 None"""
+        for line in self.source.lstrip("\n").splitlines():
+            if not line.startswith("# 【"):
+                break
+            if line.startswith(marker):
+                return line[len(marker) :].strip()
+        return None
+
+    def run(self, namespace: dict):
+        code = compile(
+            "\n" * (self.line_number - 1) + self.source, script_file, "exec"
+        )
+        exec(code, namespace)
+
+
+class Stage:
+    """预处理阶段：若干连续的单元格及其声明的输入、输出"""
+
+    def __init__(self, name: str, inputs: str, outputs: str):
+        self.name = name
+        self.inputs_expr = inputs
+        self.outputs_expr = outputs
+        self.cells: list[Cell] = []
+
+    @property
+    def source(self) -> str:
+        return "".join(cell.source for cell in self.cells)
+
+    def run(self, namespace: dict):
+        for cell in self.cells:
+            cell.run(namespace)
+
+
+def split_cells(script: str) -> list[Cell]:
+    """按 `# In[ ]:` 将导出的脚本拆分为单元格"""
+    cells = []
+    positions = [0] + [match.end() for match in cell_separator.finditer(script)]
+    for start, end in zip(positions, positions[1:] + [len(script)]):
+        source = script[start:end]
+        source = cell_separator.sub("", source)
+        if start == 0 or not source.strip():
+            continue
+        cells.append(Cell(source, script.count("\n", 0, start) + 1))
+    return cells
+
+
+def parse_stages(script: str):
+    """
+    解析 data_process.py 的阶段
+
+    :param script (str): data_process.py 的内容
+    :return tuple[list[Cell], list[Stage], list[Cell]]: 公共单元格、阶段、收尾单元格
+    """
+    prelude, stages, epilogue = [], [], []
+    for cell in split_cells(script):
+        name = cell.header(stage_marker)
+        if cell.header(epilogue_marker) is not None:
+            epilogue.append(cell)
+        elif name is not None:
+            stage = Stage(
+                name, cell.header(inputs_marker) or "[]", cell.header(outputs_marker) or "[]"
+            )
+            stage.cells.append(cell)
+            stages.append(stage)
+        elif epilogue:
+            epilogue.append(cell)
+        elif stages:
+            stages[-1].cells.append(cell)
+        else:
+            prelude.append(cell)
+    names = [stage.name for stage in stages]
+    duplicated = {name for name in names if names.count(name) > 1}
+    if duplicated:
+        raise ValueError(f"阶段名称重复: {', '.join(sorted(duplicated))}")
+    return prelude, stages, epilogue
+
+
+def get_local_sources(source: str) -> dict[str, str]:
+    """获取代码（递归）导入的 devlop_home 下本地模块的源码"""
+    sources = {}
+    pending = import_pattern.findall(source)
+    while pending:
+        name = pending.pop()
+        path = os.path.join(module_dir, f"{name}.py")
+        if name in sources or not os.path.isfile(path):
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            sources[name] = f.read()
+        pending += import_pattern.findall(sources[name])
+    return dict(sorted(sources.items()))
+
+
+def hash_text(*parts) -> str:
+    return hashlib.sha256(
+        json.dumps(parts, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class StagePlan:
+    """阶段解析后的输入、输出和依赖的阶段"""
+
+    def __init__(self, stage: Stage, inputs: list[str], outputs: list[str]):
+        self.stage = stage
+        self.inputs = inputs
+        self.outputs = outputs
+        self.dependencies: set[str] = set()
+
+    def conflicts_with(self, other: "StagePlan") -> bool:
+        """两个阶段读写同一文件（至少一方写）时不能同时运行"""
+        files = set(self.inputs) | set(self.outputs)
+        return bool(
+            set(other.outputs) & files or set(other.inputs) & set(self.outputs)
+        )
+
+
+def load_script(script_path: str):
+    with open(script_path, "r", encoding="utf-8") as f:
+        return parse_stages(f.read())
+
+
+def run_prelude(prelude: list[Cell]) -> dict:
+    """执行公共单元格，返回命名空间"""
+    namespace = {"__name__": "data_process"}
+    for cell in prelude:
+        cell.run(namespace)
+    return namespace
+
+
+# 已执行过公共单元格的命名空间（主进程依次运行时为主进程的命名空间）
+_worker_namespaces: dict[str, dict] = {}
+
+
+def run_stage(script_path: str, stage_name: str, log_file_path: str, job: IncrementalJob = None):
+    """
+    在子进程中运行单个阶段
+
+    :param script_path (str): data_process.py 路径
+    :param stage_name (str): 阶段名称
+    :param log_file_path (str): 主进程的日志文件
+    :param job (IncrementalJob): 增量运行的参数，为 None 或增量运行失败时完整运行
+    :return bool: 是否为增量运行
+    """
+    prelude, stages, _ = load_script(script_path)
+    namespace = _worker_namespaces.get(script_path)
+    if namespace is None:
+        # 与主进程写入同一个日志文件，公共单元格中的 logger.init() 不再新建日志文件
+        init, logger.init = logger.init, lambda *args, **kwargs: None
+        logger.log_file_path = log_file_path
+        try:
+            namespace = run_prelude(prelude)
+        finally:
+            logger.init = init
+        _worker_namespaces[script_path] = namespace
+    stage = next(stage for stage in stages if stage.name == stage_name)
+    if job is not None and job.run(stage, namespace):
+        return True
+    stage.run(dict(namespace))
+    return False
+
+
+class Pipeline:
+    """按阶段运行 data_process.py，跳过代码和输入均未变化的阶段，互不依赖的阶段在进程池中并行运行"""
+
+    def __init__(self, script_path: str = script_file):
+        self.script_path = script_path
+        self.prelude, self.stages, self.epilogue = load_script(script_path)
+        self.namespace = run_prelude(self.prelude)
+
+        self.output_path = self.namespace["output_path"]
+        self.cache_dir = os.path.join(self.output_path, cache_dir_name)
+        self.objects_dir = os.path.join(self.cache_dir, objects_dir_name)
+        self.manifest_path = os.path.join(self.cache_dir, manifest_file_name)
+        self.manifest = self._load_manifest()
+        # 各文件在当前阶段之前应有的版本（内容哈希，None 表示不存在）
+        self.versions: dict[str, str | None] = {}
+
+    def resolve(self, name: str) -> str:
+        """将声明中的文件名解析为路径"""
+        if os.path.dirname(name):
+            return os.path.normpath(name)
+        return os.path.normpath(os.path.join(self.output_path, name))
+
+    def get_outputs(self, stage: Stage) -> list[str]:
+        return [self.resolve(name) for name in eval(stage.outputs_expr, self.namespace)]
+
+    def get_inputs(self, stage: Stage, known: list[str], outputs: list[str]) -> list[str]:
+        """
+        解析阶段的输入
+
+        :param stage (Stage): 阶段
+        :param known (list[str]): 之前阶段输出的文件，不含目录的通配符在其中匹配
+        :param outputs (list[str]): 阶段的输出，不参与通配符匹配
+        :return list[str]: 输入文件路径
+        """
+        inputs = []
+        for name in eval(stage.inputs_expr, self.namespace):
+            if not glob.has_magic(name):
+                inputs.append(self.resolve(name))
+            elif os.path.dirname(name):
+                inputs += [os.path.normpath(path) for path in glob.glob(name)]
+            else:
+                inputs += [
+                    path
+                    for path in known
+                    if fnmatch.fnmatch(os.path.basename(path), name)
+                    and path not in outputs
+                ]
+        return sorted(set(inputs))
+
+    def plan(self) -> list[StagePlan]:
+        """解析各阶段的输入、输出，读写同一文件的阶段按声明顺序依赖"""
+        plans, known = [], []
+        for stage in self.stages:
+            outputs = self.get_outputs(stage)
+            plan = StagePlan(stage, self.get_inputs(stage, known, outputs), outputs)
+            plan.dependencies = {
+                previous.stage.name
+                for previous in plans
+                if plan.conflicts_with(previous)
+            }
+            plans.append(plan)
+            known += outputs
+        return plans
+
+    def get_code_key(self, stage: Stage) -> str:
+        """阶段代码的哈希，不含输入"""
+        prelude_source = "".join(cell.source for cell in self.prelude)
+        return hash_text(
+            prelude_source,
+            stage.source,
+            get_local_sources(prelude_source + stage.source),
+            self.namespace.get("config"),
+        )
+
+    def get_key(self, stage: Stage, inputs: list[str]) -> str:
+        """阶段的缓存键"""
+        return hash_text(
+            self.get_code_key(stage), [(path, self.get_version(path)) for path in inputs]
+        )
+
+    def get_version(self, path: str):
+        """文件在当前阶段之前应有的版本，未被之前阶段输出的文件取磁盘上的内容"""
+        if path not in self.versions:
+            self.versions[path] = self.hash_file(path)
+        return self.versions[path]
+
+    def is_cached(self, stage: Stage, key: str) -> bool:
+        record = self.manifest["stages"].get(stage.name)
+        return (
+            record is not None
+            and record["key"] == key
+            and all(
+                sha is None or os.path.exists(self.get_object_path(sha))
+                for sha in record["outputs"].values()
+            )
+        )
+
+    def prepare_incremental(self, plan: StagePlan):
+        """
+        判断阶段能否增量运行：代码未变化，变化的输入均为含 csvTime 列的 CSV 文件，上次运行的输入、输出版本完好，
+        输入、输出所在目录在命名空间中有对应的变量
+
+        :param plan (StagePlan): 阶段，输入已还原为本次运行的版本
+        :return IncrementalJob: 增量运行的参数，不能增量运行时返回 None
+        """
+        record = self.manifest["stages"].get(plan.stage.name)
+        if (
+            record is None
+            or record.get("code") != self.get_code_key(plan.stage)
+            or not plan.outputs
+            or set(plan.outputs) - set(record["outputs"])
+            or set(plan.inputs) - set(record.get("inputs", {}))
+        ):
+            return None
+        outputs = {path: record["outputs"][path] for path in plan.outputs}
+        if not all(
+            sha is not None and os.path.exists(self.get_object_path(sha))
+            for sha in outputs.values()
+        ):
+            return None
+
+        cut = None
+        for path in plan.inputs:
+            old_sha, sha = record["inputs"][path], self.get_version(path)
+            if old_sha == sha:
+                continue
+            if old_sha is None or sha is None or not os.path.exists(self.get_object_path(old_sha)):
+                return None
+            change_time = get_change_time(self.get_object_path(old_sha), path)
+            if change_time is None:
+                return None
+            if change_time:
+                cut = min(cut or change_time[:10], change_time[:10])
+        if cut is None:
+            return None
+
+        directories = {}
+        for path in plan.outputs + [path for path in plan.inputs if path.endswith(".csv")]:
+            directory = os.path.dirname(path)
+            names = [
+                name
+                for name, value in self.namespace.items()
+                if isinstance(value, str) and value and os.path.normpath(value) == directory
+            ]
+            if not names:
+                return None
+            directories[directory] = names
+        logger.info(f"【流水线】{plan.stage.name}：输入自 {cut} 起有变化")
+        return IncrementalJob(
+            cut,
+            plan.inputs,
+            {path: self.get_object_path(sha) for path, sha in outputs.items()},
+            directories,
+            os.path.join(self.cache_dir, scratch_dir_name, plan.stage.name),
+        )
+
+    def run(self, force=None, dry_run=False, jobs=None, incremental=False):
+        """
+        运行流水线
+
+        :param force (list[str]): 强制运行的阶段，空列表表示全部阶段，None 表示不强制
+        :param dry_run (bool): 只输出各阶段是否需要运行
+        :param jobs (int): 并行运行的阶段数，为 1 时在当前进程中依次运行，默认为 CPU 核数
+        :param incremental (bool): 输入只在某一时间之后有变化的阶段从该时间之前的检查点增量运行，见 incremental.py
+        """
+        names = [stage.name for stage in self.stages]
+        unknown = [name for name in force or [] if name not in names]
+        if unknown:
+            raise ValueError(f"未知的阶段: {', '.join(unknown)}，可选阶段: {', '.join(names)}")
+
+        start_time = time.time()
+        jobs = jobs or os.cpu_count() or 1
+        executor = None
+        if jobs > 1 and not dry_run:
+            executor = ProcessPoolExecutor(
+                max_workers=min(jobs, len(self.stages)),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        pending = self.plan()
+        done: set[str] = set()
+        running = {}
+        try:
+            while pending or running:
+                ready = [plan for plan in pending if plan.dependencies <= done]
+                for plan in ready:
+                    pending.remove(plan)
+                    stage = plan.stage
+                    key = self.get_key(stage, plan.inputs)
+                    forced = force is not None and (not force or stage.name in force)
+                    if not forced and self.is_cached(stage, key):
+                        logger.info(f"【流水线】{stage.name}：未变化，跳过")
+                        self.versions.update(self.manifest["stages"][stage.name]["outputs"])
+                        done.add(stage.name)
+                        continue
+                    if dry_run:
+                        logger.special(f"【流水线】{stage.name}：需要运行")
+                        # 之后的阶段无法在不运行的情况下判断输入是否变化
+                        for path in plan.outputs:
+                            self.versions[path] = f"pending:{stage.name}"
+                        done.add(stage.name)
+                        continue
+
+                    logger.special(f"【流水线】{stage.name}：开始运行")
+                    for path in plan.inputs:
+                        self.materialize(path, self.get_version(path))
+                    # 记录本次运行的输入版本，之后的增量运行据此定位变化
+                    inputs = {path: self.store(path) for path in plan.inputs}
+                    job = None
+                    if incremental and not forced:
+                        job = self.prepare_incremental(plan)
+                    args = (self.script_path, stage.name, logger.log_file_path, job)
+                    if executor is None:
+                        stage_start_time = time.time()
+                        _worker_namespaces[self.script_path] = self.namespace
+                        run_stage(*args)
+                        self.finish(plan, key, inputs, stage_start_time)
+                        done.add(stage.name)
+                    else:
+                        future = executor.submit(run_stage, *args)
+                        running[future] = (plan, key, inputs, time.time())
+                if ready:
+                    # 跳过的阶段可能使更多阶段就绪
+                    continue
+                if not running:
+                    break
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    plan, key, inputs, stage_start_time = running.pop(future)
+                    future.result()
+                    self.finish(plan, key, inputs, stage_start_time)
+                    done.add(plan.stage.name)
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+
+        if dry_run:
+            return
+        for path, sha in self.versions.items():
+            if sha is not None and os.path.exists(self.get_object_path(sha)):
+                self.materialize(path, sha)
+        self._prune_objects()
+        shutil.rmtree(os.path.join(self.cache_dir, scratch_dir_name), ignore_errors=True)
+        self._save_manifest()
+        for cell in self.epilogue:
+            cell.run(self.namespace)
+        logger.success(f"【流水线】全部阶段完成，耗时 {(time.time() - start_time) / 60:.2f} 分钟")
+
+    def finish(self, plan: StagePlan, key: str, inputs: dict, stage_start_time: float):
+        """保存运行完成的阶段的输出"""
+        outputs = {path: self.store(path) for path in plan.outputs}
+        self.versions.update(outputs)
+        self.manifest["stages"][plan.stage.name] = {
+            "key": key,
+            "code": self.get_code_key(plan.stage),
+            "inputs": inputs,
+            "outputs": outputs,
+        }
+        self._save_manifest()
+        logger.success(
+            f"【流水线】{plan.stage.name}：运行完成，耗时 {time.time() - stage_start_time:.1f} 秒"
+        )
+
+    def hash_file(self, path: str):
+        """计算文件内容的哈希，mtime 和大小未变时复用上次结果；目录为其下所有文件的相对路径和哈希的哈希"""
+        if os.path.isdir(path):
+            return hash_text(
+                [
+                    (os.path.relpath(file_path, path), self.hash_file(file_path))
+                    for file_path in sorted(
+                        os.path.join(root, file_name)
+                        for root, _, file_names in os.walk(path)
+                        for file_name in file_names
+                    )
+                ]
+            )
+        if not os.path.isfile(path):
+            return None
+        stat = os.stat(path)
+        cached = self.manifest["files"].get(path)
+        if cached is not None and cached[:2] == [stat.st_mtime_ns, stat.st_size]:
+            return cached[2]
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        self.manifest["files"][path] = [stat.st_mtime_ns, stat.st_size, sha.hexdigest()]
+        return sha.hexdigest()
+
+    def get_object_path(self, sha: str) -> str:
+        return os.path.join(self.objects_dir, sha)
+
+    def store(self, path: str):
+        """保存文件的当前版本，返回内容哈希"""
+        sha = self.hash_file(path)
+        if sha is None:
+            return None
+        object_path = self.get_object_path(sha)
+        if os.path.isdir(path):
+            if not os.path.exists(object_path):
+                os.makedirs(self.objects_dir, exist_ok=True)
+                tmp_path = f"{object_path}.tmp{os.getpid()}"
+                shutil.rmtree(tmp_path, ignore_errors=True)
+                shutil.copytree(path, tmp_path)
+                os.replace(tmp_path, object_path)
+        elif os.path.exists(object_path):
+            # 内容未变时恢复原 mtime，依赖 mtime 的缓存（列式缓存、事件索引等）保持有效
+            object_stat = os.stat(object_path)
+            os.utime(path, ns=(object_stat.st_atime_ns, object_stat.st_mtime_ns))
+            self.hash_file(path)
+        else:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            tmp_path = f"{object_path}.tmp{os.getpid()}"
+            shutil.copy2(path, tmp_path)
+            os.replace(tmp_path, object_path)
+        return sha
+
+    def materialize(self, path: str, sha):
+        """将文件还原为指定版本"""
+        if sha is None or self.hash_file(path) == sha:
+            return
+        object_path = self.get_object_path(sha)
+        if not os.path.exists(object_path):
+            return
+        logger.debug(f"【流水线】还原 {path}")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        if os.path.isdir(object_path):
+            # 目录整体替换，删除多出的文件
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            shutil.copytree(object_path, tmp_path)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            elif os.path.exists(path):
+                os.remove(path)
+        else:
+            shutil.copy2(object_path, tmp_path)
+        os.replace(tmp_path, path)
+        self.hash_file(path)
+
+    def _prune_objects(self):
+        """删除不再被任何阶段引用的版本"""
+        if not os.path.isdir(self.objects_dir):
+            return
+        referenced = {
+            sha
+            for record in self.manifest["stages"].values()
+            for sha in [*record["outputs"].values(), *record.get("inputs", {}).values()]
+        }
+        for file_name in os.listdir(self.objects_dir):
+            if file_name not in referenced:
+                object_path = os.path.join(self.objects_dir, file_name)
+                if os.path.isdir(object_path):
+                    shutil.rmtree(object_path)
+                else:
+                    os.remove(object_path)
+
+    def _load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"stages": {}, "files": {}}
+
+    def _save_manifest(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp{os.getpid()}"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.manifest_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按阶段运行数据预处理，跳过未变化的阶段。")
+    parser.add_argument(
+        "--force",
+        nargs="*",
+        metavar="STAGE",
+        help="强制运行指定阶段，不指定阶段时运行全部阶段",
+    )
+    parser.add_argument(
+        "--list", action="store_true", help="只列出各阶段是否需要运行，不实际运行"
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="并行运行的阶段数，默认为 CPU 核数；为 1 时在同一进程中依次运行",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="输入只在某一时间之后有变化（如追加了新导出的数据）的阶段从变化前的检查点增量运行",
+    )
+    args = parser.parse_args()
+    Pipeline().run(
+        force=args.force, dry_run=args.list, jobs=args.jobs, incremental=args.incremental
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,328 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+LLM 请求限流
+
+同一接口（base_url、API_KEY）的所有请求共享一个 RateLimiter：
+
+- 每分钟请求数、每分钟 token 数：令牌桶，发送前按估算的 token 数预订，回答后按实际用量修正，请求失败时退还
+- 并发数：AIMD 自适应，请求成功时加性增大，遇到 429、超时、服务端错误时减半；
+  推理模型的长回答耗时长但不代表过载，不据耗时调整
+- 重试：可重试的错误按指数退避加随机抖动重试单个请求（优先使用 Retry-After），不影响其他请求
+"""
+
+import asyncio
+import json
+import random
+import threading
+import time
+from typing import Optional
+
+import logger
+from schema import ApiConfig
+
+
+class TokenBucket:
+    """
+    令牌桶，容量为一分钟的配额，按速率连续补充；允许预支，预支的部分由之后的请求等待
+
+    :param per_minute (float): 每分钟的配额
+    """
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        预订令牌
+
+        :param amount (float): 令牌数
+        :return float: 需要等待的秒数
+        """
+        with self.lock:
+            self._refill()
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float):
+        """
+        修正已预订的令牌数，amount 为正时补扣，为负时退还
+        """
+        with self.lock:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 自适应并发数：请求成功时上限增加 1/上限（每轮约加 1），过载时减半
+
+    :param initial (int): 初始并发数，为 None 时取最大并发数
+    :param minimum (int): 最小并发数
+    :param maximum (int): 最大并发数
+    """
+
+    # 两次减半的最小间隔（秒），同一波过载只减半一次
+    decrease_interval = 1.0
+
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = minimum
+        self.maximum = maximum
+        if initial is None:
+            initial = maximum
+        self.limit = float(min(max(initial, minimum), maximum))
+        self.in_flight = 0
+        self.decreased = 0.0
+        self.condition = threading.Condition()
+
+    def try_acquire(self) -> bool:
+        with self.condition:
+            if self.in_flight < int(self.limit):
+                self.in_flight += 1
+                return True
+            return False
+
+    def acquire(self):
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        delay = 0.01
+        while not self.try_acquire():
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 0.5)
+
+    def release(self, succeeded: bool = False, overloaded: bool = False):
+        """
+        释放并发数并调整上限
+
+        :param succeeded (bool): 请求是否成功
+        :param overloaded (bool): 是否过载（429、超时、服务端错误）
+        """
+        with self.condition:
+            self.in_flight -= 1
+            now = time.monotonic()
+            if overloaded:
+                if now - self.decreased >= self.decrease_interval:
+                    self.limit = max(self.minimum, self.limit / 2)
+                    self.decreased = now
+                    logger.warning(f"【LLM 并发数下调】{int(self.limit)}")
+            elif succeeded:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+
+def estimate_tokens(messages: list, tools: list) -> int:
+    """
+    估算请求的 token 数（中文约 1.5 字符一个 token）
+    """
+    text = json.dumps([messages, tools], ensure_ascii=False, default=str)
+    return int(len(text) / 1.5) + 1
+
+
+def get_error_kind(error: Exception) -> Optional[str]:
+    """
+    判断错误类型
+
+    :return str: 'overload'（429、超时、服务端错误）、'connection'（连接错误）或 None（不可重试）
+    """
+    if error is None:
+        return None
+    import openai
+
+    # 读取流式回答时连接中断、超时抛出的是 httpx 的异常，未被 openai 包装；
+    # openai 使用其他 HTTP 库时没有 httpx，只按 openai 的异常判断
+    try:
+        import httpx
+
+        timeout_errors, transport_errors = (httpx.TimeoutException,), (httpx.TransportError,)
+    except ImportError:
+        timeout_errors, transport_errors = (), ()
+
+    if isinstance(
+        error,
+        (
+            openai.RateLimitError,
+            openai.APITimeoutError,
+            openai.InternalServerError,
+            *timeout_errors,
+        ),
+    ):
+        return "overload"
+    if isinstance(error, (openai.APIConnectionError, *transport_errors)):
+        return "connection"
+    return None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """
+    同一接口的请求限流，线程安全，同步和异步请求共享
+
+    :param api_config (ApiConfig): API 配置
+    """
+
+    def __init__(self, api_config: ApiConfig):
+        self.request_bucket = (
+            TokenBucket(api_config.rpm_limit) if api_config.rpm_limit else None
+        )
+        self.token_bucket = (
+            TokenBucket(api_config.tpm_limit) if api_config.tpm_limit else None
+        )
+        self.concurrency = AdaptiveConcurrency(
+            api_config.initial_concurrency,
+            api_config.min_concurrency,
+            api_config.max_concurrency,
+        )
+        self.max_retries = api_config.max_retries
+        self.retry_base_delay = api_config.retry_base_delay
+        self.retry_max_delay = api_config.retry_max_delay
+
+    def reserve(self, estimated_tokens: int) -> float:
+        """
+        预订一次请求的配额
+
+        :return float: 需要等待的秒数
+        """
+        delay = 0.0
+        if self.request_bucket:
+            delay = max(delay, self.request_bucket.reserve(1))
+        if self.token_bucket:
+            delay = max(delay, self.token_bucket.reserve(estimated_tokens))
+        return delay
+
+    def refund(self, estimated_tokens: int):
+        """
+        退还失败请求预订的 token 数，重试时重新预订
+        """
+        if self.token_bucket:
+            self.token_bucket.adjust(-estimated_tokens)
+
+    def record_usage(self, estimated_tokens: int, response):
+        """
+        按回答中的实际用量修正每分钟 token 数
+        """
+        usage = getattr(response, "usage", None)
+        if self.token_bucket and usage is not None and usage.total_tokens:
+            self.token_bucket.adjust(usage.total_tokens - estimated_tokens)
+
+    def get_retry_delay(self, error: Exception, attempt: int) -> float:
+        """
+        第 attempt 次重试前等待的秒数：Retry-After 或指数退避的随机抖动
+        """
+        retry_after = get_retry_after(error)
+        if retry_after is not None:
+            return min(retry_after, self.retry_max_delay)
+        return random.uniform(
+            0, min(self.retry_max_delay, self.retry_base_delay * 2**attempt)
+        )
+
+    def should_retry(self, error: Exception, attempt: int) -> bool:
+        return attempt < self.max_retries and get_error_kind(error) is not None
+
+    def call(self, send, estimated_tokens: int):
+        """
+        限流并重试地发送请求
+
+        :param send (Callable): 发送请求的函数
+        :param estimated_tokens (int): 估算的 token 数
+        :return: 回答
+        """
+        attempt = 0
+        while True:
+            time.sleep(self.reserve(estimated_tokens))
+            self.concurrency.acquire()
+            succeeded, overloaded, error = False, False, None
+            try:
+                response = send()
+                succeeded = True
+            except Exception as e:
+                error = e
+                overloaded = get_error_kind(e) == "overload"
+            finally:
+                # 中断（KeyboardInterrupt 等）时也释放，否则并发数永久减少
+                self.concurrency.release(succeeded, overloaded)
+            if error is None:
+                self.record_usage(estimated_tokens, response)
+                return response
+            self.refund(estimated_tokens)
+            if not self.should_retry(error, attempt):
+                raise error
+            delay = self.get_retry_delay(error, attempt)
+            attempt += 1
+            logger.warning(f"【请求失败，{delay:.1f} 秒后第{attempt}次重试】{error}")
+            time.sleep(delay)
+
+    async def call_async(self, send, estimated_tokens: int):
+        """
+        限流并重试地发送请求（异步）
+
+        :param send (Callable): 返回请求协程的函数
+        :param estimated_tokens (int): 估算的 token 数
+        :return: 回答
+        """
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.reserve(estimated_tokens))
+            await self.concurrency.acquire_async()
+            succeeded, overloaded, error = False, False, None
+            try:
+                response = await send()
+                succeeded = True
+            except Exception as e:
+                error = e
+                overloaded = get_error_kind(e) == "overload"
+            finally:
+                # 任务取消（CancelledError）时也释放，否则并发数永久减少
+                self.concurrency.release(succeeded, overloaded)
+            if error is None:
+                self.record_usage(estimated_tokens, response)
+                return response
+            self.refund(estimated_tokens)
+            if not self.should_retry(error, attempt):
+                raise error
+            delay = self.get_retry_delay(error, attempt)
+            attempt += 1
+            logger.warning(f"【请求失败，{delay:.1f} 秒后第{attempt}次重试】{error}")
+            await asyncio.sleep(delay)
+
+
+# 进程内共享的限流器，(base_url, api_key) -> RateLimiter
+rate_limiters = {}
+rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(base_url: str, api_key: str, api_config: ApiConfig) -> RateLimiter:
+    """
+    获取接口共享的限流器，不存在时按 API 配置创建
+    """
+    key = (base_url, api_key)
+    with rate_limiters_lock:
+        if key not in rate_limiters:
+            rate_limiters[key] = RateLimiter(api_config)
+        return rate_limiters[key]
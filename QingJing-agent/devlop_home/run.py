@@ -5,6 +5,7 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
+import asyncio
 import json
 import concurrent.futures as cf
 import os
@@ -13,7 +14,7 @@ import argparse
 from schema import VoteResult
 import logger
 import utils
-from agent.start import process_one
+from agent.start import process_all_async, process_one
 
 submit_dir = "devlop_output/results"
 solution_dir = "devlop_output/solutions"
@@ -83,6 +84,7 @@ def main():
         f"【问题总数】: {len(question_list)},",
         f"【投票次数】: {utils.module_config.vote_times},",
         f"【问题并发线程数】: {max_workers_main},",
+        f"【异步执行】: {utils.module_config.enable_async},",
         f"【子任务并发线程数】: {max_workers_subtask},",
         f"【仅处理第一个问题】: {splice_index},",
         f"【问题文件】: {question_path}",
@@ -95,22 +97,28 @@ def main():
     vote_results = []
     submit_result_list = []
 
+    def save_result(vote_res):
+        if isinstance(vote_res, VoteResult):
+            vote_results.append(vote_res)
+            submit_result_list.append(
+                vote_res.to_submit_json()
+                if isinstance(vote_res, VoteResult)
+                else vote_res
+            )
+            utils.save_submit_result(submit_result_list, submit_path)
+            utils.save_solutions(vote_results, solution_path)
+        else:
+            submit_result_list.append(vote_res)
+            utils.save_submit_result(submit_result_list, submit_path)
+
+    if utils.module_config.enable_async:
+        asyncio.run(process_all_async(question_list, save_result))
+        return
+
     with cf.ThreadPoolExecutor(max_workers=max_workers_main) as executor:
         future_list = [executor.submit(process_one, item) for item in question_list]
         for future in cf.as_completed(future_list):
-            vote_res = future.result()
-            if isinstance(vote_res, VoteResult):
-                vote_results.append(vote_res)
-                submit_result_list.append(
-                    vote_res.to_submit_json()
-                    if isinstance(vote_res, VoteResult)
-                    else vote_res
-                )
-                utils.save_submit_result(submit_result_list, submit_path)
-                utils.save_solutions(vote_results, solution_path)
-            else:
-                submit_result_list.append(vote_res)
-                utils.save_submit_result(submit_result_list, submit_path)
+            save_result(future.result())
 
 
 if __name__ == "__main__":
@@ -192,6 +192,8 @@ class ModuleConfig:
         max_workers_subtask=5,
         max_function_calling_iterations=6,
         summary_only_answer=True,
+        enable_async=False,
+        max_concurrent_requests=100,
     ):
         self.enable_update_decomposition = enable_update_decomposition
         self.enable_summary = enable_summary
@@ -202,6 +204,9 @@ class ModuleConfig:
         self.max_workers_subtask = max_workers_subtask
         self.max_function_calling_iterations = max_function_calling_iterations
         self.summary_only_answer = summary_only_answer
+        # 使用 asyncio 在一个事件循环中处理所有问题，同时进行的 LLM 请求数不超过 max_concurrent_requests
+        self.enable_async = enable_async
+        self.max_concurrent_requests = max_concurrent_requests
 
     def to_dict(self):
         """将配置转换为字典"""
@@ -215,6 +220,8 @@ class ModuleConfig:
             "max_workers_subtask": self.max_workers_subtask,
             "max_function_calling_iterations": self.max_function_calling_iterations,
             "summary_only_answer": self.summary_only_answer,
+            "enable_async": self.enable_async,
+            "max_concurrent_requests": self.max_concurrent_requests,
         }
 
     @classmethod
@@ -238,6 +245,21 @@ class ApiConfig:
         api_key_env: Optional[str] = None,
         temperature: Optional[float] = 0,
         stream: Optional[bool] = False,
+        max_connections: Optional[int] = 100,
+        max_keepalive_connections: Optional[int] = 100,
+        keepalive_expiry: Optional[float] = 60,
+        cache_mode: Optional[str] = "live",
+        cache_path: Optional[str] = "devlop_output/llm_cache.sqlite",
+        cache_ttl: Optional[float] = None,
+        cache_max_entries: Optional[int] = None,
+        rpm_limit: Optional[float] = None,
+        tpm_limit: Optional[float] = None,
+        initial_concurrency: Optional[int] = None,
+        min_concurrency: Optional[int] = 1,
+        max_concurrency: Optional[int] = 100,
+        max_retries: Optional[int] = 5,
+        retry_base_delay: Optional[float] = 1,
+        retry_max_delay: Optional[float] = 60,
     ):
         self.config_name = config_name
         self.type = type
@@ -246,6 +268,25 @@ class ApiConfig:
         self.api_key_env = api_key_env
         self.temperature = temperature
         self.stream = stream
+        # HTTP 连接池：最大连接数、最大空闲连接数、空闲连接保持时间（秒）
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        # 回答缓存：模式（live、record、replay，见 llm_cache）、数据库文件路径、有效期（秒）、最多条目数
+        self.cache_mode = cache_mode
+        self.cache_path = cache_path
+        self.cache_ttl = cache_ttl
+        self.cache_max_entries = cache_max_entries
+        # 限流（见 rate_limit）：每分钟请求数、每分钟 token 数（为 None 时不限），
+        # 自适应并发数的初始值（为 None 时取最大值）和范围，单个请求的最大重试次数和退避时间（秒）
+        self.rpm_limit = rpm_limit
+        self.tpm_limit = tpm_limit
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
 
     def __repr__(self):
         return (
@@ -263,6 +304,21 @@ class ApiConfig:
             api_key_env=data.get("api_key_env"),
             temperature=data.get("temperature", 0),
             stream=data.get("stream", False),
+            max_connections=data.get("max_connections", 100),
+            max_keepalive_connections=data.get("max_keepalive_connections", 100),
+            keepalive_expiry=data.get("keepalive_expiry", 60),
+            cache_mode=data.get("cache_mode", "live"),
+            cache_path=data.get("cache_path", "devlop_output/llm_cache.sqlite"),
+            cache_ttl=data.get("cache_ttl"),
+            cache_max_entries=data.get("cache_max_entries"),
+            rpm_limit=data.get("rpm_limit"),
+            tpm_limit=data.get("tpm_limit"),
+            initial_concurrency=data.get("initial_concurrency"),
+            min_concurrency=data.get("min_concurrency", 1),
+            max_concurrency=data.get("max_concurrency", 100),
+            max_retries=data.get("max_retries", 5),
+            retry_base_delay=data.get("retry_base_delay", 1),
+            retry_max_delay=data.get("retry_max_delay", 60),
         )
 
 
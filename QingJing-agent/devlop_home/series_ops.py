@@ -0,0 +1,113 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+数值序列的向量化操作
+
+数据预处理中按行比较前后时刻、按游程修补短暂跳变、配对开始和结束事件的公共实现。
+"""
+
+import numpy as np
+
+
+def detect_edges(before, after):
+    """
+    检测相邻两行之间的状态切换
+
+    :param before (ndarray): 各行是否满足切换前的条件
+    :param after (ndarray): 各行是否满足切换后的条件
+    :return ndarray: 各行是否为切换点（上一行满足 before 且当前行满足 after），第一行不判定
+    """
+    before, after = np.asarray(before, dtype=bool), np.asarray(after, dtype=bool)
+    return np.concatenate([[False], before[:-1] & after[1:]])
+
+
+def fill_short_gaps(values, threshold, max_length: int):
+    """
+    填充短暂跌落：两侧均不低于阈值、长度不超过 max_length 的连续低于阈值的数据，替换为其左侧的值
+
+    与依次用宽度为 max_length + 2, ..., 3 的滑动窗口逐个修补的结果一致；NaN 既不低于也不高于阈值。
+
+    :param values (array-like): 数值序列
+    :param threshold (float): 阈值
+    :param max_length (int): 填充的最大长度
+    :return ndarray: 填充后的序列，类型与输入一致
+    """
+    values = np.asarray(values)
+    low = values < threshold
+    high = values >= threshold
+
+    # 低于阈值的游程 [starts, ends)
+    edges = np.diff(np.concatenate([[0], low.astype(np.int8), [0]]))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    lengths = ends - starts
+    fill = (lengths <= max_length) & (starts > 0) & (ends < len(values))
+    fill[fill] = high[starts[fill] - 1] & high[ends[fill]]
+    starts, lengths = starts[fill], lengths[fill]
+
+    result = values.copy()
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    result[np.repeat(starts, lengths) + offsets] = np.repeat(values[starts - 1], lengths)
+    return result
+
+
+def pair_events(is_start, is_end):
+    """
+    按时间顺序配对开始、结束事件
+
+    结束事件与之前最近一次开始事件配对，开始事件须在上一次结束事件（含）之后、本次结束事件之前；
+    没有配对的开始、结束事件忽略，即逐行扫描时遇到开始事件记录开始位置、遇到结束事件时与已记录的开始位置配对并清空。
+
+    :param is_start (ndarray): 各行是否为开始事件
+    :param is_end (ndarray): 各行是否为结束事件
+    :return tuple[ndarray, ndarray]: 各区间开始、结束事件的行号，按时间升序排列
+    """
+    index = np.arange(len(is_start))
+    last_start = np.maximum.accumulate(np.where(is_start, index, -1))
+    end_index = index[np.asarray(is_end, dtype=bool)]
+    previous_end = np.concatenate([[0], end_index[:-1]])
+    start_index = last_start[end_index]
+    valid = (start_index >= previous_end) & (start_index < end_index)
+    return start_index[valid], end_index[valid]
+
+
+def fill_running_intervals(boot, shutdown):
+    """
+    根据开机、关机标记计算开机运行中的数据行：配对的开机到关机（均含）之间为开机运行中，开机后没有关机的不标记
+
+    :param boot (ndarray): 开机标记
+    :param shutdown (ndarray): 关机标记
+    :return ndarray: 开机运行中标记
+    """
+    interval_start, interval_end = pair_events(boot, shutdown)
+    # 差分数组标记区间，区间之间最多在端点处重叠
+    delta = np.zeros(len(boot) + 1, dtype=np.int64)
+    np.add.at(delta, interval_start, 1)
+    np.add.at(delta, interval_end + 1, -1)
+    return np.cumsum(delta[:-1]) > 0
+
+
+def fill_between_markers(status, start_label: str, end_label: str, middle_label: str):
+    """
+    按顺序遍历状态列中的开始、结束标记，开始标记后紧跟结束标记时，将两者之间（不含）填充为 middle_label
+
+    :param status (array-like): 状态列
+    :param start_label (str): 开始标记，如 '停泊状态开始'
+    :param end_label (str): 结束标记，如 '停泊状态结束'
+    :param middle_label (str): 填充值，如 '停泊状态中'
+    :return ndarray: 填充后的状态列
+    """
+    status = np.array(status, dtype=object)
+    positions = np.flatnonzero((status == start_label) | (status == end_label))
+    is_start = status[positions] == start_label
+    paired = is_start[:-1] & ~is_start[1:]
+    delta = np.zeros(len(status) + 1, dtype=np.int64)
+    np.add.at(delta, positions[:-1][paired] + 1, 1)
+    np.add.at(delta, positions[1:][paired], -1)
+    status[np.cumsum(delta[:-1]) > 0] = middle_label
+    return status
@@ -0,0 +1,154 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+状态区间计算
+
+- 状态区间：状态列中的 'X开始'、'X中'、'X结束' 构成状态 X 的区间。对状态列做一次游程编码：
+  连续处于状态 X 的数据行为一个区间，遇到 'X开始' 时开始新区间，'X结束' 所在行为区间的最后一行。
+- 事件区间：动作列中的开始事件（如 'A架开机'）与之后的结束事件（如 'A架关机'）按时间顺序配对。
+
+区间按数据表缓存（TableStore.load_derived），任意日期范围的按天裁剪和时长均为向量化计算。
+"""
+
+import numpy as np
+import pandas as pd
+from series_ops import pair_events
+from table_store import TableStore
+
+one_day = np.timedelta64(1, "D")
+last_second = np.timedelta64(86399, "s")
+
+
+def extract_stage_intervals(times: np.ndarray, status: np.ndarray, stage: str):
+    """
+    从状态列中提取状态区间
+
+    :param times (ndarray): 按升序排列的时间列（datetime64）
+    :param status (ndarray): 状态列
+    :param stage (str): 状态名称，如 '停泊状态'
+    :return tuple[ndarray, ndarray]: 各区间的开始时间和结束时间，按开始时间升序排列
+    """
+    status = np.asarray(status, dtype=object)
+    is_start = status == f"{stage}开始"
+    is_end = status == f"{stage}结束"
+    in_stage = is_start | is_end | (status == f"{stage}中")
+
+    previous_in_stage = np.concatenate([[False], in_stage[:-1] & ~is_end[:-1]])
+    next_in_stage = np.concatenate([in_stage[1:] & ~is_start[1:], [False]])
+    run_starts = np.flatnonzero(in_stage & (is_start | ~previous_in_stage))
+    run_ends = np.flatnonzero(in_stage & (is_end | ~next_in_stage))
+    return times[run_starts], times[run_ends]
+
+
+def load_stage_intervals(file_path: str, column: str, stage: str):
+    """
+    获取数据表中状态列的区间，首次访问时计算并缓存
+
+    :param file_path (str): CSV 文件路径
+    :param column (str): 状态列名
+    :param stage (str): 状态名称
+    :return tuple[ndarray, ndarray]: 各区间的开始时间和结束时间
+    :raise FileNotFoundError: 文件不存在
+    :raise KeyError: 列不存在
+    """
+    return TableStore.load_derived(
+        file_path,
+        ("stage_intervals", column, stage),
+        lambda: extract_stage_intervals(
+            TableStore.load_column(file_path, "csvTime"),
+            TableStore.load_column(file_path, column),
+            stage,
+        ),
+    )
+
+
+def extract_intervals(
+    df: pd.DataFrame, start_event: str, end_event: str, column: str = "key_action"
+):
+    """
+    配对动作列中的开始事件和结束事件，见 series_ops.pair_events
+
+    :param df (DataFrame): 按时间升序排列的数据表，包含 csvTime 列和动作列
+    :param start_event (str): 开始事件，如 'A架开机'
+    :param end_event (str): 结束事件，如 'A架关机'
+    :param column (str): 动作列名
+    :return ndarray: 形状为 (区间数, 2)，每行为区间开始和结束事件的 csvTime，按时间升序排列
+    """
+    events = df[column].to_numpy()
+    starts, ends = pair_events(events == start_event, events == end_event)
+    times = df["csvTime"].to_numpy()
+    return np.column_stack([times[starts], times[ends]])
+
+
+def load_event_intervals(
+    file_path: str, start_event: str, end_event: str, column: str = "key_action"
+):
+    """
+    获取数据表中事件配对的区间，首次访问时计算并缓存
+
+    :param file_path (str): CSV 文件路径
+    :param start_event (str): 开始事件
+    :param end_event (str): 结束事件
+    :param column (str): 动作列名
+    :return tuple[ndarray, ndarray]: 各区间的开始时间和结束时间（datetime64）
+    :raise FileNotFoundError: 文件不存在
+    :raise KeyError: 列不存在
+    """
+
+    def build():
+        events = TableStore.load_column(file_path, column)
+        starts, ends = pair_events(events == start_event, events == end_event)
+        times = TableStore.load_column(file_path, "csvTime")
+        return times[starts], times[ends]
+
+    return TableStore.load_derived(
+        file_path, ("event_intervals", column, start_event, end_event), build
+    )
+
+
+def clip_intervals_by_day(starts: np.ndarray, ends: np.ndarray, start_date, end_date):
+    """
+    将区间按天裁剪到 [当天 00:00:00, 当天 23:59:59]，只保留日期范围内的部分
+
+    :param starts (ndarray): 区间开始时间（datetime64），按升序排列
+    :param ends (ndarray): 区间结束时间（datetime64）
+    :param start_date: 起始日期
+    :param end_date: 结束日期（含）
+    :return DataFrame: date（当天零点）、start、end、minutes（四舍五入的分钟数），按开始时间升序排列
+    """
+    first_day = pd.Timestamp(start_date).normalize().to_datetime64()
+    last_day = pd.Timestamp(end_date).normalize().to_datetime64()
+    # 区间按开始时间有序且互不重叠，二分查找与日期范围相交的区间
+    lo = ends.searchsorted(first_day, "left") if len(ends) else 0
+    hi = starts.searchsorted(last_day + one_day, "left")
+    starts, ends = starts[lo:hi], ends[lo:hi]
+
+    # 跨天的区间展开为每天一段
+    start_days = starts.astype("datetime64[D]")
+    end_days = ends.astype("datetime64[D]")
+    day_counts = (end_days - start_days).astype(np.int64) + 1
+    piece_index = np.repeat(np.arange(len(starts)), day_counts)
+    offsets = np.arange(len(piece_index)) - np.repeat(
+        np.cumsum(day_counts) - day_counts, day_counts
+    )
+    days = (start_days[piece_index] + offsets).astype(starts.dtype)
+    piece_starts = np.maximum(starts[piece_index], days)
+    piece_ends = np.minimum(ends[piece_index], days + last_second)
+
+    in_range = (days >= first_day) & (days <= last_day)
+    pieces = pd.DataFrame(
+        {
+            "date": days[in_range],
+            "start": piece_starts[in_range],
+            "end": piece_ends[in_range],
+        }
+    )
+    pieces["minutes"] = np.round(
+        (pieces["end"] - pieces["start"]).dt.total_seconds() / 60
+    ).astype(int)
+    return pieces
@@ -0,0 +1,240 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""进程级数据表缓存"""
+
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+from columnar import load_column, load_columnar, load_meta, save_columnar
+import logger
+
+
+class TableStore:
+    """
+    进程级数据表缓存，所有工具共享。
+
+    每个数据表文件只读取一次，并预先将 csvTime 解析为 datetime64、按时间升序排列；
+    当文件被 data_process.py 重写（mtime 或大小变化）时自动重新加载。
+    返回的 DataFrame 为浅拷贝视图，调用方可以新增或替换列，但不应原地修改已有数据。
+    基于有序的 csvTime，时间范围查询和最近点查询均通过二分查找完成。
+    若 data_process.py 生成了有效的列式缓存（见 columnar.py），优先从缓存加载，跳过 CSV 解析。
+    只需要少数几列时使用 load_column，时间列和数值列直接内存映射缓存文件，所有线程共享。
+    能耗查询使用 load_cumulative_energy 返回的累计能耗前缀和，任意时间范围只需两次二分查找。
+    其他派生数据（如航行状态区间）通过 load_derived 与列缓存一同缓存。
+    """
+
+    _tables: dict[str, tuple[tuple[int, int], pd.DataFrame]] = {}
+    _columns: dict[str, tuple[tuple[int, int], dict]] = {}
+    _file_locks: dict[str, threading.RLock] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def load(cls, file_path: str) -> pd.DataFrame:
+        """
+        获取数据表
+
+        :param file_path (str): CSV 文件路径
+        :return DataFrame: 数据表的只读视图
+        :raise FileNotFoundError: 文件不存在
+        """
+        file_path = os.path.normpath(file_path)
+        # 同一文件只允许一个线程加载，其余线程等待后直接复用
+        with cls._get_file_lock(file_path):
+            signature = cls._get_signature(file_path)
+            cached = cls._tables.get(file_path)
+            if cached is None or cached[0] != signature:
+                if cached is not None:
+                    logger.debug(f"【数据表缓存】{file_path} 已更新，重新加载")
+                cached = (signature, cls._read(file_path))
+                cls._tables[file_path] = cached
+
+        return cached[1].copy(deep=False)
+
+    @classmethod
+    def load_column(cls, file_path: str, column: str) -> np.ndarray:
+        """
+        获取数据表中的单列（只读），时间列为 datetime64[ns]
+
+        存在有效的列式缓存时，时间列和数值列为内存映射数组，切片不会复制数据；
+        否则取自 load 返回的数据表。
+
+        :param file_path (str): CSV 文件路径
+        :param column (str): 列名
+        :return ndarray: 列数据，按 csvTime 升序排列
+        :raise FileNotFoundError: 文件不存在
+        :raise KeyError: 列不存在
+        """
+        file_path = os.path.normpath(file_path)
+        with cls._get_file_lock(file_path):
+            columns = cls._get_column_cache(file_path)
+            if column not in columns:
+                columns[column] = cls._read_column(file_path, column)
+            return columns[column]
+
+    @classmethod
+    def load_cumulative_energy(cls, file_path: str, power_column: str) -> np.ndarray:
+        """
+        获取功率列的累计能耗（kWh）前缀和，首次访问时计算并缓存
+
+        第 i 行的能耗为 (t[i+1] - t[i]) * p[i] / 3600，缺失值按 0 计；
+        返回的 E 满足 E[k] 为前 k 行能耗之和，第 lo 到 hi-1 行（含）之间的能耗为 E[hi-1] - E[lo]。
+
+        :param file_path (str): CSV 文件路径
+        :param power_column (str): 功率列名（kW）
+        :return ndarray: 累计能耗，长度与数据表相同
+        :raise FileNotFoundError: 文件不存在
+        :raise KeyError: 列不存在
+        """
+        def build():
+            times = cls.load_column(file_path, "csvTime")
+            power = cls.load_column(file_path, power_column)
+            diff_seconds = np.diff(times).astype("timedelta64[ns]").astype(
+                np.int64
+            ) / 1e9
+            energy = np.nan_to_num(
+                diff_seconds * np.asarray(power[:-1], dtype=float) / 3600
+            )
+            # 使用扩展精度累加，避免前缀和相减时损失有效位
+            cumulative = np.zeros(len(times), dtype=np.longdouble)
+            np.cumsum(energy, dtype=np.longdouble, out=cumulative[1:])
+            cumulative.flags.writeable = False
+            return cumulative
+
+        return cls.load_derived(file_path, ("cumulative_energy", power_column), build)
+
+    @classmethod
+    def load_derived(cls, file_path: str, key: tuple, build):
+        """
+        获取由数据表派生的数据（如前缀和、区间），首次访问时调用 build 计算，文件更新后重新计算
+
+        :param file_path (str): CSV 文件路径
+        :param key (tuple): 派生数据的键，不能与列名冲突
+        :param build (Callable): 无参数的计算函数，可以调用 load_column
+        :return: build 的返回值，调用方不应修改
+        """
+        file_path = os.path.normpath(file_path)
+        with cls._get_file_lock(file_path):
+            columns = cls._get_column_cache(file_path)
+            if key not in columns:
+                columns[key] = build()
+            return columns[key]
+
+    @classmethod
+    def clear(cls):
+        """清空缓存"""
+        with cls._lock:
+            cls._tables.clear()
+            cls._columns.clear()
+
+    @staticmethod
+    def slice_by_time(df: pd.DataFrame, start_time, end_time) -> pd.DataFrame:
+        """
+        获取 start_time <= csvTime <= end_time 的数据，复杂度 O(log n)
+
+        :param df (DataFrame): 按 csvTime 升序排列的数据表
+        :param start_time: 开始时间
+        :param end_time: 结束时间
+        :return DataFrame: 时间范围内的数据
+        """
+        times = df["csvTime"].values
+        lo = times.searchsorted(pd.Timestamp(start_time).to_datetime64(), "left")
+        hi = times.searchsorted(pd.Timestamp(end_time).to_datetime64(), "right")
+        return df.iloc[lo:hi]
+
+    @staticmethod
+    def closest_to(df: pd.DataFrame, time_point) -> pd.DataFrame:
+        """
+        获取 csvTime 距离指定时间点最近的一条数据，距离相同时取较早的一条
+
+        :param df (DataFrame): 按 csvTime 升序排列的数据表
+        :param time_point: 时间点
+        :return DataFrame: 最多包含一条数据的数据表
+        """
+        times = df["csvTime"].values
+        # NaT 排在末尾，只在有效时间内查找
+        valid = times.searchsorted(np.datetime64("NaT"), "left")
+        if valid == 0:
+            return df.iloc[0:0]
+
+        target = pd.Timestamp(time_point).to_datetime64()
+        pos = times[:valid].searchsorted(target, "left")
+        if pos == valid:
+            pos = valid - 1
+        elif pos > 0 and target - times[pos - 1] <= times[pos] - target:
+            pos -= 1
+        return df.iloc[pos : pos + 1]
+
+    @classmethod
+    def _get_file_lock(cls, file_path: str) -> threading.RLock:
+        with cls._lock:
+            return cls._file_locks.setdefault(file_path, threading.RLock())
+
+    @classmethod
+    def _get_column_cache(cls, file_path: str) -> dict:
+        """获取文件当前版本的列缓存，文件更新后清空，需持有文件锁"""
+        signature = cls._get_signature(file_path)
+        cached = cls._columns.get(file_path)
+        if cached is None or cached[0] != signature:
+            cached = (signature, {})
+            cls._columns[file_path] = cached
+        return cached[1]
+
+    @staticmethod
+    def _get_signature(file_path: str) -> tuple[int, int]:
+        stat = os.stat(file_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @classmethod
+    def build_cache(cls, file_path: str):
+        """
+        为 CSV 数据表生成列式缓存
+
+        :param file_path (str): CSV 文件路径
+        """
+        save_columnar(cls._read_csv(file_path), file_path)
+
+    @classmethod
+    def _read(cls, file_path: str) -> pd.DataFrame:
+        try:
+            df = load_columnar(file_path)
+        except Exception as e:
+            logger.warning(f"【数据表缓存】{file_path} 的列式缓存读取失败: {e}")
+            df = None
+        if df is None:
+            df = cls._read_csv(file_path)
+        return df
+
+    @classmethod
+    def _read_column(cls, file_path: str, column: str) -> np.ndarray:
+        try:
+            meta = load_meta(file_path)
+            if meta is not None:
+                return load_column(file_path, meta, column)
+        except KeyError:
+            raise
+        except Exception as e:
+            logger.warning(f"【数据表缓存】{file_path} 的列式缓存读取失败: {e}")
+        values = cls.load(file_path)[column].to_numpy()
+        values.flags.writeable = False
+        return values
+
+    @staticmethod
+    def _read_csv(file_path: str) -> pd.DataFrame:
+        df = pd.read_csv(file_path)
+        if "csvTime" in df.columns:
+            try:
+                df["csvTime"] = pd.to_datetime(df["csvTime"])
+                if not df["csvTime"].is_monotonic_increasing:
+                    df = df.sort_values(by="csvTime", kind="stable").reset_index(
+                        drop=True
+                    )
+            except Exception as e:
+                logger.warning(f"【数据表缓存】{file_path} 的时间列转换失败: {e}")
+        return df
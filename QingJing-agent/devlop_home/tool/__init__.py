@@ -7,6 +7,7 @@
 
 from .saling_stage_queryer import SalingStageQueryer
 from .before_or_late_ratio_calculator import BeforeOrLateRatioCalculator
+from .daily_summary_queryer import DailySummaryQueryer
 from .data_aggregator import DataAggregator
 from .data_filter import DataFilter
 from .deepsea_operation_counter import DeepseaOperationCounter
@@ -25,6 +26,7 @@ from .tool_pool import ToolPool
 __all__ = [
     "SalingStageQueryer",
     "BeforeOrLateRatioCalculator",
+    "DailySummaryQueryer",
     "DataAggregator",
     "DataFilter",
     "DeepseaOperationCounter",
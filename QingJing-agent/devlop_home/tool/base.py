@@ -9,8 +9,11 @@ from abc import ABC, abstractmethod
 import inspect
 from typing import Any, Dict, List, Optional
 
+import pandas as pd
 from pydantic import BaseModel, Field
 
+from table_store import TableStore
+
 
 class ToolResult(BaseModel):
     """Represents the result of a tool execution."""
@@ -70,6 +73,16 @@ class BaseTool(ABC, BaseModel):
     def execute(self, **kwargs) -> ToolResult:
         """Execute the tool with given parameters."""
 
+    def load_table(self, table_name: str) -> pd.DataFrame:
+        """
+        从进程级缓存中获取数据表，csvTime 列已解析为 datetime64
+
+        :param table_name (str): 数据表名
+        :return DataFrame: 数据表的只读视图
+        :raise FileNotFoundError: 数据表不存在
+        """
+        return TableStore.load(f"{self.table_base_path}/{table_name}.csv")
+
     def to_param(self) -> Dict:
         """Convert tool to function call format."""
         return {
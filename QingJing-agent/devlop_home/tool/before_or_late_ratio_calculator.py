@@ -5,10 +5,10 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List
+from daily_rollup import DailyRollup
 from tool.base import BaseTool, ToolFailure, ToolResult
-from tool.data_filter import DataFilter
 import logger
 
 action_table_configs = {
@@ -140,13 +140,10 @@ class BeforeOrLateRatioCalculator(BaseTool):
 
         :return ToolResult: 动作早于/晚于指定时间点发生的比例，返回百分比
         """
-        
-
         start_date = f"{start_date} 00:00:00"
         end_date = f"{end_date} 23:59:59"
 
         start_dt = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
-        current_dt = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
         end_dt = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
 
         time_point_dt = datetime.strptime(time_point, "%H:%M")
@@ -155,73 +152,37 @@ class BeforeOrLateRatioCalculator(BaseTool):
         )
 
         if key_action not in action_table_configs.keys():
-            return {
-                "error": f"动作 {key_action} 不存在",
-            }
-
-        get_data_result = DataFilter.execute(
-            action_table_configs[key_action],
-            start_date,
-            end_date,
-            columns=["csvTime"],
-            conditions=[{"column": "key_action", "operator": "==", "value": key_action}],
+            return ToolFailure(error=f"动作 {key_action} 不存在")
+        if before_or_late not in ["早于", "晚于"]:
+            return ToolFailure(error="before_or_late可选值为'早于'、'晚于'")
+
+        # 每天是否有动作早于/晚于时间点，等价于当天首次发生时间早于或末次发生时间晚于该时间点
+        summary = DailyRollup.load_action_summary(self.table_base_path)
+        summary = summary[
+            (summary["key_action"] == key_action)
+            & (summary["date"] >= start_dt.strftime("%Y-%m-%d"))
+            & (summary["date"] <= end_dt.strftime("%Y-%m-%d"))
+        ]
+        time_point_str = time_point_dt.strftime("%H:%M:%S")
+        if before_or_late == "早于":
+            satisfied = summary["first_time"].str[11:] < time_point_str
+        else:
+            satisfied = summary["last_time"].str[11:] > time_point_str
+        logger.info(
+            "【before_or_late_ratio中间结果】",
+            summary[["date", "first_time", "last_time"]].to_dict(orient="records"),
         )
 
-        try:
-            logger.info("【before_or_late_ratio中间结果】", get_data_result)
-            table_data = get_data_result["result"]
-        except:
-            return {
-                "result": 0,
-                "unit": "%",
-            }
-
-        satisfy_count = 0
-        total_count = 0
-        day_map = {}
-        
-        while current_dt <= end_dt:
-            day_str = current_dt.strftime("%Y-%m-%d")
-            day_map[day_str] = {
-                    "performed": True,
-                    "filtered": False,
-                }
-            current_dt += timedelta(days=1)
-        
-        for res_time in table_data["csvTime"]:
-            res_time_dt = datetime.strptime(res_time, "%Y-%m-%d %H:%M:%S")
-            res_day = datetime.strftime(res_time_dt, "%Y-%m-%d")
-
-            time_point_dt = time_point_dt.replace(
-                year=res_time_dt.year, month=res_time_dt.month, day=res_time_dt.day
-            )
-            if before_or_late == "早于" and res_time_dt < time_point_dt:
-                day_map[res_day] = {
-                    "performed": True,
-                    "filtered": True,
-                }
-            elif before_or_late == "晚于" and res_time_dt > time_point_dt:
-                day_map[res_day] = {
-                    "performed": True,
-                    "filtered": True,
-                }
-            elif before_or_late not in ["早于", "晚于"]:
-                return {
-                    "error": "before_or_late可选值为'早于'、'晚于'",
-                }
-
-        for key in day_map:
-            if day_map[key]["filtered"]:
-                satisfy_count += 1
-
-        total_count = len(day_map)
-
-        if total_count == 0:
+        satisfy_count = summary["date"][satisfied].nunique()
+        total_count = (end_dt.date() - start_dt.date()).days + 1
+
+        if total_count <= 0:
             proportion = 0
         else:
             proportion = (satisfy_count / total_count) * 100
-        return {
-            "result": proportion,
-            "unit": "%"
-        }
-       
\ No newline at end of file
+        return ToolResult(
+            output={
+                "result": proportion,
+                "unit": "%",
+            },
+        )
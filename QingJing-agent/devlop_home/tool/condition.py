@@ -0,0 +1,188 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+"""
+过滤条件引擎
+
+将工具参数中的 conditions / conditions_logic 编译为 Predicate，
+对数据表一次性计算出布尔掩码。DataFilter、DataAggregator、TimeSorter 共用。
+"""
+
+import operator as op
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from tool.base import ToolException
+
+COMPARATORS = {
+    "==": op.eq,
+    "!=": op.ne,
+    ">": op.gt,
+    "<": op.lt,
+    ">=": op.ge,
+    "<=": op.le,
+}
+
+SUPPORTED_OPERATORS = ["in", *COMPARATORS]
+
+
+class Clause:
+    """单个已解析的过滤条件"""
+
+    def __init__(self, column: str, operator: str, text: str, value, kind: str):
+        self.column = column
+        self.operator = operator
+        self.text = text
+        self.value = value
+        # float：列按数值比较；str：列按字符串比较
+        self.kind = kind
+
+    @property
+    def text_value(self):
+        """按字符串比较时使用的条件值"""
+        if self.operator == "in":
+            return [v.strip() for v in self.text.split(",")]
+        return self.text
+
+    def evaluate(self, values: np.ndarray, value=None) -> np.ndarray:
+        value = self.value if value is None else value
+        if self.operator == "in":
+            return np.isin(values, value)
+        return np.asarray(COMPARATORS[self.operator](values, value), dtype=bool)
+
+
+class Predicate:
+    """编译后的过滤条件，可对多张数据表重复求值"""
+
+    def __init__(self, clauses: List[Clause], logic: str):
+        self.clauses = clauses
+        self.logic = logic
+
+    @property
+    def columns(self) -> List[str]:
+        """条件涉及的列名（保持顺序、去重）"""
+        return list(dict.fromkeys(clause.column for clause in self.clauses))
+
+    def evaluate(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        计算布尔掩码，每列每种类型只转换一次
+
+        :param df (DataFrame): 数据表
+        :return ndarray: 布尔掩码，长度与 df 相同
+        """
+        coerced: Dict[Tuple[str, str], Optional[np.ndarray]] = {}
+
+        def get_values(column: str, kind: str) -> Optional[np.ndarray]:
+            key = (column, kind)
+            if key not in coerced:
+                try:
+                    coerced[key] = coerce_column(df[column], kind)
+                except ValueError:
+                    coerced[key] = None
+            return coerced[key]
+
+        mask = None
+        for clause in self.clauses:
+            values = get_values(clause.column, clause.kind)
+            if values is not None:
+                condition_mask = clause.evaluate(values)
+            else:
+                # 列无法转为数值时按字符串比较
+                condition_mask = clause.evaluate(
+                    get_values(clause.column, "str"), clause.text_value
+                )
+            if mask is None:
+                mask = condition_mask
+            elif self.logic == "AND":
+                mask &= condition_mask
+            else:
+                mask |= condition_mask
+        if mask is None:
+            return np.ones(len(df), dtype=bool)
+        return mask
+
+
+def coerce_column(series: pd.Series, kind: str) -> np.ndarray:
+    """
+    将列转换为比较所需的类型，已是目标类型时不复制
+
+    :param series (Series): 列数据
+    :param kind (str): float 或 str
+    :return ndarray: 转换后的数组
+    :raise ValueError: 列无法转换为数值
+    """
+    if kind == "float":
+        if pd.api.types.is_float_dtype(series.dtype):
+            return series.to_numpy()
+        return series.astype(float).to_numpy()
+    return series.astype(str).to_numpy()
+
+
+def parse_condition_value(value) -> Tuple[str, object]:
+    """默认的条件值解析：能转为数值的按数值比较，否则按字符串比较"""
+    try:
+        return "float", float(value)
+    except ValueError:
+        return "str", str(value)
+
+
+def compile_conditions(
+    conditions: Optional[List[Dict[str, str]]],
+    conditions_logic: str = "AND",
+    parse_value: Optional[Callable[[str], Tuple[str, object]]] = None,
+) -> Predicate:
+    """
+    编译过滤条件
+
+    :param conditions (List[Dict[str, str]]): 过滤条件，每个条件包含 column、operator、value
+    :param conditions_logic (str): 过滤条件逻辑，支持AND、OR
+    :param parse_value (Callable): 条件值解析函数，返回 (类型, 值)，类型为 float 或 str；
+        为空时使用 parse_condition_value
+    :return Predicate: 编译后的过滤条件
+    :raise ToolException: 条件不合法
+    """
+    logic = conditions_logic.upper()
+    if logic not in ["AND", "OR"]:
+        raise ToolException(f"不支持的逻辑操作符: {logic}")
+
+    clauses = []
+    for condition in conditions or []:
+        column, operator, value = (
+            condition["column"],
+            condition["operator"],
+            condition["value"],
+        )
+        if operator not in SUPPORTED_OPERATORS:
+            raise ToolException(f"不支持的操作符: {operator}")
+
+        try:
+            if operator == "in":
+                kind, value = parse_in_value(value, parse_value)
+            elif parse_value is not None:
+                kind, value = parse_value(value)
+            else:
+                kind, value = parse_condition_value(value)
+        except ValueError as e:
+            raise ToolException(str(e))
+        clauses.append(Clause(column, operator, condition["value"], value, kind))
+
+    return Predicate(clauses, logic)
+
+
+def parse_in_value(value, parse_value=None) -> Tuple[str, list]:
+    """解析 in 操作符以逗号分隔的值"""
+    if not isinstance(value, str):
+        raise ToolException(
+            f"条件值 {value} 格式错误，应为以逗号分隔的字符串列表（示例：value1,value2,value3）"
+        )
+    parsed = [(parse_value or parse_condition_value)(v.strip()) for v in value.split(",")]
+    # 全部为数值时按数值比较，否则按字符串比较
+    if all(kind == "float" for kind, _ in parsed):
+        return "float", [v for _, v in parsed]
+    return "str", [str(v) for _, v in parsed]
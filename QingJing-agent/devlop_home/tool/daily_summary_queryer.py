@@ -0,0 +1,166 @@
+# Copyright (c) 2025 试试又不会怎样
+#
+# This file is part of DeepseaAgent.
+#
+# All rights reserved.
+# Licensed under the MIT License.
+
+from datetime import datetime
+from typing import List
+
+import numpy as np
+import pandas as pd
+from daily_rollup import DailyRollup
+from device_config import energy_device_config, power_fuel_device_config
+from event_index import event_tables
+from stage_interval import load_event_intervals
+from tool.base import BaseTool, ToolFailure, ToolResult
+
+summary_devices = list(
+    dict.fromkeys(
+        [
+            *energy_device_config,
+            *power_fuel_device_config["燃油消耗量"],
+            *event_tables.values(),
+            "绞车",
+            "航行状态",
+        ]
+    )
+)
+
+# 设备 -> (数据表, 开始事件, 结束事件)，用于查询每次运行的起止时间和时长
+run_events = {
+    "A架": ("A架动作表", "A架开机", "A架关机"),
+    "折臂吊车": ("折臂吊车与小艇动作表", "折臂吊车开机", "折臂吊车关机"),
+    "艏推DP": ("艏侧推系统DP动作表", "ON DP", "OFF DP"),
+}
+
+
+class DailySummaryQueryer(BaseTool):
+    """每日统计查询工具"""
+
+    name: str = "daily_summary_queryer"
+    description: str = (
+        "查询指定时间段内**每一天**某设备的统计数据，包括能耗、燃油消耗量、实际发电量、运行时长、布放/回收阶段时长、航行状态时长，以及每天各关键动作的次数、首次和末次发生时间；A架、折臂吊车、艏推DP还包括当天开始的每次运行（开机到关机）的起止时间和时长。"
+    )
+    input: str = "起始日期、结束日期、设备名称"
+    output: str = "指定时间段内每一天该设备的统计数据和关键动作汇总。"
+    examples: List[str] = [
+        "统计2024/8/24-2024/8/30每天A架的运行时长和开机次数",
+        "2024/8/24 A架第二次开机运行了多久",
+        "2024/8/24-2024/8/30哪一天全船能耗最高",
+    ]
+    notices: List[str] = [
+        "【任务分解】涉及按天统计（每天的能耗、运行时长、动作次数、最早/最晚动作时间）时，优先使用 daily_summary_queryer 一次查询多天，不要分解为逐天查询",
+    ]
+    parameters: dict = {
+        "type": "object",
+        "properties": {
+            "start_date": {
+                "type": "string",
+                "description": "时间段起始日期，格式为 'YYYY-MM-DD'。",
+            },
+            "end_date": {
+                "type": "string",
+                "description": "时间段结束日期，格式为 'YYYY-MM-DD'。",
+            },
+            "device_name": {
+                "type": "string",
+                "enum": summary_devices,
+                "description": "设备名称，'航行状态'用于查询每天各航行状态的时长。",
+            },
+        },
+        "required": ["start_date", "end_date", "device_name"],
+    }
+
+    def execute(self, start_date: str, end_date: str, device_name: str) -> ToolResult:
+        """
+        查询指定时间段内每天设备的统计数据
+
+        :param start_date (str): 时间段起始日期，格式为 'YYYY-MM-DD'
+        :param end_date (str): 时间段结束日期，格式为 'YYYY-MM-DD'
+        :param device_name (str): 设备名称
+
+        :return ToolResult: 每天的统计数据和关键动作汇总
+        """
+        if device_name not in summary_devices:
+            return ToolFailure(error=f"未知的设备名称: {device_name}")
+        try:
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError as e:
+            return ToolFailure(error=f"日期格式错误: {e}")
+
+        device_summary = DailyRollup.load_device_summary(self.table_base_path)
+        device_summary = device_summary[
+            (device_summary["device"] == device_name)
+            & (device_summary["date"] >= start_date)
+            & (device_summary["date"] <= end_date)
+        ]
+        action_summary = DailyRollup.load_action_summary(self.table_base_path)
+        action_summary = action_summary[
+            (action_summary["device"] == device_name)
+            & (action_summary["date"] >= start_date)
+            & (action_summary["date"] <= end_date)
+        ]
+
+        runs = self.get_runs(device_name, start_date, end_date)
+
+        result = []
+        for day in pd.date_range(start_date, end_date, freq="D").strftime("%Y-%m-%d"):
+            metrics = device_summary[device_summary["date"] == day]
+            actions = action_summary[action_summary["date"] == day]
+            result.append(
+                {
+                    "日期": day,
+                    "统计": {
+                        metric: None if pd.isna(value) else round(float(value), 2)
+                        for metric, value in zip(metrics["metric"], metrics["value"])
+                    },
+                    "关键动作": {
+                        row["key_action"]: {
+                            "次数": int(row["count"]),
+                            "首次时间": row["first_time"],
+                            "末次时间": row["last_time"],
+                        }
+                        for _, row in actions.iterrows()
+                    },
+                }
+            )
+            if device_name in run_events:
+                result[-1]["运行区间"] = runs.get(day, [])
+
+        return ToolResult(output={"result": result})
+
+    def get_runs(self, device_name: str, start_date: str, end_date: str) -> dict:
+        """
+        查询设备在日期范围内开始的每次运行
+
+        :param device_name (str): 设备名称
+        :param start_date (str): 起始日期
+        :param end_date (str): 结束日期（含）
+        :return dict[str, list[dict]]: 日期 -> 当天开始的各次运行的起止时间和时长
+        """
+        if device_name not in run_events:
+            return {}
+        table_name, start_event, end_event = run_events[device_name]
+        try:
+            starts, ends = load_event_intervals(
+                f"{self.table_base_path}/{table_name}.csv", start_event, end_event
+            )
+        except (FileNotFoundError, KeyError):
+            return {}
+        lo = starts.searchsorted(np.datetime64(start_date), "left")
+        hi = starts.searchsorted(np.datetime64(end_date) + np.timedelta64(1, "D"), "left")
+        starts, ends = pd.to_datetime(starts[lo:hi]), pd.to_datetime(ends[lo:hi])
+
+        runs = {}
+        for start, end in zip(starts, ends):
+            runs.setdefault(start.strftime("%Y-%m-%d"), []).append(
+                {
+                    "开始时间": start.strftime("%Y-%m-%d %H:%M:%S"),
+                    "结束时间": end.strftime("%Y-%m-%d %H:%M:%S"),
+                    "时长(分钟)": round((end - start).total_seconds() / 60, 2),
+                }
+            )
+        return runs
@@ -9,7 +9,9 @@ import traceback
 from typing import Dict, List
 
 import pandas as pd
-from tool.base import BaseTool, ToolFailure, ToolResult
+from table_store import TableStore
+from tool.base import BaseTool, ToolException, ToolFailure, ToolResult
+from tool.condition import compile_conditions
 from utils import get_table_meta
 import logger
 
@@ -115,15 +117,13 @@ class DataAggregator(BaseTool):
         dict: 包含聚合结果的字典，或错误信息
         """
         try:
-            df = pd.read_csv(f"{self.table_base_path}/{table_name}.csv")
+            df = self.load_table(table_name)
         except FileNotFoundError:
             return ToolFailure(error=f"数据表 {table_name} 不存在")
 
         if "csvTime" not in df.columns:
             return ToolFailure(error="数据表缺少 csvTime 时间列")
 
-        df["csvTime"] = pd.to_datetime(df["csvTime"], unit="ns")
-
         start_time = pd.to_datetime(start_time.replace("24:00:00", "23:59:59"))
         end_time = pd.to_datetime(end_time.replace("24:00:00", "23:59:59"))
 
@@ -137,7 +137,7 @@ class DataAggregator(BaseTool):
             end_time = end_time.replace(second=59)
 
         if start_time == end_time:
-            closest_data = df.iloc[(df["csvTime"] - start_time).abs().argsort()[:1]]
+            closest_data = TableStore.closest_to(df, start_time)
             if closest_data.empty:
                 return ToolFailure(
                     error=f"未找到时间点 {start_time} 附近的数据"
@@ -145,80 +145,19 @@ class DataAggregator(BaseTool):
 
             filtered_data = closest_data
         else:
-            filtered_data = df[
-                (df["csvTime"] >= start_time) & (df["csvTime"] <= end_time)
-            ]
+            filtered_data = TableStore.slice_by_time(df, start_time, end_time)
 
         if conditions:
-            logic = conditions_logic.upper()
-            if logic not in ["AND", "OR"]:
-                return ToolFailure(
-                    error=f"不支持的逻辑操作符: {logic}"
-                )
-            mask = None
-            for condition in conditions:
-                cond_col, operator, cond_value = (
-                    condition["column"],
-                    condition["operator"],
-                    condition["value"],
-                )
-
+            try:
+                predicate = compile_conditions(conditions, conditions_logic)
+            except ToolException as e:
+                return ToolFailure(error=e.message)
+            for cond_col in predicate.columns:
                 if cond_col not in filtered_data.columns:
                     return ToolFailure(
                         error=f"条件列 {cond_col} 不存在于数据表 {table_name}",
-                        
-                    )
-
-                try:
-                    cond_value = float(cond_value)
-                    column_values = filtered_data[cond_col].astype(float)
-                except ValueError:
-                    cond_value = str(cond_value)
-                    column_values = filtered_data[cond_col].astype(str)
-
-                if operator == "==":
-                    condition_mask = column_values == cond_value
-                elif operator == "!=":
-                    condition_mask = column_values != cond_value
-                elif operator == ">":
-                    condition_mask = column_values > cond_value
-                elif operator == "<":
-                    condition_mask = column_values < cond_value
-                elif operator == ">=":
-                    condition_mask = column_values >= cond_value
-                elif operator == "<=":
-                    condition_mask = column_values <= cond_value
-                elif operator == "in":
-                    if isinstance(cond_value, str):
-                        try:
-                            cond_value = [v.strip() for v in cond_value.split(",")]
-                        except Exception:
-                            return ToolFailure(
-                                error=f"条件值 {cond_value} 解析失败，应为以逗号分隔的字符串列表（示例：value1,value2,value3）",
-                                
-                            )
-
-                    else:
-                        return ToolFailure(
-                            error=f"条件值 {cond_value} 格式错误，应为以逗号分隔的字符串列表（示例：value1,value2,value3）",
-                            
-                        )
-                    condition_mask = column_values.isin(cond_value)
-                else:
-                    return ToolFailure(
-                        error=f"不支持的操作符: {operator}"
-                    )
-
-                if mask is None:
-                    mask = condition_mask
-                else:
-                    mask = (
-                        mask & condition_mask
-                        if logic == "AND"
-                        else mask | condition_mask
                     )
-            if mask is not None:
-                filtered_data = filtered_data[mask]
+            filtered_data = filtered_data[predicate.evaluate(filtered_data)]
 
         if column not in filtered_data.columns:
             return ToolFailure(
@@ -10,6 +10,7 @@ import traceback
 from typing import Dict, List
 
 import pandas as pd
+from event_index import EventIndex
 from tool.base import BaseTool, ToolFailure, ToolResult
 import logger
 
@@ -53,14 +54,13 @@ class DeepseaOperationCounter(BaseTool):
         end_time_dt = pd.to_datetime(end_time)
         if (end_time_dt - start_time_dt).total_seconds() < 60:
             end_time_dt = start_time_dt + pd.Timedelta(minutes=1)
-        df = pd.read_csv(f"{self.table_base_path}/A架动作表.csv")
-        df["csvTime"] = pd.to_datetime(df["csvTime"])
-        df = df[
-            (df["csvTime"] >= start_time)
-            & (df["csvTime"] <= end_time)
-            & (df["stage"].isin(["布放阶段结束", "回收阶段开始"]))
-        ]
-        df = df.sort_values(by="csvTime")
+        df = EventIndex.query(
+            self.table_base_path,
+            start_time,
+            end_time,
+            table="A架动作表",
+            stage=["布放阶段结束", "回收阶段开始"],
+        )
         # 分离 `布放阶段结束` 和 `回收阶段开始`
         deploy_end_times = df[df["stage"] == "布放阶段结束"]["csvTime"].tolist()
         retrieve_start_times = df[df["stage"] == "回收阶段开始"]["csvTime"].tolist()
@@ -82,4 +82,4 @@ class DeepseaOperationCounter(BaseTool):
                 count += 1
                 j += 1  # 移动到下一个 `回收阶段开始`
 
-        return ToolResult(output=count)
+        return ToolResult(output={"result": count})
@@ -46,7 +46,7 @@ class DeviceParamDetailQueryer(BaseTool):
         :return: 返回包含参数信息的字典
         """
 
-        df = pd.read_csv(f"{self.table_base_path}/设备参数详情.csv")
+        df = self.load_table("设备参数详情")
         if not df["Channel_Text_CN"].str.contains(parameter_name_cn).any():
             return ToolFailure(
                 error=f"未找到包含 '{parameter_name_cn}' 的参数中文名"
@@ -5,13 +5,12 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
-import traceback
 from typing import List
 import pandas as pd
 from tool.base import BaseTool, ToolFailure, ToolResult
 from texttable import Texttable
-from utils import load_and_filter_data
-import logger
+from device_config import energy_device_config
+from utils import calculate_device_energies, resolve_device_leaves
 
 
 class EnergyUsageCalculator(BaseTool):
@@ -80,69 +79,30 @@ class EnergyUsageCalculator(BaseTool):
         start_time = start_time.replace("24:00:00", "23:59:59")
         end_time = end_time.replace("24:00:00", "23:59:59")
 
-        device_config = {
-            "全船": ["甲板机械设备", "推进系统", "舵桨"],
-            "甲板机械设备": ["折臂吊车", "A架", "绞车变频器"],
-            "折臂吊车": ("折臂吊车与小艇动作表", "13-11-6_v"),
-            "A架": ["一号门架", "二号门架"],
-            "一号门架": ("device_1_5_meter_105", "1-5-6_v"),
-            "二号门架": ("device_13_14_meter_1314", "13-14-6_v"),
-            "绞车变频器": ("device_1_15_meter_115", "1-15-8_v"),
-            "推进系统": ["主推", "可伸缩推", "侧推"],
-            "主推": ["一号推进变频器", "二号推进变频器"],
-            "一号推进变频器": ("Port3_ksbg_8", "P3_15"),
-            "二号推进变频器": ("Port4_ksbg_7", "P4_16"),
-            "可伸缩推": ("Port4_ksbg_8", "P4_21"),
-            "侧推": ("艏侧推系统DP动作表", "P3_18"),
-            "舵桨": [
-                "一号舵桨转舵A",
-                "一号舵桨转舵B",
-                "二号舵桨转舵A",
-                "二号舵桨转舵B",
-            ],
-            "一号舵桨转舵A": ("device_1_2_meter_102", "1-2-6_v"),
-            "一号舵桨转舵B": ("device_1_3_meter_103", "1-3-6_v"),
-            "二号舵桨转舵A": ("device_13_2_meter_1302", "13-2-6_v"),
-            "二号舵桨转舵B": ("device_13_3_meter_1303", "13-3-6_v"),
-        }
+        device_config = energy_device_config
         if device_name not in device_config.keys():
             return ToolFailure(error=f"未知的设备名称: {device_name}")
 
-        result = None
-        if isinstance(device_config[device_name], list):
-            total_energy = 0
-            for sub_device in device_config[device_name]:
-                try:
-                    energy = self.execute(
-                        start_time, end_time, device_name=sub_device
-                    ).output["result"]
-                    if energy:
-                        total_energy += energy
-                except Exception as e:
-                    logger.error(
-                        f"计算设备 {sub_device} 能耗时出错: {e},{traceback.format_exc()}"
-                    )
-            result = total_energy
-        else:
-            table_name, power_column = device_config[device_name]
-            file_path = f"{self.table_base_path}/{table_name}.csv"
-            try:
-                filtered_data = load_and_filter_data(
-                    file_path, start_time, end_time, power_column
-                )
-                if isinstance(filtered_data, str) or filtered_data is None:
-                    result = None
-                else:
-                    total_energy_kWh = filtered_data["energy_kWh"].sum()
-                    result = total_energy_kWh
-            except Exception as e:
-                logger.error(
-                    f"计算设备 {device_name} 能耗时出错: {e},{traceback.format_exc()}"
-                )
-        return ToolResult(
-            output={
-                "result": result,
-                "unit": "kWh",
-            },
-            
+        leaves = resolve_device_leaves(device_config, device_name)
+        energies = calculate_device_energies(
+            self.table_base_path, leaves, start_time, end_time
         )
+
+        def get_total_energy(name):
+            """按设备树逐级累加叶子设备的能耗"""
+            if not isinstance(device_config[name], list):
+                return energies[name]
+            total_energy = 0
+            for sub_device in device_config[name]:
+                energy = get_total_energy(sub_device)
+                if energy:
+                    total_energy += energy
+            return total_energy
+
+        output = {
+            "result": get_total_energy(device_name),
+            "unit": "kWh",
+        }
+        if isinstance(device_config[device_name], list):
+            output["detail"] = energies
+        return ToolResult(output=output)
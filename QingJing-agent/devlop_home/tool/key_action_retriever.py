@@ -5,8 +5,10 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
+import os
 from typing import List
 import pandas as pd
+from event_index import EventIndex
 from tool.base import BaseTool, ToolFailure, ToolResult
 
 
@@ -76,37 +78,25 @@ class KeyActionRetriever(BaseTool):
                 "end_time": end_time,
             }
 
-            try:
-                df = pd.read_csv(f"{self.table_base_path}/{table_name}.csv")
-            except FileNotFoundError:
+            if not os.path.exists(f"{self.table_base_path}/{table_name}.csv"):
                 return ToolFailure(error=f"数据表 {table_name} 不存在")
 
-            df["csvTime"] = pd.to_datetime(df["csvTime"], unit="ns")
-
-            filtered_data = df[
-                (df["csvTime"] >= start_time_dt)
-                & (df["csvTime"] <= end_time_dt)
-                & (df["key_action"] != "False")
-            ]
+            events = EventIndex.query(
+                self.table_base_path,
+                start_time_dt,
+                end_time_dt,
+                table=table_name,
+            )
+            events = events[events["key_action"] != "False"]
 
-            if filtered_data.empty:
+            if events.empty:
                 return ToolFailure(
                     error=f"在数据表 {table_name} 中未找到时间范围 {start_time} 到 {end_time} 且 key_action 不为 'False' 的数据",
                 )
-            if "key_action" not in filtered_data.columns:
-                return ToolFailure(
-                    error=f"数据表 {table_name} 中不存在 'key_action' 列",
-                )
 
-            status_changes = filtered_data[["csvTime", "key_action"]].copy()
-            if device_name == "A架":
-                status_changes = status_changes[
-                    ~status_changes["key_action"].isin(["缆绳挂妥", "缆绳解除"])
-                ]
-            elif device_name == "绞车":
-                status_changes = status_changes[
-                    status_changes["key_action"].isin(["缆绳挂妥", "缆绳解除"])
-                ]
+            status_changes = events[events["device"] == device_name][
+                ["csvTime", "key_action"]
+            ].copy()
             status_changes["csvTime"] = status_changes["csvTime"].dt.strftime(
                 "%Y-%m-%d %H:%M:%S"
             )
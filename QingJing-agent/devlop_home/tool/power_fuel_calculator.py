@@ -5,13 +5,12 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
-import traceback
 from typing import List
 import pandas as pd
 from tool.base import BaseTool, ToolFailure, ToolResult
 from texttable import Texttable
-from utils import load_and_filter_data
-import logger
+from device_config import power_fuel_device_config
+from utils import calculate_device_energies, resolve_device_leaves
 
 
 class PowerFuelCalculator(BaseTool):
@@ -93,44 +92,7 @@ class PowerFuelCalculator(BaseTool):
         :param diesel_calorific_value (float): 柴油热值，单位MJ/kg
         :return ToolResult: 发电量或燃油消耗量
         """
-        device_config = {
-            "燃油消耗量": {
-                "一号柴油发电机": ("Port1_ksbg_1", "P1_3"),
-                "二号柴油发电机": ("Port1_ksbg_1", "P1_25"),
-                "三号柴油发电机": ("Port2_ksbg_1", "P2_3"),
-                "四号柴油发电机": ("Port2_ksbg_1", "P2_25"),
-                "整个柴油发电机组": [
-                    "一号柴油发电机",
-                    "二号柴油发电机",
-                    "三号柴油发电机",
-                    "四号柴油发电机",
-                ],
-            },
-            "实际发电量": {
-                "一号柴油发电机": ("Port1_ksbg_3", "P1_66"),
-                "二号柴油发电机": ("Port1_ksbg_3", "P1_75"),
-                "三号柴油发电机": ("Port2_ksbg_2", "P2_51"),
-                "四号柴油发电机": ("Port2_ksbg_3", "P2_60"),
-                "整个柴油发电机组": [
-                    "一号柴油发电机",
-                    "二号柴油发电机",
-                    "三号柴油发电机",
-                    "四号柴油发电机",
-                ],
-            },
-            "理论发电量": {
-                "一号柴油发电机": ("Port1_ksbg_1", "P1_3"),
-                "二号柴油发电机": ("Port1_ksbg_1", "P1_25"),
-                "三号柴油发电机": ("Port2_ksbg_1", "P2_3"),
-                "四号柴油发电机": ("Port2_ksbg_1", "P2_25"),
-                "整个柴油发电机组": [
-                    "一号柴油发电机",
-                    "二号柴油发电机",
-                    "三号柴油发电机",
-                    "四号柴油发电机",
-                ],
-            },
-        }
+        device_config = power_fuel_device_config
 
         if type not in device_config.keys():
             return ToolFailure(error=f"未知的类型: {type}")
@@ -143,55 +105,36 @@ class PowerFuelCalculator(BaseTool):
         ):
             return ToolFailure(error=f"柴油密度或柴油热值不能为None")
 
-        result = None
-        if isinstance(device_config[type][device_name], list):
-            total_energy = 0
-            for sub_device in device_config[type][device_name]:
-                try:
-                    energy = self.execute(
-                        start_time,
-                        end_time,
-                        type,
-                        sub_device,
-                        diesel_density,
-                        diesel_calorific_value,
-                    ).output["result"]
-                    if energy is not None:
-                        total_energy += energy
-                except Exception as e:
-                    logger.error(
-                        f"计算设备 {sub_device} {type}时出错: {traceback.format_exc()}"
-                    )
-            result = total_energy
-        else:
-            file_name, field_name = device_config[type][device_name]
-            file_path = f"{self.table_base_path}/{file_name}.csv"
-            try:
-                filtered_data = load_and_filter_data(
-                    file_path, start_time, end_time, field_name
+        type_config = device_config[type]
+        leaves = resolve_device_leaves(type_config, device_name)
+        values = calculate_device_energies(
+            self.table_base_path, leaves, start_time, end_time
+        )
+        if type == "理论发电量":
+            values = {
+                leaf_name: (
+                    energy * diesel_density * diesel_calorific_value / 3.6
+                    if energy is not None
+                    else None
                 )
-                if isinstance(filtered_data, str) or filtered_data is None:
-                    result = None
-                else:
-                    total_energy_kWh = filtered_data["energy_kWh"].sum()
-                    if type == "理论发电量":
-                        result = (
-                            total_energy_kWh
-                            * diesel_density
-                            * diesel_calorific_value
-                            / 3.6
-                        )
-                    else:
-                        result = total_energy_kWh
+                for leaf_name, energy in values.items()
+            }
 
-            except Exception as e:
-                logger.error(
-                    f"计算设备 {device_name} {type}时出错: {traceback.format_exc()}"
-                )
-        return ToolResult(
-            output={
-                "result": result,
-                "unit": "L" if type == "燃油消耗量" else "kWh",
-            },
-            
-        )
+        def get_total_value(name):
+            """按设备树逐级累加叶子设备的结果"""
+            if not isinstance(type_config[name], list):
+                return values[name]
+            total_value = 0
+            for sub_device in type_config[name]:
+                value = get_total_value(sub_device)
+                if value is not None:
+                    total_value += value
+            return total_value
+
+        output = {
+            "result": get_total_value(device_name),
+            "unit": "L" if type == "燃油消耗量" else "kWh",
+        }
+        if isinstance(type_config[device_name], list):
+            output["detail"] = values
+        return ToolResult(output=output)
@@ -5,13 +5,19 @@
 # All rights reserved.
 # Licensed under the MIT License.
 
-from datetime import datetime, timedelta
-import traceback
-from typing import Dict, List
+from datetime import datetime
+from typing import List
+
+import pandas as pd
+from stage_interval import clip_intervals_by_day, load_stage_intervals
 from tool.base import BaseTool, ToolFailure, ToolResult
-from tool.data_aggregator import DataAggregator
-from tool.data_filter import DataFilter
-import logger
+
+stage_column_map = {
+    "停泊状态": "docking_status",
+    "航渡状态": "voyage_status",
+    "动力定位状态": "dp_status",
+    "伴航状态": "escort_status",
+}
 
 
 class SalingStageQueryer(BaseTool):
@@ -61,108 +67,42 @@ class SalingStageQueryer(BaseTool):
 
         :return ToolResult: 每天的开始时间、结束时间和时长信息。
         """
-        start_date = f"{start_date} 00:00:00"
-        end_date = f"{end_date} 23:59:59"
-
-        start_dt = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
-        current_dt = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S")
-        end_dt = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S")
-
-        stage_column_map = {
-            "停泊状态": "docking_status",
-            "航渡状态": "voyage_status",
-            "动力定位状态": "dp_status",
-            "伴航状态": "escort_status",
-        }
-
         if stage not in stage_column_map:
             return ToolFailure(error=f"无效的航行状态: {stage}")
-
-        data_filter_result = DataFilter().execute(
-            "航行状态表",
-            start_date,
-            end_date,
-            columns=["csvTime", stage_column_map[stage]],
-            conditions=[
-                {
-                    "column": stage_column_map[stage],
-                    "operator": "in",
-                    "value": ",".join([f"{stage}开始", f"{stage}中", f"{stage}结束"]),
-                }
-            ],
-            ignore_too_many=True,
-        )
+        try:
+            start_date = datetime.strptime(start_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+            end_date = datetime.strptime(end_date, "%Y-%m-%d").strftime("%Y-%m-%d")
+        except ValueError as e:
+            return ToolFailure(error=f"日期格式错误: {e}")
 
         try:
-            filtered_data = data_filter_result.output["result"]
-        except:
-            return ToolFailure(
-                error=f"获取数据错误: {data_filter_result.error}"
+            starts, ends = load_stage_intervals(
+                f"{self.table_base_path}/航行状态表.csv", stage_column_map[stage], stage
             )
+        except FileNotFoundError:
+            return ToolFailure(error="获取数据错误: 数据表 航行状态表 不存在")
 
-        start_points = {}
-        end_points = {}
+        pieces = clip_intervals_by_day(starts, ends, start_date, end_date)
+        if pieces.empty:
+            return ToolFailure(error="获取数据错误: 所有过滤条件应用后，没有匹配的数据")
 
-        while current_dt <= end_dt:
-            day_str = current_dt.strftime("%Y-%m-%d")
-            start_points[day_str] = []
-            end_points[day_str] = []
-            current_dt += timedelta(days=1)
-
-        for index, item in enumerate(filtered_data["csvTime"]):
-            res_time = item
-            res_stage = filtered_data[stage_column_map[stage]][index]
-            res_time_dt = datetime.strptime(res_time, "%Y-%m-%d %H:%M:%S")
-            res_day = datetime.strftime(res_time_dt, "%Y-%m-%d")
-
-            if f"{stage}开始" in res_stage:
-                start_points[res_day].append(res_time)
-            elif f"{stage}结束" in res_stage:
-                end_points[res_day].append(res_time)
+        pieces["day"] = pieces["date"].dt.strftime("%Y-%m-%d")
+        pieces["start"] = pieces["start"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        pieces["end"] = pieces["end"].dt.strftime("%Y-%m-%d %H:%M:%S")
+        by_day = pieces.groupby("day", sort=False)
+        start_points = by_day["start"].agg(list)
+        end_points = by_day["end"].agg(list)
+        durations = by_day["minutes"].sum()
 
         result = []
-        for day in start_points.keys():
-            data_aggregator_result = (
-                DataAggregator()
-                .execute(
-                    "航行状态表",
-                    f"{day} 00:00:00",
-                    f"{day} 23:59:59",
-                    stage_column_map[stage],
-                    method="count",
-                    conditions=[
-                        {
-                            "column": stage_column_map[stage],
-                            "operator": "in",
-                            "value": ",".join([f"{stage}开始", f"{stage}中"]),
-                        }
-                    ],
-                )
-                .output[f"{stage_column_map[stage]}_count"]
-            )
-            if data_aggregator_result > 0:
-                if len(start_points.get(day, [])) == 0:
-                    start_points[day].append(f"{day} 00:00:00")
-                if len(end_points.get(day, [])) == 0:
-                    end_points[day].append(f"{day} 23:59:59")
-            sorted_start_points = sorted(start_points.get(day, []))
-            sorted_end_points = sorted(end_points.get(day, []))
-            duration = 0
-            for start_time, end_time in zip(sorted_start_points, sorted_end_points):
-                duration += round(
-                    (
-                        datetime.strptime(end_time, "%Y-%m-%d %H:%M:%S")
-                        - datetime.strptime(start_time, "%Y-%m-%d %H:%M:%S")
-                    ).total_seconds()
-                    / 60
-                )
+        for day in pd.date_range(start_date, end_date, freq="D").strftime("%Y-%m-%d"):
             result.append(
                 {
                     "日期": day,
                     "开始时间列表": start_points.get(day, []),
                     "结束时间列表": end_points.get(day, []),
-                    f"{stage}总时长": f"{duration}分钟",
+                    f"{stage}总时长": f"{int(durations.get(day, 0))}分钟",
                 }
             )
 
-        return ToolResult(output=result)
+        return ToolResult(output={"result": result})
@@ -8,10 +8,33 @@
 from datetime import datetime
 import traceback
 from typing import Dict, List
-from tool.base import BaseTool, ToolFailure, ToolResult
+
+import numpy as np
+import pandas as pd
+from tool.base import BaseTool, ToolException, ToolFailure, ToolResult
+from tool.condition import compile_conditions
 import logger
 
 
+def parse_datetimes(input_list: List[str]) -> pd.Series:
+    """批量解析日期时间字符串（YYYY-MM-DD HH:MM:SS）"""
+    try:
+        return pd.to_datetime(
+            pd.Series(input_list, dtype=object), format="%Y-%m-%d %H:%M:%S"
+        )
+    except ValueError:
+        # 逐个解析，抛出与 strptime 一致的简短错误信息
+        for item in input_list:
+            datetime.strptime(item, "%Y-%m-%d %H:%M:%S")
+        raise
+
+
+def parse_value_time(value: str):
+    """解析时间字符串（HH:MM:SS），返回一天内的秒数"""
+    t = datetime.strptime(value, "%H:%M:%S").time()
+    return "float", float(t.hour * 3600 + t.minute * 60 + t.second)
+
+
 class TimeSorter(BaseTool):
     """时间排序工具"""
 
@@ -91,93 +114,31 @@ class TimeSorter(BaseTool):
         :return ToolResult: 排序后的列表及相关信息。
         """
         try:
-
-            def parse_value_date(value):
-                """解析日期时间字符串，提取时间部分"""
-                dt = datetime.strptime(value, "%Y-%m-%d %H:%M:%S")
-                return dt.time()
-
-            def parse_value_time(value):
-                """解析时间字符串"""
-                return datetime.strptime(value, "%H:%M:%S").time()
-
-            sorted_list = sorted(
-                input_list, key=parse_value_date, reverse=(order == "desc")
+            times = parse_datetimes(input_list)
+            # 只比较一天内的时间（秒数）
+            seconds = (times - times.dt.normalize()).dt.total_seconds()
+            key = seconds.to_numpy()
+            order_index = np.argsort(-key if order == "desc" else key, kind="stable")
+            df = pd.DataFrame(
+                {"time": key[order_index], "item": np.asarray(input_list, dtype=object)[order_index]}
             )
+            item_dates = times.dt.strftime("%Y-%m-%d").to_numpy()[order_index]
 
             if conditions:
-                logic = conditions_logic.upper()
-                if logic not in ["AND", "OR"]:
-                    return ToolFailure(
-                        error=f"不支持的逻辑操作符: {logic}"
+                try:
+                    predicate = compile_conditions(
+                        [{"column": "time", **condition} for condition in conditions],
+                        conditions_logic,
+                        parse_value=parse_value_time,
                     )
-
-                mask = (
-                    [False] * len(sorted_list)
-                    if logic == "OR"
-                    else [True] * len(sorted_list)
-                )
-
-                for condition in conditions:
-                    operator, value = (
-                        condition["operator"],
-                        condition["value"],
-                    )
-                    if operator not in ["in", "==", ">", "<", ">=", "<=", "!="]:
-                        return ToolFailure(
-                            error=f"不支持的操作符: {operator}"
-                        )
-                    try:
-                        parsed_value = parse_value_time(value)
-                    except ValueError as e:
-                        return ToolFailure(error=str(e))
-
-                    condition_mask = []
-                    for item in sorted_list:
-                        try:
-                            parsed_item = parse_value_date(item)
-                        except ValueError:
-                            condition_mask.append(False)
-                            continue
-
-                        if operator == "==":
-                            condition_mask.append(parsed_item == parsed_value)
-                        elif operator == "!=":
-                            condition_mask.append(parsed_item != parsed_value)
-                        elif operator == ">":
-                            condition_mask.append(parsed_item > parsed_value)
-                        elif operator == "<":
-                            condition_mask.append(parsed_item < parsed_value)
-                        elif operator == ">=":
-                            condition_mask.append(parsed_item >= parsed_value)
-                        elif operator == "<=":
-                            condition_mask.append(parsed_item <= parsed_value)
-                        elif operator == "in":
-                            if isinstance(value, str):
-                                value_list = [
-                                    parse_value_time(v.strip())
-                                    for v in value.split(",")
-                                ]
-                            else:
-                                return ToolFailure(
-                                    error=f"条件值 {value} 格式错误，in 操作符需要以逗号分隔的字符串",
-                                    
-                                )
-                            condition_mask.append(parsed_item in value_list)
-
-                    if logic == "AND":
-                        mask = [m1 & m2 for m1, m2 in zip(mask, condition_mask)]
-                    else:
-                        mask = [m1 | m2 for m1, m2 in zip(mask, condition_mask)]
-
-                sorted_list = [item for item, keep in zip(sorted_list, mask) if keep]
-
-            dates = sorted(
-                {
-                    datetime.strptime(x, "%Y-%m-%d %H:%M:%S").strftime("%Y-%m-%d")
-                    for x in sorted_list
-                }
-            )
+                except ToolException as e:
+                    return ToolFailure(error=e.message)
+                mask = predicate.evaluate(df)
+                df = df[mask]
+                item_dates = item_dates[mask]
+
+            sorted_list = df["item"].tolist()
+            dates = sorted(set(item_dates))
             return ToolResult(
                 output={
                     "result": sorted_list,
@@ -13,6 +13,7 @@ from tool import (
     DataFilter,
     ToolCollection,
     BeforeOrLateRatioCalculator,
+    DailySummaryQueryer,
     DataAggregator,
     DeepseaOperationCounter,
     DurationCalculator,
@@ -28,6 +29,7 @@ from tool import (
 
 all_available_tools = ToolCollection(
     BeforeOrLateRatioCalculator(),
+    DailySummaryQueryer(),
     DataFilter(),
     DataAggregator(),
     DeepseaOperationCounter(),
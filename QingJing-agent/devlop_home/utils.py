@@ -7,12 +7,15 @@
 
 """工具函数"""
 
+import concurrent.futures
 import json
 import numpy as np
 import pandas as pd
 import logger
 import traceback
+from llm_cache import refresh_cache
 from schema import ApiConfig, ModuleConfig
+from table_store import TableStore
 from texttable import Texttable
 
 config_file = "devlop_home/config.json"
@@ -85,9 +88,34 @@ def custom_serializer(obj):
 
 
 def try_run(func, *args, max_retries=3, **kwargs):
+    """
+    执行 func，结果为空时重试；重试时不读取 LLM 回答缓存，避免得到同一个出错的回答
+    """
+    attempts = 0
+    while attempts < max_retries:
+        token = refresh_cache.set(attempts > 0)
+        try:
+            res = func(*args, **kwargs)
+        finally:
+            refresh_cache.reset(token)
+        if not res:
+            attempts += 1
+            logger.error(
+                f"第 {attempts} 次执行 {func.__name__} 出错，\n{traceback.format_exc()}"
+            )
+        else:
+            return res
+    logger.error(f"执行 {func.__name__} 失败，已达到最大重试次数 {max_retries} 次。")
+
+
+async def try_run_async(func, *args, max_retries=3, **kwargs):
     attempts = 0
     while attempts < max_retries:
-        res = func(*args, **kwargs)
+        token = refresh_cache.set(attempts > 0)
+        try:
+            res = await func(*args, **kwargs)
+        finally:
+            refresh_cache.reset(token)
         if not res:
             attempts += 1
             logger.error(
@@ -210,50 +238,93 @@ def render_text_table(result: dict) -> str:
     return table.draw()
 
 
-def load_and_filter_data(
-    file_path, start_time, end_time, power_column
-) -> tuple[pd.DataFrame | str]:
+def calculate_energy(file_path, start_time, end_time, power_column) -> float | str:
     """
-    加载 CSV 文件并筛选指定时间范围内的数据
+    计算指定时间范围内功率列的能耗（kWh）
+
+    基于 TableStore 缓存的累计能耗前缀和，每次查询只需两次二分查找和一次减法。
+    范围内最后一条数据之后的时间段不计入能耗。
 
     :param file_path (str): CSV 文件路径
     :param start_time (str): 开始时间
     :param end_time (str): 结束时间
     :param power_column (str): 功率列名
 
-    :return DataFrame|str: 筛选后的 DataFrame | 错误
+    :return float|str: 能耗（kWh） | 错误
     """
     try:
-        df = pd.read_csv(file_path)
+        times = TableStore.load_column(file_path, "csvTime")
     except FileNotFoundError:
         return f"文件 {file_path} 未找到"
-    try:
-        df["csvTime"] = pd.to_datetime(df["csvTime"])
-    except Exception as e:
-        return f"时间列转换失败: {e}"
-
-    if isinstance(start_time, str):
-        start_time_dt = pd.to_datetime(start_time)
-    if isinstance(end_time, str):
-        end_time_dt = pd.to_datetime(end_time)
+    if not np.issubdtype(times.dtype, np.datetime64):
+        return f"时间列转换失败: {file_path}"
+    cumulative_energy = TableStore.load_cumulative_energy(file_path, power_column)
 
-    filtered_data = df[
-        (df["csvTime"] >= start_time_dt) & (df["csvTime"] <= end_time_dt)
-    ].copy()
+    lo = times.searchsorted(pd.Timestamp(start_time).to_datetime64(), "left")
+    hi = times.searchsorted(pd.Timestamp(end_time).to_datetime64(), "right")
 
-    if filtered_data.empty:
+    if lo == hi:
         return "筛选数据为空"
 
-    filtered_data.loc[:, "diff_seconds"] = (
-        filtered_data["csvTime"].diff().dt.total_seconds().shift(-1)
-    )
+    return np.float64(cumulative_energy[hi - 1] - cumulative_energy[lo])
 
-    # filtered_data.loc[filtered_data.index[-1], "diff_seconds"] = (
-    #     (end_time_dt - pd.to_datetime(filtered_data.iloc[-1]["csvTime"])).total_seconds()
-    # )
 
-    filtered_data.loc[:, "energy_kWh"] = (
-        filtered_data["diff_seconds"] * filtered_data[power_column] / 3600
-    )
+def resolve_device_leaves(device_config: dict, device_name: str) -> dict:
+    """
+    将组合设备展开为叶子设备
 
-    return filtered_data
+    :param device_config (dict): 设备配置，组合设备的值为子设备名称列表，叶子设备的值为 (数据表名, 功率列名)
+    :param device_name (str): 设备名称
+    :return dict: 叶子设备名称 -> (数据表名, 功率列名)，按配置顺序排列
+    """
+    config = device_config[device_name]
+    if not isinstance(config, list):
+        return {device_name: config}
+    leaves = {}
+    for sub_device in config:
+        leaves.update(resolve_device_leaves(device_config, sub_device))
+    return leaves
+
+
+def calculate_device_energies(
+    table_base_path: str, leaves: dict, start_time, end_time
+) -> dict:
+    """
+    并行计算多个叶子设备的能耗，同一数据表的设备在同一任务中计算，数据表只加载一次
+
+    :param table_base_path (str): 数据表目录
+    :param leaves (dict): 叶子设备名称 -> (数据表名, 功率列名)
+    :param start_time (str): 开始时间
+    :param end_time (str): 结束时间
+    :return dict: 叶子设备名称 -> 能耗（kWh），计算失败时为 None
+    """
+    table_leaves = {}
+    for leaf_name, (table_name, power_column) in leaves.items():
+        table_leaves.setdefault(table_name, []).append((leaf_name, power_column))
+
+    def calculate_table(table_name, items):
+        file_path = f"{table_base_path}/{table_name}.csv"
+        energies = {}
+        for leaf_name, power_column in items:
+            try:
+                energy = calculate_energy(file_path, start_time, end_time, power_column)
+                energies[leaf_name] = None if isinstance(energy, str) else energy
+            except Exception as e:
+                logger.error(
+                    f"计算设备 {leaf_name} 能耗时出错: {e},{traceback.format_exc()}"
+                )
+                energies[leaf_name] = None
+        return energies
+
+    energies = {}
+    if len(table_leaves) == 1:
+        energies.update(calculate_table(*next(iter(table_leaves.items()))))
+    else:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(table_leaves)
+        ) as executor:
+            for result in executor.map(
+                lambda item: calculate_table(*item), table_leaves.items()
+            ):
+                energies.update(result)
+    return {leaf_name: energies[leaf_name] for leaf_name in leaves}